@@ -1,8 +1,32 @@
 from django.contrib import admin
 
-from accounts.models import User
+from accounts.models import User, UserOffboarding
+from core.paginator import EstimatedCountPaginator
 
 
 @admin.register(User)
 class UserAdmin(admin.ModelAdmin):
     list_display = ("email", "company_id", "timezone")
+    search_fields = ("email", "username")
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+@admin.register(UserOffboarding)
+class UserOffboardingAdmin(admin.ModelAdmin):
+    list_display = (
+        "email",
+        "status",
+        "participations_removed",
+        "events_reassigned",
+        "events_deleted",
+        "started_at",
+        "finished_at",
+    )
+    list_filter = ("status",)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
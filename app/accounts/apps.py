@@ -1,6 +1,13 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class AccountsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "accounts"
+
+    def ready(self):
+        from accounts import signals  # noqa: F401
+        from accounts.sharding import reserve_shard_ids
+
+        post_migrate.connect(reserve_shard_ids)
@@ -0,0 +1,106 @@
+import time
+
+from django.apps import apps
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from accounts.models import TenantShard
+from accounts.sharding import TENANT_TABLES, shard_map
+from events.streams import muted
+
+
+class Command(BaseCommand):
+    help = (
+        "Move a company's data to another database shard. The tenant stays "
+        "readable during the move; writes are rejected until it is finished."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("company_id")
+        parser.add_argument("target", help="Database alias of the target shard.")
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, company_id, target, batch_size, **options):
+        if target not in settings.DATABASES:
+            raise CommandError(f"Unknown database alias '{target}'.")
+
+        shard_map.clear()
+        source, status = shard_map.get(company_id)
+        if status == TenantShard.Status.MOVING:
+            raise CommandError(f"Company {company_id} is already being moved.")
+        if source == target:
+            raise CommandError(f"Company {company_id} already lives in '{target}'.")
+
+        self.set_shard(company_id, source, TenantShard.Status.MOVING)
+        try:
+            with transaction.atomic(using=target):
+                for label, lookups in TENANT_TABLES:
+                    copied = self.copy_table(
+                        label, lookups, company_id, source, target, batch_size
+                    )
+                    self.stdout.write(f"Copied {copied} {label} row(s).")
+        except Exception:
+            self.set_shard(company_id, source, TenantShard.Status.ACTIVE)
+            raise
+
+        self.set_shard(company_id, target, TenantShard.Status.ACTIVE)
+        for label, lookups in reversed(TENANT_TABLES):
+            # The default database keeps the directory of every user.
+            if label == "accounts.User" and source == DEFAULT_DB_ALIAS:
+                continue
+            self.purge_table(label, lookups, company_id, source, batch_size)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Moved company {company_id} from '{source}' to '{target}'."
+            )
+        )
+
+    def set_shard(self, company_id, alias, status):
+        TenantShard.objects.using(DEFAULT_DB_ALIAS).update_or_create(
+            company_id=company_id, defaults={"alias": alias, "status": status}
+        )
+        # Let every process pick up the new assignment before carrying on.
+        time.sleep(settings.TENANT_SHARD_MAP_TTL)
+        shard_map.clear()
+
+    def tenant_rows(self, label, lookups, company_id, alias):
+        model = apps.get_model(label)
+        return model._base_manager.using(alias).filter(
+            **{lookup: company_id for lookup in lookups}
+        )
+
+    def copy_table(self, label, lookups, company_id, source, target, batch_size):
+        rows = self.tenant_rows(label, lookups, company_id, source).order_by("pk")
+        model = rows.model
+        room_ids = None
+        if label == "events.CalendarEvent":
+            room_ids = set(
+                self.tenant_rows(
+                    "events.ConferenceRoom", ["manager__company_id"], company_id, source
+                ).values_list("pk", flat=True)
+            )
+
+        copied, last_pk = 0, None
+        while batch := list(
+            (rows.filter(pk__gt=last_pk) if last_pk else rows)[:batch_size]
+        ):
+            last_pk = batch[-1].pk
+            if room_ids is not None:
+                # Rooms of other companies do not move with the tenant.
+                for event in batch:
+                    if event.location_id not in room_ids:
+                        event.location_id = None
+            model._base_manager.using(target).bulk_create(
+                batch, ignore_conflicts=label == "accounts.User"
+            )
+            copied += len(batch)
+        return copied
+
+    def purge_table(self, label, lookups, company_id, alias, batch_size):
+        rows = self.tenant_rows(label, lookups, company_id, alias)
+        while pks := list(rows.values_list("pk", flat=True)[:batch_size]):
+            # The rows live on in the target shard, clients are not told.
+            with transaction.atomic(using=alias), muted():
+                rows.model._base_manager.using(alias).filter(pk__in=pks).delete()
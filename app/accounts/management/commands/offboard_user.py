@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from accounts.models import User, UserOffboarding
+from accounts.offboarding import run_offboarding, start_offboarding
+
+
+class Command(BaseCommand):
+    help = (
+        "Remove a departing user and their data in small batches. The user is "
+        "hidden right away; an interrupted run resumes where it stopped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("user_id", type=int)
+        parser.add_argument(
+            "--reassign-to",
+            type=int,
+            help="Id of the colleague receiving the user's events and rooms, "
+            "which are deleted otherwise.",
+        )
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument(
+            "--pause",
+            type=float,
+            default=0.1,
+            help="Seconds to sleep between batches.",
+        )
+
+    def handle(self, *args, user_id, reassign_to, batch_size, pause, **options):
+        users = User.objects.using(DEFAULT_DB_ALIAS)
+        offboarding = UserOffboarding.objects.filter(user_id=user_id).first()
+        if offboarding is None:
+            try:
+                user = users.get(pk=user_id)
+                colleague = users.get(pk=reassign_to) if reassign_to else None
+                offboarding = start_offboarding(user, colleague)
+            except (User.DoesNotExist, ValueError) as e:
+                raise CommandError(str(e))
+        elif offboarding.status == UserOffboarding.Status.DONE:
+            raise CommandError(f"User {user_id} has already been offboarded.")
+
+        run_offboarding(offboarding, batch_size, pause, progress=self.report_progress)
+        self.report_progress(offboarding)
+        self.stdout.write(self.style.SUCCESS(f"Offboarded user {user_id}."))
+
+    def report_progress(self, offboarding):
+        self.stdout.write(
+            f"Removed {offboarding.participations_removed} participation(s), "
+            f"reassigned {offboarding.events_reassigned} and deleted "
+            f"{offboarding.events_deleted} event(s)."
+        )
@@ -0,0 +1,36 @@
+from django.http import HttpResponse
+from django.urls import reverse
+
+from accounts.models import TenantShard
+from accounts.sharding import activate_shard, deactivate_shard, shard_map
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+class AdminShardMiddleware:
+    """
+    Route the admin pages of a signed-in staff member to the shard of their
+    company, the same way the API routes the requests of a tenant. Staff
+    therefore only see the data of their own company in the admin.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not (
+            request.path.startswith(reverse("admin:index"))
+            and request.user.is_authenticated
+        ):
+            return self.get_response(request)
+
+        alias, status = shard_map.get(request.user.company_id)
+        if status == TenantShard.Status.MOVING and request.method not in SAFE_METHODS:
+            return HttpResponse(
+                "Your company's data is being moved, changes are paused.", status=503
+            )
+        token = activate_shard(alias)
+        try:
+            return self.get_response(request)
+        finally:
+            deactivate_shard(token)
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.3 on 2026-10-19 16:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TenantShard",
+            fields=[
+                ("company_id", models.UUIDField(primary_key=True, serialize=False)),
+                ("alias", models.CharField(max_length=100)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[("active", "Active"), ("moving", "Moving")],
+                        default="active",
+                        max_length=10,
+                    ),
+                ),
+            ],
+        ),
+    ]
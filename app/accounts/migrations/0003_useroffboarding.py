@@ -0,0 +1,46 @@
+# Generated by Django 5.1.3 on 2026-10-19 16:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0002_tenantshard"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="UserOffboarding",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("user_id", models.BigIntegerField(unique=True)),
+                ("company_id", models.UUIDField()),
+                ("email", models.EmailField(blank=True, max_length=254)),
+                ("reassign_to_id", models.BigIntegerField(blank=True, null=True)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[("running", "Running"), ("done", "Done")],
+                        default="running",
+                        max_length=10,
+                    ),
+                ),
+                ("participations_removed", models.PositiveIntegerField(default=0)),
+                ("events_reassigned", models.PositiveIntegerField(default=0)),
+                ("events_deleted", models.PositiveIntegerField(default=0)),
+                ("rooms_reassigned", models.PositiveIntegerField(default=0)),
+                ("started_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("finished_at", models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+    ]
@@ -10,3 +10,52 @@ class User(AbstractUser):
     timezone = models.CharField(
         max_length=50, choices=[(tz, tz) for tz in pytz.all_timezones], default="UTC"
     )
+
+
+class TenantShard(models.Model):
+    """
+    Shard assignment of a company that overrides ``settings.TENANT_SHARDS``.
+
+    Rows always live in the default database and are written by the
+    ``move_tenant`` command.
+    """
+
+    class Status(models.TextChoices):
+        ACTIVE = "active"
+        MOVING = "moving"
+
+    company_id = models.UUIDField(primary_key=True)
+    alias = models.CharField(max_length=100)
+    status = models.CharField(
+        max_length=10, choices=Status.choices, default=Status.ACTIVE
+    )
+
+
+class UserOffboarding(models.Model):
+    """
+    Progress of removing a departing user's data in small batches, see
+    ``accounts.offboarding``.
+
+    Rows always live in the default database and outlive the user, so the
+    user is referenced by id only.
+    """
+
+    class Status(models.TextChoices):
+        RUNNING = "running"
+        DONE = "done"
+
+    user_id = models.BigIntegerField(unique=True)
+    company_id = models.UUIDField()
+    email = models.EmailField(blank=True)
+    # Receives the user's events and rooms; without one, the events are deleted.
+    reassign_to_id = models.BigIntegerField(null=True, blank=True)
+    status = models.CharField(
+        max_length=10, choices=Status.choices, default=Status.RUNNING
+    )
+    participations_removed = models.PositiveIntegerField(default=0)
+    events_reassigned = models.PositiveIntegerField(default=0)
+    events_deleted = models.PositiveIntegerField(default=0)
+    rooms_reassigned = models.PositiveIntegerField(default=0)
+    started_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
@@ -0,0 +1,129 @@
+"""
+Removal of a departing user's data in bounded batches.
+
+Deleting a user cascades to all of their events and participations in one
+transaction, which holds locks on the events tables for as long as that
+takes. ``start_offboarding`` deactivates the user instead, which hides them
+from authentication, participant lookups and participant lists, and
+``run_offboarding`` then works through their data a batch per transaction,
+recording progress on the ``UserOffboarding`` row so that an interrupted run
+picks up where it stopped. The user is only deleted once nothing is left.
+"""
+
+import time
+
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from accounts.models import User, UserOffboarding
+from accounts.sharding import shard_map
+from events.models import CalendarEvent, ConferenceRoom, EventVisibility
+from events.outbox import enqueue_event_change
+from events.rooms import room_directory
+from events.signals import sync_and_notify
+
+
+def start_offboarding(user, reassign_to=None):
+    """
+    Hide ``user`` from the API and record the offboarding, or return the one
+    already in progress.
+    """
+    if reassign_to is not None and (
+        reassign_to.pk == user.pk or reassign_to.company_id != user.company_id
+    ):
+        raise ValueError("Events can only be reassigned to a colleague.")
+
+    offboarding, _ = UserOffboarding.objects.using(DEFAULT_DB_ALIAS).get_or_create(
+        user_id=user.pk,
+        defaults={
+            "company_id": user.company_id,
+            "email": user.email,
+            "reassign_to_id": reassign_to.pk if reassign_to else None,
+        },
+    )
+    if user.is_active:
+        user.is_active = False
+        user.save(using=DEFAULT_DB_ALIAS, update_fields=["is_active"])
+    return offboarding
+
+
+def run_offboarding(offboarding, batch_size=500, pause=0.0, progress=None):
+    """
+    Remove the user's participations, reassign or delete their events, hand
+    their rooms over and finally delete the user, committing every
+    ``batch_size`` rows and sleeping ``pause`` seconds in between to let
+    other writers through. ``progress`` is called with the offboarding after
+    each batch.
+    """
+    alias, _ = shard_map.get(offboarding.company_id)
+    user = User.objects.using(alias).filter(pk=offboarding.user_id).first()
+
+    def batches(queryset, field="id"):
+        while batch := list(
+            queryset.order_by(field).values_list(field, flat=True)[:batch_size]
+        ):
+            yield batch
+            if progress:
+                progress(offboarding)
+            time.sleep(pause)
+
+    def record(**counts):
+        for field, count in counts.items():
+            setattr(offboarding, field, getattr(offboarding, field) + count)
+        offboarding.save(using=DEFAULT_DB_ALIAS)
+
+    if user is not None:
+        for batch in batches(user.participating_events.all()):
+            with transaction.atomic(using=alias):
+                user.participating_events.remove(*batch)
+            record(participations_removed=len(batch))
+
+        events = CalendarEvent.objects.using(alias).filter(owner_id=user.pk)
+        for batch in batches(events):
+            batch_events = CalendarEvent.objects.using(alias).filter(id__in=batch)
+            with transaction.atomic(using=alias):
+                if offboarding.reassign_to_id:
+                    batch_events.update(
+                        owner_id=offboarding.reassign_to_id, version=F("version") + 1
+                    )
+                    sync_and_notify(batch, using=alias)
+                    for event in batch_events.select_related(
+                        "owner", "location"
+                    ).prefetch_related("participants"):
+                        enqueue_event_change(
+                            offboarding.company_id, "event.updated", event, using=alias
+                        )
+                else:
+                    for event in batch_events.only("id"):
+                        enqueue_event_change(
+                            offboarding.company_id, "event.deleted", event, using=alias
+                        )
+                    batch_events.delete()
+            if offboarding.reassign_to_id:
+                record(events_reassigned=len(batch))
+            else:
+                record(events_deleted=len(batch))
+
+        with transaction.atomic(using=alias):
+            rooms = ConferenceRoom.objects.using(alias).filter(manager_id=user.pk)
+            if rooms_reassigned := rooms.update(manager_id=offboarding.reassign_to_id):
+                room_directory.invalidate(offboarding.company_id)
+        record(rooms_reassigned=rooms_reassigned)
+
+        # Only the events of the rooms handed over are still visible to the
+        # user, and each synced batch drops out of the query.
+        visible = EventVisibility.objects.using(alias).filter(user_id=user.pk)
+        for batch in batches(visible, "event_id"):
+            with transaction.atomic(using=alias):
+                sync_and_notify(batch, using=alias)
+
+    # What is left cascades cheaply and the shard copy goes with the directory.
+    for directory_user in User.objects.using(DEFAULT_DB_ALIAS).filter(
+        pk=offboarding.user_id
+    ):
+        directory_user.delete()
+    offboarding.status = UserOffboarding.Status.DONE
+    offboarding.finished_at = timezone.now()
+    offboarding.save(using=DEFAULT_DB_ALIAS)
+    return offboarding
@@ -0,0 +1,121 @@
+import time
+from collections import OrderedDict, namedtuple
+from threading import Lock
+
+from django.conf import settings
+from django.utils.crypto import constant_time_compare, salted_hmac
+
+from accounts.models import User
+
+Principal = namedtuple(
+    "Principal", ["id", "username", "company_id", "timezone", "is_active"]
+)
+
+
+def credential_digest(password):
+    return salted_hmac("accounts.principals", password).hexdigest()
+
+
+class PrincipalCache:
+    """
+    Lightweight principals of recently authenticated users, keyed by user id,
+    behind a bounded LRU cache local to the process.
+
+    Every entry keeps a keyed digest of the password it was verified with,
+    so a repeated request is authenticated without loading the user or
+    hashing the password again. Entries expire after ``ttl`` seconds and are
+    dropped by the ``User`` save and delete signals.
+    """
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._ids_by_username = {}
+        self._lock = Lock()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._ids_by_username.clear()
+
+    def get(self, username, password):
+        """
+        Return the principal of ``username`` if it was recently verified with
+        the same password, else ``None``.
+        """
+        with self._lock:
+            user_id = self._ids_by_username.get(username)
+            entry = self._entries.get(user_id)
+            if not entry or time.monotonic() - entry[1] >= self.ttl:
+                return None
+            self._entries.move_to_end(user_id)
+        principal, _, digest = entry
+        if principal.username != username or not constant_time_compare(
+            digest, credential_digest(password)
+        ):
+            return None
+        return principal
+
+    def store(self, user, password):
+        principal = Principal(
+            user.id, user.username, user.company_id, user.timezone, user.is_active
+        )
+        with self._lock:
+            self._entries[user.id] = (
+                principal,
+                time.monotonic(),
+                credential_digest(password),
+            )
+            self._entries.move_to_end(user.id)
+            self._ids_by_username[user.username] = user.id
+            while len(self._entries) > self.maxsize:
+                _, (evicted, _, _) = self._entries.popitem(last=False)
+                self._ids_by_username.pop(evicted.username, None)
+        return principal
+
+    def invalidate(self, user_id):
+        with self._lock:
+            if entry := self._entries.pop(user_id, None):
+                self._ids_by_username.pop(entry[0].username, None)
+
+
+class LazyUser:
+    """
+    Stand-in for the authenticated ``User`` built from its principal. Fields
+    outside the principal load the full row on first access.
+    """
+
+    is_authenticated = True
+    is_anonymous = False
+
+    def __init__(self, principal, user=None):
+        self._principal = principal
+        self._user = user
+
+    id = pk = property(lambda self: self._principal.id)
+    username = property(lambda self: self._principal.username)
+    company_id = property(lambda self: self._principal.company_id)
+    timezone = property(lambda self: self._principal.timezone)
+    is_active = property(lambda self: self._principal.is_active)
+
+    def __getattr__(self, name):
+        if name.startswith("__") or name in ("_principal", "_user"):
+            raise AttributeError(name)
+        if self._user is None:
+            self._user = User.objects.get(pk=self._principal.id)
+        return getattr(self._user, name)
+
+    def __eq__(self, other):
+        return isinstance(other, (User, LazyUser)) and other.pk == self.pk
+
+    def __hash__(self):
+        return hash(self.pk)
+
+    def __str__(self):
+        return self.username
+
+
+principal_cache = PrincipalCache(
+    settings.PRINCIPAL_CACHE_SIZE, settings.PRINCIPAL_CACHE_TTL
+)
@@ -0,0 +1,91 @@
+import time
+from collections import OrderedDict
+from threading import Lock
+
+from django.conf import settings
+
+from accounts.models import User
+from api.cache import bump_cache_version, get_cache_version
+
+
+class EmailResolver:
+    """
+    Resolve active users' emails to ids within a company, behind a bounded
+    LRU cache local to the process.
+
+    Entries are tagged with the company's version key, which is bumped
+    whenever one of its users changes, and expire after
+    ``settings.EMAIL_RESOLVER_CACHE_TTL`` seconds. Bumps reach other
+    processes only through a shared cache backend, otherwise they may return
+    stale ids until their entries expire. Unknown emails are not cached.
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._keys_by_user = {}
+        self._lock = Lock()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_user.clear()
+
+    def resolve(self, company_id, email):
+        return self.resolve_many(company_id, [email]).get(email)
+
+    def resolve_many(self, company_id, emails):
+        """
+        Return ``{email: user_id}`` for the given emails that belong to users
+        of the company, using at most one query for the cache misses.
+        """
+        company_id = str(company_id)
+        version = get_cache_version(f"users:{company_id}")
+        resolved, misses = {}, []
+
+        with self._lock:
+            for email in dict.fromkeys(emails):
+                entry = self._entries.get((company_id, email))
+                if (
+                    entry
+                    and entry[0] == version
+                    and time.monotonic() - entry[1] < settings.EMAIL_RESOLVER_CACHE_TTL
+                ):
+                    self._entries.move_to_end((company_id, email))
+                    resolved[email] = entry[2]
+                else:
+                    misses.append(email)
+
+        if misses:
+            found = dict(
+                User.objects.filter(
+                    company_id=company_id, email__in=misses, is_active=True
+                )
+                .order_by("id")
+                .values_list("email", "id")
+            )
+            resolved.update(found)
+            with self._lock:
+                for email, user_id in found.items():
+                    self._store((company_id, email), version, user_id)
+
+        return resolved
+
+    def invalidate(self, user_id, company_id):
+        bump_cache_version(f"users:{company_id}")
+        with self._lock:
+            if key := self._keys_by_user.pop(user_id, None):
+                self._entries.pop(key, None)
+
+    def _store(self, key, version, user_id):
+        if previous := self._keys_by_user.get(user_id):
+            self._entries.pop(previous, None)
+        self._entries[key] = (version, time.monotonic(), user_id)
+        self._entries.move_to_end(key)
+        self._keys_by_user[user_id] = key
+        while len(self._entries) > self.maxsize:
+            _, (_, _, evicted_id) = self._entries.popitem(last=False)
+            self._keys_by_user.pop(evicted_id, None)
+
+
+email_resolver = EmailResolver(settings.EMAIL_RESOLVER_CACHE_SIZE)
@@ -0,0 +1,183 @@
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models.fields import AutoFieldMixin
+
+# Tables copied by ``move_tenant``, in dependency order, with the lookups that
+# must all match a company's id for a row to belong to it.
+TENANT_TABLES = [
+    ("accounts.User", ["company_id"]),
+    ("events.ConferenceRoom", ["manager__company_id"]),
+    ("events.CalendarEvent", ["owner__company_id"]),
+    (
+        "events.CalendarEvent_participants",
+        ["calendarevent__owner__company_id", "user__company_id"],
+    ),
+    ("events.EventVisibility", ["event__owner__company_id", "user__company_id"]),
+    ("events.RoomUsageDaily", ["room__manager__company_id"]),
+    ("events.RoomSlotMap", ["room__manager__company_id"]),
+    ("webhooks.WebhookEndpoint", ["company_id"]),
+    ("webhooks.OutboxMessage", ["company_id"]),
+    ("webhooks.WebhookDelivery", ["endpoint__company_id"]),
+]
+
+# Every shard allocates primary keys from its own block, numbered in
+# ``settings.TENANT_SHARD_ID_BLOCKS``, so that a tenant's rows keep their ids
+# when it is moved to another shard.
+SHARD_ID_BLOCK = 10**12
+
+# Models of tenant apps that only live in the default database.
+DIRECTORY_MODELS = {"accounts.tenantshard", "accounts.useroffboarding"}
+
+_current_shard = ContextVar("current_shard", default=None)
+
+
+class ShardMap:
+    """
+    Process-local view of which database holds each company.
+
+    Static assignments come from ``settings.TENANT_SHARDS``; ``TenantShard``
+    rows override them and are reloaded at most every
+    ``settings.TENANT_SHARD_MAP_TTL`` seconds.
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self._overrides = None
+        self._loaded_at = 0.0
+
+    def prime(self, overrides):
+        self._overrides = overrides
+        self._loaded_at = time.monotonic()
+
+    def get(self, company_id):
+        """
+        Return ``(alias, status)`` for the given company.
+        """
+        from accounts.models import TenantShard
+
+        if (
+            self._overrides is None
+            or time.monotonic() - self._loaded_at >= settings.TENANT_SHARD_MAP_TTL
+        ):
+            self.prime(
+                {
+                    str(company): (alias, status)
+                    for company, alias, status in TenantShard.objects.using(
+                        DEFAULT_DB_ALIAS
+                    ).values_list("company_id", "alias", "status")
+                }
+            )
+        company_id = str(company_id)
+        if company_id in self._overrides:
+            return self._overrides[company_id]
+        alias = settings.TENANT_SHARDS.get(company_id, DEFAULT_DB_ALIAS)
+        return alias, TenantShard.Status.ACTIVE
+
+
+shard_map = ShardMap()
+
+
+def get_current_shard():
+    return _current_shard.get()
+
+
+def activate_shard(alias):
+    """
+    Route tenant queries to ``alias`` until the returned token is passed to
+    ``deactivate_shard``.
+    """
+    return _current_shard.set(alias)
+
+
+def deactivate_shard(token):
+    _current_shard.reset(token)
+
+
+def is_tenant_model(model):
+    return (
+        model._meta.app_label in settings.TENANT_APPS
+        and model._meta.label_lower not in DIRECTORY_MODELS
+    )
+
+
+class TenantRouter:
+    """
+    Send queries for tenant models to the shard of the active tenant.
+
+    Outside of a tenant context (authentication, admin, management commands)
+    Django falls back to the instance's database or the default one, which
+    also holds the directory of every user.
+    """
+
+    def _route(self, model, **hints):
+        if is_tenant_model(model):
+            return _current_shard.get()
+        return None
+
+    db_for_read = _route
+    db_for_write = _route
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Users of a tenant are replicated into its shard, so tenant rows can
+        # point at users loaded from the directory.
+        if is_tenant_model(type(obj1)) and is_tenant_model(type(obj2)):
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if f"{app_label}.{model_name}" in DIRECTORY_MODELS:
+            return db == DEFAULT_DB_ALIAS
+        return None
+
+
+def reserve_shard_ids(sender, using=DEFAULT_DB_ALIAS, **kwargs):
+    """
+    ``post_migrate`` handler moving the primary key sequences of a shard into
+    its own id block.
+    """
+    if using == DEFAULT_DB_ALIAS or using not in settings.DATABASES:
+        return
+    blocks = settings.TENANT_SHARD_ID_BLOCKS
+    block = blocks.get(using)
+    if not isinstance(block, int) or block < 1:
+        raise ImproperlyConfigured(
+            f"TENANT_SHARD_ID_BLOCKS must give the shard {using!r} a positive id block."
+        )
+    if list(blocks.values()).count(block) > 1:
+        raise ImproperlyConfigured(
+            f"The shard {using!r} shares its id block {block} with another shard."
+        )
+    base = block * SHARD_ID_BLOCK
+    connection = connections[using]
+
+    with connection.cursor() as cursor:
+        for model in sender.get_models(include_auto_created=True):
+            if not is_tenant_model(model) or not isinstance(
+                model._meta.pk, AutoFieldMixin
+            ):
+                continue
+            table = model._meta.db_table
+            if connection.vendor == "sqlite":
+                cursor.execute(
+                    "INSERT INTO sqlite_sequence (name, seq) SELECT %s, 0 "
+                    "WHERE NOT EXISTS (SELECT 1 FROM sqlite_sequence WHERE name = %s)",
+                    [table, table],
+                )
+                cursor.execute(
+                    "UPDATE sqlite_sequence SET seq = %s WHERE name = %s AND seq < %s",
+                    [base, table, base],
+                )
+            elif connection.vendor == "postgresql":
+                column = model._meta.pk.column
+                cursor.execute(
+                    "SELECT setval(pg_get_serial_sequence(%s, %s), GREATEST(%s, "
+                    f"(SELECT COALESCE(MAX({connection.ops.quote_name(column)}), 0) "
+                    f"FROM {connection.ops.quote_name(table)})))",
+                    [table, column, base],
+                )
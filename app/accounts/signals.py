@@ -0,0 +1,50 @@
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from accounts.models import User
+from accounts.principals import principal_cache
+from accounts.resolver import email_resolver
+from accounts.sharding import shard_map
+
+
+@receiver(post_save, sender=User)
+def replicate_user(sender, instance, using, raw=False, **kwargs):
+    """
+    Keep the user directory in the default database and the copy in the
+    tenant's shard in sync, whichever side was written.
+    """
+    if raw:
+        return
+    shard, _ = shard_map.get(instance.company_id)
+    fields = {
+        field.attname: getattr(instance, field.attname)
+        for field in User._meta.concrete_fields
+    }
+    for alias in {DEFAULT_DB_ALIAS, shard} - {using}:
+        users = User.objects.using(alias)
+        if not users.filter(pk=instance.pk).update(**fields):
+            users.bulk_create([User(**fields)])
+
+
+@receiver(post_delete, sender=User)
+def delete_replicated_user(sender, instance, using, **kwargs):
+    # Only deletions from the directory propagate; purging a shard after a
+    # tenant moved away must not remove the user everywhere else.
+    if using != DEFAULT_DB_ALIAS:
+        return
+    shard, _ = shard_map.get(instance.company_id)
+    if shard != DEFAULT_DB_ALIAS:
+        User.objects.using(shard).filter(pk=instance.pk).delete()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_resolved_email(sender, instance, **kwargs):
+    email_resolver.invalidate(instance.pk, instance.company_id)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_principal(sender, instance, **kwargs):
+    principal_cache.invalidate(instance.pk)
@@ -0,0 +1,190 @@
+import base64
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from django.core.management import CommandError, call_command
+from django.urls import reverse
+from model_bakery import baker
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from accounts.models import User, UserOffboarding
+from accounts.offboarding import run_offboarding, start_offboarding
+from accounts.resolver import email_resolver
+from conftest import USER_COMPANY_UUID
+from events.models import CalendarEvent, ConferenceRoom, EventVisibility
+from webhooks.models import OutboxMessage
+
+EVENTS_ENDPOINT_V1 = "v1:calendar-events-list"
+START = datetime(2024, 11, 21, 12, 0, tzinfo=timezone.utc)
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def leaver():
+    user = baker.make(
+        "accounts.User",
+        username="leaver",
+        email="leaver@compnayA.com",
+        company_id=USER_COMPANY_UUID,
+    )
+    user.set_password("secret")
+    user.save()
+    return user
+
+
+@pytest.fixture
+def leaver_data(leaver, user):
+    room = baker.make("events.ConferenceRoom", manager=leaver)
+    owned = [
+        baker.make(
+            "events.CalendarEvent",
+            owner=leaver,
+            location=room,
+            start=START + timedelta(hours=hour),
+            end=START + timedelta(hours=hour, minutes=30),
+        )
+        for hour in range(3)
+    ]
+    joined = [
+        baker.make(
+            "events.CalendarEvent",
+            owner=user,
+            participants=[leaver],
+            start=START + timedelta(days=1, hours=hour),
+            end=START + timedelta(days=1, hours=hour, minutes=30),
+        )
+        for hour in range(3)
+    ]
+    return room, owned, joined
+
+
+def test_offboarded_user_is_hidden_from_the_api(user_client, leaver, leaver_data):
+    client = APIClient()
+    token = base64.b64encode(b"leaver:secret").decode()
+    auth = {"HTTP_AUTHORIZATION": f"Basic {token}"}
+    url = reverse(EVENTS_ENDPOINT_V1)
+    assert client.get(url, **auth).status_code == status.HTTP_200_OK
+
+    start_offboarding(leaver)
+
+    assert client.get(url, **auth).status_code == status.HTTP_401_UNAUTHORIZED
+    assert email_resolver.resolve(USER_COMPANY_UUID, leaver.email) is None
+    for event in user_client.get(url).data:
+        assert leaver.email not in event["participants"]
+
+
+def test_offboarding_reassigns_events_in_batches(user, leaver, leaver_data):
+    room, owned, joined = leaver_data
+    offboarding = start_offboarding(leaver, reassign_to=user)
+    reports = []
+
+    run_offboarding(
+        offboarding,
+        batch_size=2,
+        progress=lambda offboarding: reports.append(
+            (offboarding.participations_removed, offboarding.events_reassigned)
+        ),
+    )
+
+    assert reports == [(2, 0), (3, 0), (3, 2), (3, 3), (3, 3), (3, 3)]
+    assert not User.objects.filter(pk=leaver.pk).exists()
+    assert set(CalendarEvent.objects.filter(owner=user)) == set(owned + joined)
+    assert not CalendarEvent.participants.through.objects.exists()
+    assert ConferenceRoom.objects.get(pk=room.pk).manager == user
+    assert EventVisibility.objects.filter(user=user).count() == 6
+    messages = OutboxMessage.objects.filter(topic="event.updated")
+    assert {message.payload["id"] for message in messages} == {e.id for e in owned}
+    assert {message.payload["owner"] for message in messages} == {user.email}
+
+    offboarding.refresh_from_db()
+    assert offboarding.status == UserOffboarding.Status.DONE
+    assert offboarding.rooms_reassigned == 1
+    assert offboarding.finished_at is not None
+    call_command("rebuild_event_visibility", "--check")
+
+
+def test_offboarding_hands_rooms_over_in_batches(user, leaver, external_user):
+    room = baker.make("events.ConferenceRoom", manager=leaver)
+    colleague = baker.make("accounts.User", company_id=USER_COMPANY_UUID)
+    booked = [
+        baker.make(
+            "events.CalendarEvent",
+            owner=colleague,
+            location=room,
+            start=START + timedelta(hours=hour),
+            end=START + timedelta(hours=hour, minutes=30),
+        )
+        for hour in range(3)
+    ]
+    offboarding = start_offboarding(leaver, reassign_to=user)
+    reports = []
+
+    run_offboarding(
+        offboarding,
+        batch_size=2,
+        progress=lambda offboarding: reports.append(
+            EventVisibility.objects.filter(user=leaver).count()
+        ),
+    )
+
+    assert reports == [1, 0]
+    assert ConferenceRoom.objects.get(pk=room.pk).manager == user
+    assert set(
+        EventVisibility.objects.filter(user=user).values_list("event_id", flat=True)
+    ) == {event.id for event in booked}
+    assert UserOffboarding.objects.get(user_id=leaver.pk).rooms_reassigned == 1
+    call_command("rebuild_event_visibility", "--check")
+
+
+def test_offboarding_deletes_events_without_a_colleague(user, leaver, leaver_data):
+    _, owned, joined = leaver_data
+
+    run_offboarding(start_offboarding(leaver), batch_size=2)
+
+    assert set(CalendarEvent.objects.all()) == set(joined)
+    assert UserOffboarding.objects.get(user_id=leaver.pk).events_deleted == 3
+    assert {
+        (message.topic, message.payload["id"])
+        for message in OutboxMessage.objects.all()
+    } == {("event.deleted", event.id) for event in owned}
+    call_command("rebuild_event_visibility", "--check")
+    call_command("rebuild_room_slots", "--check")
+
+
+def test_offboard_user_command(user, leaver, leaver_data, external_user):
+    with pytest.raises(CommandError):
+        call_command("offboard_user", leaver.pk, "--reassign-to", external_user.pk)
+    assert User.objects.get(pk=leaver.pk).is_active
+
+    call_command("offboard_user", leaver.pk, "--reassign-to", user.pk, "--pause", "0")
+    assert CalendarEvent.objects.filter(owner=user).count() == 6
+
+    with pytest.raises(CommandError):
+        call_command("offboard_user", leaver.pk)
+
+
+@pytest.mark.django_db(databases=["default", "shard_1"])
+def test_offboarding_works_in_the_company_shard(settings, user, user_client, leaver):
+    settings.TENANT_SHARDS = {USER_COMPANY_UUID: "shard_1"}
+    user.save()
+    leaver.save()
+    response = user_client.post(
+        reverse(EVENTS_ENDPOINT_V1),
+        data={
+            "event_name": "Sharded Event",
+            "agenda": "Sharded Agenda",
+            "start": "2024-11-21T12:00:00Z",
+            "end": "2024-11-21T13:00:00Z",
+            "participants": [leaver.email],
+        },
+        format="json",
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+
+    offboarding = run_offboarding(start_offboarding(leaver))
+
+    assert offboarding.participations_removed == 1
+    assert not User.objects.using("shard_1").filter(pk=leaver.pk).exists()
+    assert not CalendarEvent.participants.through.objects.using("shard_1").exists()
@@ -0,0 +1,91 @@
+import base64
+
+import pytest
+from django.urls import reverse
+from model_bakery import baker
+from rest_framework import status
+
+from accounts.principals import LazyUser, principal_cache
+from conftest import USER_COMPANY_UUID
+from events.rooms import room_directory
+
+ROOMS_ENDPOINT_V1 = "v1:conference-rooms-list"
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def account():
+    user = baker.make(
+        "accounts.User",
+        username="basic",
+        email="basic@compnayA.com",
+        timezone="Europe/Warsaw",
+        company_id=USER_COMPANY_UUID,
+    )
+    user.set_password("secret")
+    user.save()
+    return user
+
+
+def basic_auth(username, password):
+    token = base64.b64encode(f"{username}:{password}".encode()).decode()
+    return {"HTTP_AUTHORIZATION": f"Basic {token}"}
+
+
+def test_repeated_requests_skip_loading_the_user(
+    django_assert_num_queries, client, account
+):
+    room_directory.get(account.company_id)
+    url = reverse(ROOMS_ENDPOINT_V1)
+
+    with django_assert_num_queries(1):
+        assert client.get(url, **basic_auth("basic", "secret")).status_code == 200
+    with django_assert_num_queries(0):
+        assert client.get(url, **basic_auth("basic", "secret")).status_code == 200
+
+
+def test_cached_principal_requires_the_same_password(client, account):
+    url = reverse(ROOMS_ENDPOINT_V1)
+    client.get(url, **basic_auth("basic", "secret"))
+
+    response = client.get(url, **basic_auth("basic", "wrong"))
+
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+def test_principal_is_dropped_when_user_changes(client, account):
+    client.get(reverse(ROOMS_ENDPOINT_V1), **basic_auth("basic", "secret"))
+    assert principal_cache.get("basic", "secret").timezone == "Europe/Warsaw"
+
+    account.is_active = False
+    account.save()
+
+    assert principal_cache.get("basic", "secret") is None
+    response = client.get(reverse(ROOMS_ENDPOINT_V1), **basic_auth("basic", "secret"))
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+def test_principal_expires(monkeypatch, account):
+    principal_cache.store(account, "secret")
+    now = principal_cache._entries[account.id][1]
+    monkeypatch.setattr(
+        "accounts.principals.time.monotonic", lambda: now + principal_cache.ttl
+    )
+
+    assert principal_cache.get("basic", "secret") is None
+
+
+def test_lazy_user_loads_other_fields_once(django_assert_num_queries, account):
+    user = LazyUser(principal_cache.store(account, "secret"))
+
+    with django_assert_num_queries(0):
+        assert (user.id, user.company_id, user.timezone) == (
+            account.id,
+            account.company_id,
+            "Europe/Warsaw",
+        )
+    with django_assert_num_queries(1):
+        assert user.email == "basic@compnayA.com"
+        assert user.first_name == account.first_name
+    assert user == account
@@ -0,0 +1,65 @@
+import time
+
+import pytest
+
+from accounts.resolver import EmailResolver
+from conftest import EXTERNAL_USER_COMPANY_UUID, USER_COMPANY_UUID
+
+pytestmark = pytest.mark.django_db
+
+
+def test_resolve_many_is_scoped_to_company(user, external_user):
+    resolver = EmailResolver(maxsize=10)
+    emails = [user.email, external_user.email, "unknown@compnayA.com"]
+
+    assert resolver.resolve_many(USER_COMPANY_UUID, emails) == {user.email: user.id}
+    assert resolver.resolve_many(EXTERNAL_USER_COMPANY_UUID, emails) == {
+        external_user.email: external_user.id
+    }
+
+
+def test_resolve_many_serves_hits_from_cache(django_assert_num_queries, user):
+    resolver = EmailResolver(maxsize=10)
+    resolver.resolve_many(USER_COMPANY_UUID, [user.email])
+
+    with django_assert_num_queries(0):
+        assert resolver.resolve(USER_COMPANY_UUID, user.email) == user.id
+
+
+def test_resolver_evicts_least_recently_used(
+    django_assert_num_queries, user, different_timezone_user
+):
+    resolver = EmailResolver(maxsize=1)
+    resolver.resolve_many(USER_COMPANY_UUID, [user.email])
+    resolver.resolve_many(USER_COMPANY_UUID, [different_timezone_user.email])
+
+    with django_assert_num_queries(1):
+        assert resolver.resolve(USER_COMPANY_UUID, user.email) == user.id
+
+
+def test_resolver_is_invalidated_when_user_changes(user):
+    from accounts.resolver import email_resolver
+
+    old_email = user.email
+    assert email_resolver.resolve(USER_COMPANY_UUID, old_email) == user.id
+
+    user.email = "renamed@compnayA.com"
+    user.save()
+
+    assert email_resolver.resolve(USER_COMPANY_UUID, old_email) is None
+    assert email_resolver.resolve(USER_COMPANY_UUID, user.email) == user.id
+
+
+def test_resolver_entries_expire(
+    django_assert_num_queries, monkeypatch, settings, user
+):
+    resolver = EmailResolver(maxsize=10)
+    resolver.resolve_many(USER_COMPANY_UUID, [user.email])
+    now = time.monotonic()
+    monkeypatch.setattr(
+        "accounts.resolver.time.monotonic",
+        lambda: now + settings.EMAIL_RESOLVER_CACHE_TTL,
+    )
+
+    with django_assert_num_queries(1):
+        assert resolver.resolve(USER_COMPANY_UUID, user.email) == user.id
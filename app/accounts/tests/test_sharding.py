@@ -0,0 +1,171 @@
+import pytest
+from django.apps import apps
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.urls import reverse
+from model_bakery import baker
+from rest_framework import status
+
+from accounts.models import TenantShard, User
+from accounts.sharding import (
+    SHARD_ID_BLOCK,
+    get_current_shard,
+    reserve_shard_ids,
+    shard_map,
+)
+from conftest import USER_COMPANY_UUID
+from events.models import CalendarEvent, EventVisibility
+from events.views.v1 import CalendarEventViewSet
+
+EVENTS_ENDPOINT_V1 = "v1:calendar-events"
+
+pytestmark = pytest.mark.django_db(databases=["default", "shard_1"])
+
+
+@pytest.fixture
+def sharded_company(settings):
+    settings.TENANT_SHARDS = {USER_COMPANY_UUID: "shard_1"}
+    settings.TENANT_SHARD_MAP_TTL = 0
+
+
+@pytest.fixture
+def event_data():
+    return dict(
+        event_name="Sharded Event",
+        agenda="Sharded Agenda",
+        start="2024-11-21T12:00:00Z",
+        end="2024-11-21T13:00:00Z",
+        participants=[],
+    )
+
+
+def test_users_are_replicated_into_their_company_shard(sharded_company, user):
+    assert User.objects.using("shard_1").filter(pk=user.pk).exists()
+
+    user.timezone = "Europe/Warsaw"
+    user.save()
+    assert User.objects.using("shard_1").get(pk=user.pk).timezone == "Europe/Warsaw"
+
+
+def test_tenant_requests_are_routed_to_company_shard(
+    sharded_company, user_client, event_data
+):
+    url = reverse(f"{EVENTS_ENDPOINT_V1}-list")
+
+    response = user_client.post(url, data=event_data, format="json")
+    assert response.status_code == status.HTTP_201_CREATED
+
+    event_id = response.data["id"]
+    assert event_id > SHARD_ID_BLOCK
+    assert CalendarEvent.objects.using("shard_1").filter(pk=event_id).exists()
+    assert not CalendarEvent.objects.using("default").filter(pk=event_id).exists()
+
+    response = user_client.get(url)
+    assert [event["id"] for event in response.data] == [event_id]
+
+
+def test_shard_ids_come_from_its_configured_block(settings):
+    settings.TENANT_SHARD_ID_BLOCKS = {"shard_1": 3, "shard_2": 1}
+
+    reserve_shard_ids(apps.get_app_config("events"), using="shard_1")
+    room = baker.make("events.ConferenceRoom", _using="shard_1")
+
+    assert 3 * SHARD_ID_BLOCK < room.pk < 4 * SHARD_ID_BLOCK
+
+
+@pytest.mark.parametrize("blocks", [{}, {"shard_1": 0}, {"shard_1": 1, "shard_2": 1}])
+def test_shard_without_its_own_id_block_is_rejected(settings, blocks):
+    settings.TENANT_SHARD_ID_BLOCKS = blocks
+
+    with pytest.raises(ImproperlyConfigured):
+        reserve_shard_ids(apps.get_app_config("events"), using="shard_1")
+
+
+def test_failing_request_does_not_leak_its_shard(
+    sharded_company, monkeypatch, user_client
+):
+    def fail(*args, **kwargs):
+        raise RuntimeError("Boom")
+
+    monkeypatch.setattr(CalendarEventViewSet, "list", fail)
+
+    with pytest.raises(RuntimeError):
+        user_client.get(reverse(f"{EVENTS_ENDPOINT_V1}-list"))
+    assert get_current_shard() is None
+
+
+def test_admin_is_routed_to_company_shard(sharded_company, client, user):
+    user.is_staff = user.is_superuser = True
+    user.save()
+    baker.make(
+        "events.CalendarEvent", owner=user, event_name="Sharded", _using="shard_1"
+    )
+    baker.make("events.CalendarEvent", event_name="Unsharded")
+    client.force_login(user)
+
+    response = client.get(reverse("admin:events_calendarevent_changelist"))
+
+    assert response.status_code == status.HTTP_200_OK
+    assert [event.event_name for event in response.context["cl"].result_list] == [
+        "Sharded"
+    ]
+    assert get_current_shard() is None
+
+
+def test_move_tenant_between_shards(settings, user, user_client, external_user):
+    settings.TENANT_SHARD_MAP_TTL = 0
+    participant = baker.make("accounts.User", company_id=USER_COMPANY_UUID)
+    room = baker.make("events.ConferenceRoom", manager=user)
+    calendar_event = baker.make(
+        "events.CalendarEvent", owner=user, location=room, participants=[participant]
+    )
+    baker.make("events.CalendarEvent", owner=external_user)
+
+    call_command("move_tenant", USER_COMPANY_UUID, "shard_1")
+
+    assert TenantShard.objects.get(company_id=USER_COMPANY_UUID).alias == "shard_1"
+    assert not CalendarEvent.objects.using("default").filter(owner=user).exists()
+    assert CalendarEvent.objects.using("default").filter(owner=external_user).exists()
+    assert User.objects.using("default").filter(company_id=USER_COMPANY_UUID).exists()
+    moved = CalendarEvent.objects.using("shard_1").get(pk=calendar_event.pk)
+    assert list(moved.participants.all()) == [participant]
+    assert moved.location_id == room.pk
+    assert EventVisibility.objects.using("shard_1").filter(event=moved).exists()
+
+    response = user_client.get(reverse(f"{EVENTS_ENDPOINT_V1}-list"))
+    assert [event["id"] for event in response.data] == [calendar_event.pk]
+
+
+def test_move_tenant_does_not_publish_purged_events(
+    django_capture_on_commit_callbacks, monkeypatch, settings, user
+):
+    settings.TENANT_SHARD_MAP_TTL = 0
+    calendar_event = baker.make("events.CalendarEvent", owner=user)
+    published = []
+    monkeypatch.setattr(
+        "events.streams.LocalBroker.publish",
+        lambda self, topic, message: published.append(message),
+    )
+
+    with django_capture_on_commit_callbacks(execute=True):
+        call_command("move_tenant", USER_COMPANY_UUID, "shard_1")
+
+    assert not CalendarEvent.objects.using("default").filter(owner=user).exists()
+    assert {"type": "event.deleted", "id": calendar_event.pk} not in published
+
+
+def test_writes_are_rejected_while_tenant_is_moving(user_client, event_data):
+    TenantShard.objects.create(
+        company_id=USER_COMPANY_UUID,
+        alias="default",
+        status=TenantShard.Status.MOVING,
+    )
+    shard_map.clear()
+    url = reverse(f"{EVENTS_ENDPOINT_V1}-list")
+
+    response = user_client.post(url, data=event_data, format="json")
+    assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    assert response.headers["Retry-After"]
+
+    response = user_client.get(url)
+    assert response.status_code == status.HTTP_200_OK
@@ -0,0 +1,23 @@
+from django.contrib.auth import authenticate
+from rest_framework.authentication import BasicAuthentication
+from rest_framework.exceptions import AuthenticationFailed
+
+from accounts.principals import LazyUser, principal_cache
+
+
+class PrincipalBasicAuthentication(BasicAuthentication):
+    """
+    HTTP Basic authentication answering repeated requests from the principal
+    cache, with a lazily loaded user in ``request.user``.
+    """
+
+    def authenticate_credentials(self, userid, password, request=None):
+        if principal := principal_cache.get(userid, password):
+            return LazyUser(principal), None
+
+        user = authenticate(request=request, username=userid, password=password)
+        if user is None:
+            raise AuthenticationFailed("Invalid username/password.")
+        if not user.is_active:
+            raise AuthenticationFailed("User inactive or deleted.")
+        return LazyUser(principal_cache.store(user, password), user), None
@@ -0,0 +1,161 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from io import BytesIO
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIRequest
+from django.db import connection, connections
+from django.urls import Resolver404, resolve, reverse
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import SAFE_METHODS, IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+BATCH_METHODS = {"GET", "HEAD", "POST", "PATCH", "DELETE"}
+# Headers a sub-request may set, the rest is inherited from the batch.
+BATCH_HEADERS = {"If-Match", "Idempotency-Key", "Accept"}
+# Header names are case-insensitive.
+BATCH_HEADER_NAMES = {name.lower() for name in BATCH_HEADERS}
+# Headers of sub-responses passed on to the client.
+RESPONSE_HEADERS = ("ETag", "Retry-After", "Idempotent-Replayed")
+
+
+def parse_batch(data):
+    """
+    Validate the ``requests`` of a batch body into ``(method, path, query,
+    headers, body)`` tuples, paths being relative to the API root.
+    """
+    requests = data.get("requests") if isinstance(data, dict) else None
+    if not isinstance(requests, list) or not requests:
+        raise ValidationError({"requests": "Send a non-empty list of requests."})
+    if len(requests) > settings.BATCH_MAX_REQUESTS:
+        raise ValidationError(
+            {"requests": f"Send at most {settings.BATCH_MAX_REQUESTS} requests."}
+        )
+
+    root = reverse("v1:api-root")
+    parsed = []
+    for index, item in enumerate(requests):
+        if not isinstance(item, dict) or not isinstance(item.get("path"), str):
+            raise ValidationError({"requests": f"Request {index} needs a 'path'."})
+        method = str(item.get("method", "GET")).upper()
+        if method not in BATCH_METHODS:
+            raise ValidationError(
+                {"requests": f"Request {index} uses an unsupported method."}
+            )
+        headers = item.get("headers") or {}
+        if not isinstance(headers, dict) or not all(
+            name.lower() in BATCH_HEADER_NAMES for name in headers
+        ):
+            raise ValidationError(
+                {
+                    "requests": f"Request {index} may only set the "
+                    f"{', '.join(sorted(BATCH_HEADERS))} headers."
+                }
+            )
+        url = urlsplit(item["path"])
+        path = url.path if url.path.startswith(root) else root + url.path.lstrip("/")
+        parsed.append((method, path, url.query, headers, item.get("body")))
+
+    writes = sum(method not in SAFE_METHODS for method, *_ in parsed)
+    if writes > settings.BATCH_MAX_WRITES:
+        raise ValidationError(
+            {"requests": f"Send at most {settings.BATCH_MAX_WRITES} writes."}
+        )
+    return parsed
+
+
+class BatchView(APIView):
+    """
+    Run a list of requests against the v1 API in one round-trip.
+
+    The batch is authenticated once and its sub-requests run as the same
+    user, each through its own view with that view's permissions and
+    throttles. Consecutive reads run concurrently on up to
+    ``BATCH_CONCURRENCY`` threads, writes run one at a time in order, so a
+    read always sees the writes listed before it.
+    """
+
+    permission_classes = [IsAuthenticated]
+    # Every sub-request is throttled by its own view.
+    throttle_classes = []
+
+    def post(self, request):
+        requests = parse_batch(request.data)
+        responses = []
+        reads = []
+        for sub_request in requests:
+            if sub_request[0] in SAFE_METHODS:
+                reads.append(sub_request)
+                continue
+            responses += self.run_reads(request, reads)
+            reads = []
+            responses.append(self.run(request, *sub_request))
+        responses += self.run_reads(request, reads)
+        return Response({"responses": responses})
+
+    def run_reads(self, request, reads):
+        # Threads use their own connections, which cannot see the writes of
+        # a transaction still open on this one.
+        if (
+            len(reads) < 2
+            or settings.BATCH_CONCURRENCY < 2
+            or connection.in_atomic_block
+        ):
+            return [self.run(request, *sub_request) for sub_request in reads]
+
+        def run_in_thread(context, sub_request):
+            try:
+                return context.run(self.run, request, *sub_request)
+            finally:
+                connections.close_all()
+
+        with ThreadPoolExecutor(min(settings.BATCH_CONCURRENCY, len(reads))) as pool:
+            contexts = [copy_context() for _ in reads]
+            return list(pool.map(run_in_thread, contexts, reads))
+
+    def run(self, request, method, path, query, headers, body):
+        try:
+            match = resolve(path)
+        except Resolver404:
+            match = None
+        # Only the REST views of the v1 API, not the stream or the batch.
+        if (
+            match is None
+            or match.namespace != "v1"
+            or not hasattr(match.func, "cls")
+            or match.func.cls is type(self)
+        ):
+            return {"status": 404, "body": {"detail": "Not found."}}
+
+        payload = json.dumps(body).encode() if body is not None else b""
+        environ = {
+            **request.META,
+            "REQUEST_METHOD": method,
+            "PATH_INFO": path,
+            "SCRIPT_NAME": "",
+            "QUERY_STRING": query,
+            "CONTENT_TYPE": "application/json",
+            "CONTENT_LENGTH": str(len(payload)),
+            "wsgi.input": BytesIO(payload),
+        }
+        environ.pop("HTTP_IDEMPOTENCY_KEY", None)
+        environ.pop("HTTP_IF_MATCH", None)
+        for name, value in headers.items():
+            environ[f"HTTP_{name.upper().replace('-', '_')}"] = str(value)
+        sub_request = WSGIRequest(environ)
+        # Picked up by DRF in place of the authenticators.
+        sub_request._force_auth_user = request.user
+        sub_request.resolver_match = match
+
+        response = match.func(sub_request, *match.args, **match.kwargs)
+        result = {"status": response.status_code}
+        if response_headers := {
+            name: response[name] for name in RESPONSE_HEADERS if name in response
+        }:
+            result["headers"] = response_headers
+        if method != "HEAD":
+            result["body"] = getattr(response, "data", None)
+        return result
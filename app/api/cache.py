@@ -0,0 +1,18 @@
+from django.core.cache import cache
+
+
+def get_cache_version(key):
+    """
+    Return the current version of ``key``. Versions are kept in the default
+    cache, so a bump is only seen by other processes when it is a shared
+    backend such as Redis or Memcached; with the local memory default, each
+    process relies on the expiry of what it cached.
+    """
+    return cache.get_or_set(f"version:{key}", 1, timeout=None)
+
+
+def bump_cache_version(key):
+    try:
+        cache.incr(f"version:{key}")
+    except ValueError:
+        cache.set(f"version:{key}", 2, timeout=None)
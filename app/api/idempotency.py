@@ -0,0 +1,112 @@
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+from rest_framework.response import Response
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 255
+
+
+class IdempotencyKeyInUse(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "A request with this Idempotency-Key is still being processed."
+    default_code = "idempotency_key_in_use"
+
+
+class IdempotencyKeyReused(APIException):
+    status_code = status.HTTP_422_UNPROCESSABLE_ENTITY
+    default_detail = "This Idempotency-Key was already used with a different request."
+    default_code = "idempotency_key_reused"
+
+
+def idempotency_cache_key(user, path, key):
+    return (
+        "idempotency:"
+        + hashlib.sha256(
+            f"{user.company_id}:{user.id}:{path}:{key}".encode()
+        ).hexdigest()
+    )
+
+
+def request_fingerprint(data):
+    return hashlib.sha256(
+        json.dumps(data, sort_keys=True, default=str).encode()
+    ).hexdigest()
+
+
+class IdempotentCreateMixin:
+    """
+    Honour the ``Idempotency-Key`` header on ``create``.
+
+    The first request with a key claims it in the default cache and runs the
+    write; its successful response is stored for ``IDEMPOTENCY_TTL`` seconds
+    and replayed for later requests with the same key, user and path.
+    Duplicates arriving while the first one runs wait up to
+    ``IDEMPOTENCY_WAIT`` seconds for its response, so only one of them
+    inserts. Keys are only seen by every process when the cache is a shared
+    backend; with the local memory default, duplicates sent to different
+    processes each run the write.
+    """
+
+    def create(self, request, *args, **kwargs):
+        if not (key := request.headers.get(IDEMPOTENCY_HEADER)):
+            return super().create(request, *args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            raise ValidationError(
+                {IDEMPOTENCY_HEADER: f"Use at most {MAX_KEY_LENGTH} characters."}
+            )
+
+        cache_key = idempotency_cache_key(request.user, request.path, key)
+        fingerprint = request_fingerprint(request.data)
+
+        if replay := self.claim_idempotency_key(cache_key, fingerprint):
+            return replay
+        try:
+            response = super().create(request, *args, **kwargs)
+        except BaseException:
+            cache.delete(cache_key)
+            raise
+
+        if status.is_success(response.status_code):
+            cache.set(
+                cache_key,
+                {
+                    "fingerprint": fingerprint,
+                    "status": response.status_code,
+                    "data": dict(response.data),
+                    "headers": dict(response.headers),
+                },
+                timeout=settings.IDEMPOTENCY_TTL,
+            )
+        else:
+            # Failed requests may be retried with the same key.
+            cache.delete(cache_key)
+        return response
+
+    def claim_idempotency_key(self, cache_key, fingerprint):
+        """
+        Claim the key for this request, returning ``None``, or the stored
+        response of an earlier request with the same key.
+        """
+        deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT
+        pending = {"fingerprint": fingerprint, "status": None}
+        while not cache.add(cache_key, pending, timeout=settings.IDEMPOTENCY_LOCK_TTL):
+            if (stored := cache.get(cache_key)) is None:
+                continue
+            if stored["fingerprint"] != fingerprint:
+                raise IdempotencyKeyReused()
+            if stored["status"] is not None:
+                return Response(
+                    stored["data"],
+                    status=stored["status"],
+                    headers={**stored["headers"], "Idempotent-Replayed": "true"},
+                )
+            if time.monotonic() >= deadline:
+                raise IdempotencyKeyInUse()
+            time.sleep(0.05)
+        return None
@@ -0,0 +1,14 @@
+import uuid
+
+from django.db import models
+
+
+class ProfileReport(models.Model):
+    """
+    Report of a profiled request, kept in the database so that every process
+    can serve it for ``settings.PROFILER_TTL`` seconds.
+    """
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    report = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
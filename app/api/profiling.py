@@ -0,0 +1,194 @@
+import cProfile
+import io
+import pstats
+import threading
+import time
+import tracemalloc
+from contextlib import ExitStack, contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.exceptions import APIException, NotFound
+from rest_framework.permissions import IsAdminUser
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.views import APIView
+
+from api.models import ProfileReport
+
+PROFILE_HEADER = "HTTP_X_PROFILE"
+PROFILE_PARAM = "_profile"
+# Functions whose cumulative time is reported as the phases of a request.
+PHASES = ("dispatch", "initial", "filter_queryset", "get_serializer", "data", "render")
+
+
+class SQLTimeline:
+    """
+    ``connection.execute_wrapper`` recording every query with its offset
+    from the start of the request. Parameters are left out of the report.
+    """
+
+    def __init__(self, started):
+        self.started = started
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        offset = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append(
+                {
+                    "database": context["connection"].alias,
+                    "offset_ms": round((offset - self.started) * 1000, 3),
+                    "duration_ms": round((time.perf_counter() - offset) * 1000, 3),
+                    "sql": sql[:1000],
+                }
+            )
+
+
+class MemoryTracing:
+    """
+    Reference-counted tracemalloc, started by the first profiled request and
+    stopped by the last, unless something else had started it before. The
+    figures of concurrent requests are process-wide and include each other.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._users = 0
+        self._started = False
+
+    @contextmanager
+    def __call__(self):
+        with self._lock:
+            if not self._users:
+                self._started = not tracemalloc.is_tracing()
+                if self._started:
+                    tracemalloc.start()
+            self._users += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._users -= 1
+                if not self._users and self._started:
+                    tracemalloc.stop()
+
+
+memory_tracing = MemoryTracing()
+
+
+def request_user(request):
+    """
+    Return the user of the session or, failing that, of the API credentials
+    of ``request``, or ``None`` if the credentials are invalid.
+    """
+    user = getattr(request, "user", None)
+    if user is not None and user.is_authenticated:
+        return user
+    authenticators = [auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES]
+    try:
+        return Request(request, authenticators=authenticators).user
+    except APIException:
+        return None
+
+
+class ProfilerMiddleware:
+    """
+    Profile a single request of a staff user when it carries an
+    ``X-Profile`` header or a ``_profile`` query parameter.
+
+    The request runs under cProfile, tracemalloc and a SQL timeline, and the
+    report is stored in the database for ``settings.PROFILER_TTL`` seconds
+    and linked from the ``X-Profile-Url`` response header. The user is authenticated before
+    anything is profiled, and requests of anyone else, or without the flag,
+    pass straight through.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if PROFILE_HEADER not in request.META and PROFILE_PARAM not in request.GET:
+            return self.get_response(request)
+        user = request_user(request)
+        if not (user and user.is_authenticated and user.is_staff):
+            return self.get_response(request)
+
+        started = time.perf_counter()
+        timeline = SQLTimeline(started)
+        profiler = cProfile.Profile()
+
+        with ExitStack() as stack:
+            stack.enter_context(memory_tracing())
+            memory_before = tracemalloc.get_traced_memory()[0]
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(timeline))
+            profiler.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.disable()
+            elapsed = time.perf_counter() - started
+            memory_after, memory_peak = tracemalloc.get_traced_memory()
+
+        ProfileReport.objects.filter(created_at__lt=report_cutoff()).delete()
+        report = ProfileReport.objects.create(
+            report={
+                "method": request.method,
+                "path": request.get_full_path(),
+                "status": response.status_code,
+                "duration_ms": round(elapsed * 1000, 3),
+                "memory": {
+                    "delta_bytes": memory_after - memory_before,
+                    "peak_bytes": memory_peak,
+                },
+                "phases_ms": phase_times(profiler),
+                "sql": timeline.queries,
+                "call_tree": call_tree(profiler),
+            }
+        )
+        response["X-Profile-Url"] = reverse("v1:profile-report", args=[report.id])
+        return response
+
+
+def report_cutoff():
+    return timezone.now() - timedelta(seconds=settings.PROFILER_TTL)
+
+
+def phase_times(profiler):
+    stats = pstats.Stats(profiler).stats
+    phases = {}
+    for (_, _, name), (_, _, _, cumulative, _) in stats.items():
+        if name in PHASES:
+            phases[name] = max(phases.get(name, 0), round(cumulative * 1000, 3))
+    return phases
+
+
+def call_tree(profiler, limit=60):
+    output = io.StringIO()
+    stats = pstats.Stats(profiler, stream=output)
+    stats.sort_stats(pstats.SortKey.CUMULATIVE).print_callees(limit)
+    return output.getvalue()
+
+
+class ProfileReportView(APIView):
+    """
+    Serve a stored report to staff users, who authenticate the same way as
+    for the request they profiled.
+    """
+
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, profile_id):
+        report = ProfileReport.objects.filter(
+            pk=profile_id, created_at__gte=report_cutoff()
+        ).first()
+        if report is None:
+            raise NotFound("Profile not found or expired.")
+        return Response(report.report)
@@ -0,0 +1,11 @@
+from rest_framework.renderers import JSONRenderer
+
+
+class ColumnarJSONRenderer(JSONRenderer):
+    """
+    JSON body laid out as one array per field, selected with
+    ``?format=columnar``. Views build the columnar payload themselves.
+    """
+
+    media_type = "application/vnd.chronos.columnar+json"
+    format = "columnar"
@@ -0,0 +1,177 @@
+import base64
+import threading
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from django.urls import reverse
+from model_bakery import baker
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from api.authentication import PrincipalBasicAuthentication
+from api.batch import BatchView
+
+BATCH_ENDPOINT_V1 = "v1:batch"
+START = datetime(2024, 11, 21, 12, 0, tzinfo=timezone.utc)
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def events(user):
+    room = baker.make("events.ConferenceRoom", manager=user)
+    return [
+        baker.make(
+            "events.CalendarEvent",
+            owner=user,
+            location=room,
+            start=START + timedelta(days=day),
+            end=START + timedelta(days=day, hours=1),
+        )
+        for day in range(3)
+    ]
+
+
+def batch(client, requests):
+    return client.post(
+        reverse(BATCH_ENDPOINT_V1), {"requests": requests}, format="json"
+    )
+
+
+def test_batch_runs_reads_authenticated_once(monkeypatch, user, events):
+    user.set_password("secret")
+    user.save()
+    token = base64.b64encode(f"{user.username}:secret".encode()).decode()
+    client = APIClient(HTTP_AUTHORIZATION=f"Basic {token}")
+    calls = []
+    authenticate = PrincipalBasicAuthentication.authenticate
+    monkeypatch.setattr(
+        PrincipalBasicAuthentication,
+        "authenticate",
+        lambda self, request: calls.append(request.path) or authenticate(self, request),
+    )
+
+    response = batch(
+        client,
+        [
+            {"path": "conference-rooms/"},
+            {"path": "calendar-events/?day=2024-11-22"},
+            {"path": f"/api/v1/calendar-events/{events[0].id}/"},
+        ],
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert calls == [reverse(BATCH_ENDPOINT_V1)]
+    rooms, day, detail = response.data["responses"]
+    assert rooms["status"] == day["status"] == detail["status"] == 200
+    assert rooms["body"] == client.get(reverse("v1:conference-rooms-list")).data
+    assert [event["id"] for event in day["body"]] == [events[1].id]
+    assert detail["body"]["id"] == events[0].id
+    assert detail["headers"] == {"ETag": '"1"'}
+
+
+def test_batch_runs_writes_in_order(user_client, events):
+    event = events[0]
+
+    response = batch(
+        user_client,
+        [
+            {
+                "method": "PATCH",
+                "path": f"calendar-events/{event.id}/",
+                "headers": {"If-Match": '"1"'},
+                "body": {"event_name": "Renamed"},
+            },
+            {"path": f"calendar-events/{event.id}/"},
+            {
+                "method": "PATCH",
+                "path": f"calendar-events/{event.id}/",
+                "headers": {"If-Match": '"1"'},
+                "body": {"event_name": "Stale"},
+            },
+            {"method": "DELETE", "path": f"calendar-events/{events[1].id}/"},
+        ],
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    renamed, read, stale, deleted = response.data["responses"]
+    assert renamed["status"] == read["status"] == 200
+    assert read["body"]["event_name"] == "Renamed"
+    assert stale["status"] == status.HTTP_412_PRECONDITION_FAILED
+    assert deleted["status"] == status.HTTP_428_PRECONDITION_REQUIRED
+
+
+def test_batch_header_names_are_case_insensitive(user_client, events):
+    response = batch(
+        user_client,
+        [
+            {
+                "method": "PATCH",
+                "path": f"calendar-events/{events[0].id}/",
+                "headers": {"if-match": '"2"'},
+                "body": {"event_name": "Stale"},
+            }
+        ],
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    (stale,) = response.data["responses"]
+    assert stale["status"] == status.HTTP_412_PRECONDITION_FAILED
+
+
+def test_batch_only_reaches_the_rest_api(user_client):
+    response = batch(
+        user_client,
+        [
+            {"path": "calendar-events/stream/"},
+            {"path": "batch/"},
+            {"path": "/admin/"},
+            {"path": "unknown/"},
+        ],
+    )
+
+    assert [item["status"] for item in response.data["responses"]] == [404] * 4
+
+
+@pytest.mark.parametrize(
+    "requests",
+    [
+        [],
+        [{"path": "conference-rooms/"}] * 21,
+        [{"method": "DELETE", "path": "calendar-events/1/"}] * 6,
+        [{"method": "PUT", "path": "calendar-events/1/"}],
+        [{"path": "conference-rooms/", "headers": {"Authorization": "Basic x"}}],
+        [{"method": "GET"}],
+    ],
+)
+def test_batch_limits(user_client, requests):
+    response = batch(user_client, requests)
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert "requests" in response.data
+
+
+def test_batch_requires_authentication(client):
+    assert batch(client, [{"path": "conference-rooms/"}]).status_code == 401
+
+
+@pytest.mark.django_db(transaction=True)
+def test_batch_reads_run_concurrently(monkeypatch, settings, user_client, events):
+    settings.BATCH_CONCURRENCY = 3
+    barrier = threading.Barrier(3, timeout=5)
+    run = BatchView.run
+
+    def run_together(self, *args):
+        barrier.wait()
+        return run(self, *args)
+
+    monkeypatch.setattr(BatchView, "run", run_together)
+
+    response = batch(
+        user_client,
+        [{"path": f"calendar-events/{event.id}/"} for event in events],
+    )
+
+    assert [item["body"]["id"] for item in response.data["responses"]] == [
+        event.id for event in events
+    ]
@@ -0,0 +1,116 @@
+import pytest
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from api.idempotency import idempotency_cache_key, request_fingerprint
+from events.models import CalendarEvent
+
+EVENTS_ENDPOINT_V1 = "v1:calendar-events"
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def event_payload():
+    return {
+        "event_name": "Retry",
+        "agenda": "Retry",
+        "start": "2024-11-21T10:00:00Z",
+        "end": "2024-11-21T11:00:00Z",
+        "participants": [],
+    }
+
+
+def post(client, payload, key):
+    return client.post(
+        reverse(f"{EVENTS_ENDPOINT_V1}-list"),
+        payload,
+        format="json",
+        HTTP_IDEMPOTENCY_KEY=key,
+    )
+
+
+def test_retried_create_is_replayed(user_client, event_payload):
+    first = post(user_client, event_payload, "key-1")
+    replay = post(user_client, event_payload, "key-1")
+
+    assert first.status_code == replay.status_code == status.HTTP_201_CREATED
+    assert replay.data == first.data
+    assert replay["Idempotent-Replayed"] == "true"
+    assert CalendarEvent.objects.count() == 1
+
+    assert post(user_client, event_payload, "key-2").data["id"] != first.data["id"]
+
+
+def test_idempotency_key_is_scoped_to_user(
+    user_client, different_timezone_user, event_payload
+):
+    post(user_client, event_payload, "key-1")
+    other_client = APIClient()
+    other_client.force_authenticate(different_timezone_user)
+
+    response = post(other_client, event_payload, "key-1")
+
+    assert response.status_code == status.HTTP_201_CREATED
+    assert "Idempotent-Replayed" not in response
+    assert CalendarEvent.objects.count() == 2
+
+
+def test_idempotency_key_reused_with_other_payload(user_client, event_payload):
+    post(user_client, event_payload, "key-1")
+    event_payload["event_name"] = "Changed"
+
+    response = post(user_client, event_payload, "key-1")
+
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+def test_failed_request_releases_idempotency_key(user_client, event_payload):
+    invalid = {**event_payload, "end": event_payload["start"]}
+    assert post(user_client, invalid, "key-1").status_code == 400
+
+    assert post(user_client, event_payload, "key-1").status_code == 201
+
+
+@pytest.fixture
+def pending_claim(user, event_payload):
+    # Left by a first request that is still writing.
+    key = idempotency_cache_key(user, reverse(f"{EVENTS_ENDPOINT_V1}-list"), "key-1")
+    cache.set(key, {"fingerprint": request_fingerprint(event_payload), "status": None})
+    return key
+
+
+def test_duplicate_waits_for_pending_request(
+    monkeypatch, user_client, event_payload, pending_claim
+):
+    def first_request_finishes(seconds):
+        cache.set(
+            pending_claim,
+            {
+                "fingerprint": request_fingerprint(event_payload),
+                "status": 201,
+                "data": {"id": 1},
+                "headers": {},
+            },
+        )
+
+    monkeypatch.setattr("api.idempotency.time.sleep", first_request_finishes)
+
+    response = post(user_client, event_payload, "key-1")
+
+    assert response.status_code == status.HTTP_201_CREATED
+    assert response.data == {"id": 1}
+    assert not CalendarEvent.objects.exists()
+
+
+def test_duplicate_gives_up_on_stuck_request(
+    settings, user_client, event_payload, pending_claim
+):
+    settings.IDEMPOTENCY_WAIT = 0
+
+    response = post(user_client, event_payload, "key-1")
+
+    assert response.status_code == status.HTTP_409_CONFLICT
+    assert not CalendarEvent.objects.exists()
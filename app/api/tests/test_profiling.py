@@ -0,0 +1,117 @@
+import base64
+import tracemalloc
+
+import pytest
+from django.core.cache import cache
+from django.urls import reverse
+from model_bakery import baker
+from rest_framework.test import APIClient
+
+from api import profiling
+from api.models import ProfileReport
+
+EVENTS_ENDPOINT_V1 = "v1:calendar-events"
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def staff_user(user):
+    user.is_staff = True
+    user.save()
+    return user
+
+
+def basic_auth_client(user):
+    user.set_password("secret")
+    user.save()
+    token = base64.b64encode(f"{user.username}:secret".encode()).decode()
+    return APIClient(HTTP_AUTHORIZATION=f"Basic {token}")
+
+
+def test_profiled_request_links_report_for_staff(staff_user):
+    baker.make("events.CalendarEvent", owner=staff_user, event_name="Fixture Event")
+    api_client = basic_auth_client(staff_user)
+    url = reverse(f"{EVENTS_ENDPOINT_V1}-list")
+
+    response = api_client.get(url, {"query": "Fixture"}, HTTP_X_PROFILE="1")
+
+    assert response.status_code == 200
+    assert len(response.data) == 1
+    # Reports live in the database, not in the memory of one process.
+    cache.clear()
+    report = api_client.get(response["X-Profile-Url"]).json()
+    assert report["path"].startswith(url)
+    assert report["status"] == 200
+    assert {"dispatch", "filter_queryset"} <= report["phases_ms"].keys()
+    assert any("events_calendarevent" in query["sql"] for query in report["sql"])
+    assert "delta_bytes" in report["memory"]
+    assert "filter_queryset" in report["call_tree"]
+
+
+def test_profile_report_is_staff_only(staff_user):
+    api_client = APIClient()
+    api_client.force_authenticate(staff_user)
+    response = api_client.get(reverse(f"{EVENTS_ENDPOINT_V1}-list"), {"_profile": "1"})
+    url = response["X-Profile-Url"]
+
+    assert APIClient().get(url).status_code == 401
+    api_client.force_authenticate(baker.make("accounts.User"))
+    assert api_client.get(url).status_code == 403
+
+
+def test_profile_report_expires(settings, staff_user):
+    api_client = APIClient()
+    api_client.force_authenticate(staff_user)
+    response = api_client.get(reverse(f"{EVENTS_ENDPOINT_V1}-list"), {"_profile": "1"})
+    settings.PROFILER_TTL = 0
+
+    assert api_client.get(response["X-Profile-Url"]).status_code == 404
+    api_client.get(reverse(f"{EVENTS_ENDPOINT_V1}-list"), {"_profile": "1"})
+    assert ProfileReport.objects.count() == 1
+
+
+def test_profile_flag_is_ignored_for_other_users(user_client):
+    response = user_client.get(
+        reverse(f"{EVENTS_ENDPOINT_V1}-list"), HTTP_X_PROFILE="1"
+    )
+
+    assert response.status_code == 200
+    assert "X-Profile-Url" not in response
+
+
+@pytest.mark.parametrize("password", ["secret", "wrong"])
+def test_requests_of_other_users_are_not_profiled(monkeypatch, user, password):
+    monkeypatch.setattr(
+        profiling.cProfile, "Profile", lambda: pytest.fail("Request was profiled.")
+    )
+    user.set_password("secret")
+    user.save()
+    token = base64.b64encode(f"{user.username}:{password}".encode()).decode()
+
+    response = APIClient().get(
+        reverse(f"{EVENTS_ENDPOINT_V1}-list"),
+        HTTP_X_PROFILE="1",
+        HTTP_AUTHORIZATION=f"Basic {token}",
+    )
+
+    assert response.status_code == (200 if password == "secret" else 401)
+    assert "X-Profile-Url" not in response
+
+
+def test_memory_tracing_stops_with_the_last_request():
+    memory_tracing = profiling.MemoryTracing()
+
+    with memory_tracing():
+        with memory_tracing():
+            assert tracemalloc.is_tracing()
+        assert tracemalloc.is_tracing()
+    assert not tracemalloc.is_tracing()
+
+    tracemalloc.start()
+    try:
+        with memory_tracing():
+            pass
+        assert tracemalloc.is_tracing()
+    finally:
+        tracemalloc.stop()
@@ -0,0 +1,79 @@
+import pytest
+from django.urls import reverse
+from model_bakery import baker
+from rest_framework import status
+
+from api.throttling import LocalTokenBucketStore
+from conftest import USER_COMPANY_UUID
+
+EVENTS_ENDPOINT_V1 = "v1:calendar-events"
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def tight_buckets(settings):
+    settings.THROTTLE_BUCKETS = {
+        "user": {"read": (2, 0.01), "search": (1, 0.01), "write": (1, 0.01)},
+        "company": {"read": (3, 0.01), "search": (3, 0.01), "write": (3, 0.01)},
+    }
+
+
+def test_token_bucket_refills_over_time(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("api.throttling.time.monotonic", lambda: now[0])
+    store = LocalTokenBucketStore()
+
+    assert store.take("key", 2, 1) == 0
+    assert store.take("key", 2, 1) == 0
+    assert store.take("key", 2, 1) == pytest.approx(1)
+
+    now[0] += 0.5
+    assert store.take("key", 2, 1) == pytest.approx(0.5)
+    now[0] += 0.5
+    assert store.take("key", 2, 1) == 0
+
+
+def test_user_is_throttled_with_retry_after(tight_buckets, user_client):
+    url = reverse(f"{EVENTS_ENDPOINT_V1}-list")
+
+    assert user_client.get(url).status_code == status.HTTP_200_OK
+    assert user_client.get(url).status_code == status.HTTP_200_OK
+    response = user_client.get(url)
+
+    assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+    assert int(response.headers["Retry-After"]) > 0
+
+
+def test_search_has_its_own_budget(tight_buckets, user_client):
+    url = reverse(f"{EVENTS_ENDPOINT_V1}-list")
+
+    assert user_client.get(url, {"query": "a"}).status_code == status.HTTP_200_OK
+    response = user_client.get(url, {"query": "a"})
+    assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+
+    assert user_client.get(url).status_code == status.HTTP_200_OK
+
+
+def test_company_budget_is_shared_by_its_users(tight_buckets, client, user):
+    url = reverse(f"{EVENTS_ENDPOINT_V1}-list")
+    colleagues = baker.make("accounts.User", company_id=USER_COMPANY_UUID, _quantity=3)
+
+    statuses = []
+    for colleague in [user, *colleagues]:
+        client.force_authenticate(user=colleague)
+        statuses.append(client.get(url).status_code)
+
+    assert statuses == [200, 200, 200, 429]
+
+
+def test_throttled_user_does_not_use_up_the_company_budget(tight_buckets, client, user):
+    url = reverse(f"{EVENTS_ENDPOINT_V1}-list")
+    colleague = baker.make("accounts.User", company_id=USER_COMPANY_UUID)
+
+    client.force_authenticate(user=user)
+    statuses = [client.get(url).status_code for _ in range(5)]
+    client.force_authenticate(user=colleague)
+    statuses.append(client.get(url).status_code)
+
+    assert statuses == [200, 200, 429, 429, 429, 200]
@@ -0,0 +1,106 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.module_loading import import_string
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.throttling import BaseThrottle
+
+
+class LocalTokenBucketStore:
+    """
+    Process-local token buckets.
+
+    Every bucket is an immutable ``(tokens, updated_at)`` tuple replaced by a
+    single dict assignment, so no lock is taken. Concurrent requests may
+    occasionally overwrite each other's update, which only lets a request or
+    two more through.
+    """
+
+    def __init__(self):
+        self._buckets = {}
+
+    def clear(self):
+        self._buckets.clear()
+
+    def take(self, key, capacity, rate):
+        """
+        Take a token from the bucket, returning ``0`` on success or the
+        seconds until one is available.
+        """
+        now = time.monotonic()
+        tokens, updated_at = self._buckets.get(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - updated_at) * rate)
+        if tokens < 1:
+            self._buckets[key] = (tokens, now)
+            return (1 - tokens) / rate
+        self._buckets[key] = (tokens - 1, now)
+        return 0
+
+
+class CacheTokenBucketStore:
+    """
+    Token buckets kept in the default cache, shared by every process using
+    it. Reads and writes are not atomic, the budget is enforced approximately.
+    """
+
+    def clear(self):
+        pass
+
+    def take(self, key, capacity, rate):
+        now = time.time()
+        tokens, updated_at = cache.get(f"throttle:{key}", (capacity, now))
+        tokens = min(capacity, tokens + (now - updated_at) * rate)
+        wait = 0 if tokens >= 1 else (1 - tokens) / rate
+        cache.set(
+            f"throttle:{key}",
+            (tokens - 1 if not wait else tokens, now),
+            timeout=int(capacity / rate) + 1,
+        )
+        return wait
+
+
+_store = None
+
+
+def get_bucket_store():
+    global _store
+    if _store is None:
+        _store = import_string(settings.THROTTLE_STORE)()
+    return _store
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Token bucket throttle with separate budgets for cheap reads, searches and
+    writes, configured per scope in ``settings.THROTTLE_BUCKETS``.
+
+    A request takes a token from the user's bucket first and only then from
+    the company's, so a user over their own budget does not use up what is
+    left for their colleagues.
+    """
+
+    def get_budget(self, request):
+        if request.method not in SAFE_METHODS:
+            return "write"
+        if request.query_params.get("query"):
+            return "search"
+        return "read"
+
+    def allow_request(self, request, view):
+        if not request.user or not request.user.is_authenticated:
+            return True
+        budget = self.get_budget(request)
+        for scope, ident in (
+            ("user", request.user.pk),
+            ("company", request.user.company_id),
+        ):
+            capacity, rate = settings.THROTTLE_BUCKETS[scope][budget]
+            key = f"{scope}:{ident}:{budget}"
+            self._wait = get_bucket_store().take(key, capacity, rate)
+            if self._wait:
+                return False
+        return True
+
+    def wait(self):
+        return self._wait
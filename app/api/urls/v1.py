@@ -1,7 +1,14 @@
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
-from events.views.v1 import ConferenceRoomViewSet, CalendarEventViewSet
+from api.batch import BatchView
+from api.profiling import ProfileReportView
+
+from events.views.v1 import (
+    CalendarEventViewSet,
+    ConferenceRoomViewSet,
+    calendar_event_stream,
+)
 
 router = DefaultRouter()
 
@@ -9,5 +16,16 @@ router.register(r"conference-rooms", ConferenceRoomViewSet, basename="conference
 router.register(r"calendar-events", CalendarEventViewSet, basename="calendar-events")
 
 urlpatterns = [
+    path("batch/", BatchView.as_view(), name="batch"),
+    path(
+        "profiles/<uuid:profile_id>/",
+        ProfileReportView.as_view(),
+        name="profile-report",
+    ),
+    path(
+        "calendar-events/stream/",
+        calendar_event_stream,
+        name="calendar-events-stream",
+    ),
     path("", include(router.urls)),
 ]
@@ -1,4 +1,8 @@
-from rest_framework import serializers
+from datetime import date, datetime, time, timedelta
+
+from django.conf import settings
+from rest_framework import serializers, status
+from rest_framework.exceptions import APIException, ValidationError
 from pytz import timezone
 
 
@@ -13,3 +17,161 @@ class TimeZoneDateTimeField(serializers.DateTimeField):
         if request := self.context.get("request"):
             self.timezone = timezone(request.user.timezone)
         return value
+
+
+BUCKETS = ("day", "week")
+
+
+class TenantMoving(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "Your company's data is being moved, changes are paused."
+    default_code = "tenant_moving"
+
+    def __init__(self, detail=None, code=None):
+        super().__init__(detail, code)
+        # Picked up by DRF's exception handler as the Retry-After header.
+        self.wait = max(settings.TENANT_SHARD_MAP_TTL, 1)
+
+
+class PreconditionFailed(APIException):
+    status_code = status.HTTP_412_PRECONDITION_FAILED
+    default_detail = "The resource was changed since it was read."
+    default_code = "precondition_failed"
+
+
+class PreconditionRequired(APIException):
+    status_code = status.HTTP_428_PRECONDITION_REQUIRED
+    default_detail = "Send the ETag of the resource in the If-Match header."
+    default_code = "precondition_required"
+
+
+def parse_if_match(request):
+    """
+    Return the version named by the ``If-Match`` header, as sent back from a
+    ``"<version>"`` ETag.
+    """
+    value = request.headers.get("If-Match", "").removeprefix("W/").strip('" ')
+    if not value.isdigit():
+        raise PreconditionRequired()
+    return int(value)
+
+
+def parse_date_param(params, name):
+    if value := params.get(name):
+        try:
+            return date.fromisoformat(value)
+        except ValueError:
+            raise ValidationError({name: "Date has wrong format. Use YYYY-MM-DD."})
+    return None
+
+
+def parse_date_range(params, max_days):
+    """
+    Parse the inclusive ``from``/``to`` date parameters, spanning at most
+    ``max_days`` days.
+    """
+    first_day = parse_date_param(params, "from")
+    last_day = parse_date_param(params, "to")
+    if not first_day or not last_day:
+        raise ValidationError({"window": "Both 'from' and 'to' are required."})
+    if first_day > last_day:
+        raise ValidationError({"window": "'from' must not be after 'to'."})
+    if (last_day - first_day).days >= max_days:
+        raise ValidationError(
+            {"window": f"The window cannot be longer than {max_days} days."}
+        )
+    return first_day, last_day
+
+
+def parse_bucket_param(params):
+    bucket = params.get("bucket", "day")
+    if bucket not in BUCKETS:
+        raise ValidationError({"bucket": f"Choose one of: {', '.join(BUCKETS)}."})
+    return bucket
+
+
+def parse_ids_param(params, name, max_count):
+    """
+    Parse a comma separated list of at most ``max_count`` ids, keeping the
+    order of first appearance.
+    """
+    if not (value := params.get(name)):
+        return None
+    try:
+        ids = list(dict.fromkeys(int(part) for part in value.split(",") if part))
+    except ValueError:
+        raise ValidationError({name: "Use a comma separated list of ids."})
+    if len(ids) > max_count:
+        raise ValidationError({name: f"Request at most {max_count} ids at once."})
+    return ids
+
+
+def parse_fields_param(params, allowed):
+    """
+    Parse the comma separated ``fields`` parameter into the requested names,
+    in the order of ``allowed``, or ``None`` when every field is wanted.
+    """
+    if not (value := params.get("fields")):
+        return None
+    requested = {name.strip() for name in value.split(",") if name.strip()}
+    if unknown := requested - set(allowed):
+        raise ValidationError(
+            {"fields": f"Unknown fields: {', '.join(sorted(unknown))}."}
+        )
+    return [name for name in allowed if name in requested]
+
+
+def parse_include_param(params, allowed):
+    """
+    Parse the comma separated ``include`` parameter into the set of related
+    resources to sideload.
+    """
+    requested = {
+        name.strip() for name in params.get("include", "").split(",") if name.strip()
+    }
+    if unknown := requested - set(allowed):
+        raise ValidationError(
+            {"include": f"Unknown includes: {', '.join(sorted(unknown))}."}
+        )
+    return requested
+
+
+def bucket_days(first_day, last_day, bucket):
+    """
+    Return ``{day: bucket_start}`` for every day from ``first_day`` to
+    ``last_day``. Weeks start on Monday, the first one is cut at ``first_day``.
+    """
+    days = {}
+    day = first_day
+    while day <= last_day:
+        if bucket == "week":
+            days[day] = max(day - timedelta(days=day.weekday()), first_day)
+        else:
+            days[day] = day
+        day += timedelta(days=1)
+    return days
+
+
+def parse_datetime_param(params, name, tz):
+    """
+    Parse an ISO 8601 datetime query parameter, interpreting naive values in
+    ``tz``.
+    """
+    if value := params.get(name):
+        try:
+            return serializers.DateTimeField(default_timezone=tz).to_internal_value(
+                value
+            )
+        except ValidationError as exc:
+            raise ValidationError({name: exc.detail})
+    return None
+
+
+def local_day_range(first_day, last_day, tz):
+    """
+    Return the aware datetimes bounding the local days ``first_day`` to
+    ``last_day`` (inclusive) in ``tz``.
+    """
+    start = tz.localize(datetime.combine(first_day, time.min))
+    end = tz.localize(datetime.combine(last_day + timedelta(days=1), time.min))
+    return start, end
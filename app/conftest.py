@@ -1,12 +1,72 @@
 import pytest
 
+from django.core.cache import cache
 from model_bakery import baker
 from rest_framework.test import APIClient
 
+from accounts.principals import principal_cache
+from accounts.resolver import email_resolver
+from accounts.sharding import shard_map
+from api.throttling import get_bucket_store
+from events.rooms import room_directory
+
 USER_COMPANY_UUID = "342245a4-4539-49ac-86d4-be2c9cb05253"
 EXTERNAL_USER_COMPANY_UUID = "f6443e0a-1f29-4aa9-96f0-76db16104414"
 
 
+def pytest_addoption(parser):
+    parser.addoption(
+        "--update-query-snapshots",
+        action="store_true",
+        help="Rewrite the query count and plan snapshots instead of comparing.",
+    )
+
+
+@pytest.fixture(autouse=True)
+def reset_shard_map():
+    # A running process keeps the shard map in memory, start every test with a
+    # freshly loaded one holding no overrides.
+    shard_map.prime({})
+    yield
+    shard_map.clear()
+
+
+@pytest.fixture(autouse=True)
+def reset_cache():
+    # Database ids are reused between tests, cached entries keyed by them are not.
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def reset_room_directory():
+    room_directory.clear()
+    yield
+    room_directory.clear()
+
+
+@pytest.fixture(autouse=True)
+def reset_email_resolver():
+    email_resolver.clear()
+    yield
+    email_resolver.clear()
+
+
+@pytest.fixture(autouse=True)
+def reset_principal_cache():
+    principal_cache.clear()
+    yield
+    principal_cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def reset_throttle_buckets():
+    get_bucket_store().clear()
+    yield
+    get_bucket_store().clear()
+
+
 @pytest.fixture
 def client():
     return APIClient()
@@ -0,0 +1,56 @@
+from functools import cached_property
+
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import QuerySet
+
+# Below this many rows an exact COUNT(*) is cheap and worth its accuracy.
+ESTIMATED_COUNT_THRESHOLD = 10000
+
+
+def estimate_row_count(model, using):
+    """
+    Return the planner's estimate of the number of rows in the model's table,
+    or ``None`` when the database does not keep one.
+    """
+    connection = connections[using]
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(%s)",
+                [connection.ops.quote_name(table)],
+            )
+        elif connection.vendor == "sqlite":
+            # Only available once ANALYZE has run.
+            cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' "
+                "AND name = 'sqlite_stat1'"
+            )
+            if not cursor.fetchone():
+                return None
+            cursor.execute(
+                "SELECT CAST(stat AS INTEGER) FROM sqlite_stat1 "
+                "WHERE tbl = %s AND idx IS NULL",
+                [table],
+            )
+        else:
+            return None
+        row = cursor.fetchone()
+    return row[0] if row and row[0] is not None and row[0] >= 0 else None
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator reading the planner's row estimate instead of running an exact
+    ``COUNT(*)`` over a large, unfiltered table.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if isinstance(queryset, QuerySet) and not queryset.query.where:
+            estimate = estimate_row_count(queryset.model, queryset.db)
+            if estimate is not None and estimate > ESTIMATED_COUNT_THRESHOLD:
+                return estimate
+        return super().count
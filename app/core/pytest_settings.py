@@ -0,0 +1,9 @@
+from core.settings import *  # noqa: F401, F403
+
+# The sharding tests move tenants into a second database.
+DATABASES["shard_1"] = {
+    "ENGINE": "django.db.backends.sqlite3",
+    "NAME": BASE_DIR / "shard_1.sqlite3",
+}
+
+TENANT_SHARD_ID_BLOCKS = {"shard_1": 1}
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -40,7 +41,7 @@ INSTALLED_APPS = [
     "rest_framework",
 ]
 
-PROJECT_APPS = ["accounts", "api", "events"]
+PROJECT_APPS = ["accounts", "api", "events", "webhooks"]
 
 INSTALLED_APPS += PROJECT_APPS
 
@@ -50,6 +51,8 @@ MIDDLEWARE = [
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "accounts.middleware.AdminShardMiddleware",
+    "api.profiling.ProfilerMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -58,7 +61,7 @@ ROOT_URLCONF = "core.urls"
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework.authentication.BasicAuthentication",
+        "api.authentication.PrincipalBasicAuthentication",
     ]
 }
 
@@ -92,6 +95,153 @@ DATABASES = {
 }
 
 
+# Tenant sharding
+# Sharding is off unless CHRONOS_SHARDS lists shards as alias:block pairs. Each
+# shard alias holds a full copy of the schema and allocates primary keys from
+# its own id block, which must never change once the shard holds data.
+# Companies are assigned to a shard through TENANT_SHARDS (company_id -> alias)
+# or by the move_tenant command; unassigned companies live in the default
+# database, which also keeps the directory of all users.
+
+TENANT_SHARD_ID_BLOCKS = {}
+
+for shard in filter(None, os.environ.get("CHRONOS_SHARDS", "").split(",")):
+    alias, _, block = shard.partition(":")
+    DATABASES[alias] = {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": BASE_DIR / f"{alias}.sqlite3",
+    }
+    if block:
+        TENANT_SHARD_ID_BLOCKS[alias] = int(block)
+
+DATABASE_ROUTERS = ["accounts.sharding.TenantRouter"]
+
+TENANT_APPS = ["accounts", "events", "webhooks"]
+
+TENANT_SHARDS = {}
+
+TENANT_SHARD_MAP_TTL = 5
+
+
+# Batch requests
+# /api/v1/batch/ accepts up to BATCH_MAX_REQUESTS sub-requests, at most
+# BATCH_MAX_WRITES of them writes, and runs reads on up to BATCH_CONCURRENCY
+# threads.
+
+BATCH_MAX_REQUESTS = 20
+
+BATCH_MAX_WRITES = 5
+
+BATCH_CONCURRENCY = 4
+
+
+# Caches
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+# The local memory cache is private to each process. Deployments running
+# several processes should use a shared backend so that cache versions and
+# idempotency keys are seen by all of them.
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    }
+}
+
+ROOM_DIRECTORY_TTL = 300
+
+EMAIL_RESOLVER_CACHE_SIZE = 10000
+
+EMAIL_RESOLVER_CACHE_TTL = 60
+
+PRINCIPAL_CACHE_SIZE = 10000
+
+PRINCIPAL_CACHE_TTL = 60
+
+EVENT_COUNTS_CACHE_TTL = 300
+
+# Seconds that reports of profiled requests stay available.
+PROFILER_TTL = 3600
+
+
+# Idempotency
+# Responses to requests sent with an Idempotency-Key header are replayed for
+# IDEMPOTENCY_TTL seconds. A key is held for at most IDEMPOTENCY_LOCK_TTL
+# seconds while its first request runs, duplicates wait IDEMPOTENCY_WAIT
+# seconds for it to finish.
+
+IDEMPOTENCY_TTL = 24 * 60 * 60
+
+IDEMPOTENCY_LOCK_TTL = 30
+
+IDEMPOTENCY_WAIT = 5
+
+
+# Throttling
+# Token buckets as (capacity, tokens refilled per second) for every scope and
+# request budget. THROTTLE_STORE may point at
+# api.throttling.CacheTokenBucketStore to share buckets between processes.
+
+THROTTLE_STORE = "api.throttling.LocalTokenBucketStore"
+
+THROTTLE_BUCKETS = {
+    "user": {"read": (120, 2), "search": (20, 0.2), "write": (30, 0.5)},
+    "company": {"read": (2000, 30), "search": (200, 2), "write": (500, 8)},
+}
+
+
+# Scheduling
+# Local working hours (start, end) and `date.weekday()` numbers (Monday is 0)
+# of the working days, used when suggesting meeting times.
+
+WORKING_HOURS = (9, 17)
+
+WORKING_DAYS = (0, 1, 2, 3, 4)
+
+
+# Streams
+# Change notifications for /calendar-events/stream/ go through STREAM_BROKER,
+# events.streams.RedisBroker (with STREAM_BROKER_URL) shares them between
+# processes. Every connection buffers up to STREAM_QUEUE_SIZE messages and is
+# sent a comment every STREAM_KEEPALIVE seconds.
+
+STREAM_BROKER = "events.streams.LocalBroker"
+
+STREAM_BROKER_URL = None
+
+STREAM_QUEUE_SIZE = 100
+
+STREAM_KEEPALIVE = 15
+
+
+# Reminders
+# The send_reminders worker sends reminders REMINDER_LEAD seconds before events
+# start through REMINDER_BACKEND. It holds the reminders of the next
+# REMINDER_HORIZON seconds in memory and checks for due ones every
+# REMINDER_TICK seconds. Changes made by the API reach it through
+# STREAM_BROKER, which must be shared between processes for it to start.
+
+REMINDER_BACKEND = "events.reminders.ConsoleReminderBackend"
+
+REMINDER_LEAD = 600
+
+REMINDER_HORIZON = 3600
+
+REMINDER_TICK = 1
+
+
+# Webhooks
+# Failed deliveries are retried after base * 2 ** (attempt - 1) seconds, capped
+# at limit, and given up on after WEBHOOK_MAX_ATTEMPTS. A failing endpoint is
+# paused on the same schedule. Workers lease the endpoints of a batch for
+# WEBHOOK_LEASE seconds, which must be longer than posting a batch takes.
+
+WEBHOOK_BACKOFF = (5, 3600)
+
+WEBHOOK_MAX_ATTEMPTS = 10
+
+WEBHOOK_LEASE = 300
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -1,11 +1,19 @@
 from django.contrib import admin
+from django.db.models import Prefetch
 
+from accounts.models import User
+from core.paginator import EstimatedCountPaginator
 from events.models import ConferenceRoom, CalendarEvent
 
 
 @admin.register(ConferenceRoom)
-class ConferenceRoom(admin.ModelAdmin):
+class ConferenceRoomAdmin(admin.ModelAdmin):
     list_display = ("name", "manager", "address")
+    list_select_related = ("manager",)
+    search_fields = ("name", "address")
+    autocomplete_fields = ("manager",)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 
 @admin.register(CalendarEvent)
@@ -19,6 +27,20 @@ class CalendarEventAdmin(admin.ModelAdmin):
         "agenda",
         "get_participants",
     )
+    list_select_related = ("owner", "location")
+    list_filter = ("start",)
+    date_hierarchy = "start"
+    ordering = ("-start",)
+    search_fields = ("event_name",)
+    autocomplete_fields = ("owner", "location", "participants")
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        return queryset.prefetch_related(
+            Prefetch("participants", queryset=User.objects.only("id", "username"))
+        )
 
     def get_participants(self, obj):
         return ", ".join([str(participant) for participant in obj.participants.all()])
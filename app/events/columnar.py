@@ -0,0 +1,104 @@
+from rest_framework.fields import DateTimeField
+
+from events.models import CalendarEvent, ConferenceRoom
+
+COLUMNS = (
+    "id",
+    "owner",
+    "event_name",
+    "agenda",
+    "start",
+    "end",
+    "location",
+    "version",
+)
+
+
+class Interner:
+    """
+    Assign every distinct value a position in ``values``, so repeated strings
+    are sent once and referenced by index.
+    """
+
+    def __init__(self):
+        self.index = {}
+        self.values = []
+
+    def __call__(self, value):
+        if value is None:
+            return None
+        if (position := self.index.get(value)) is None:
+            position = self.index[value] = len(self.values)
+            self.values.append(value)
+        return position
+
+
+def columnar_events(queryset, rooms, timezone):
+    """
+    Render events as one array per field. Owner and participant emails are
+    indexes into ``emails`` and locations are indexes into ``locations``.
+
+    Built from plain query rows, ``rooms`` is the company's room directory
+    used to resolve addresses without joining the rooms table, or ``None``
+    to join it.
+    """
+    events = queryset.select_related(None).prefetch_related(None)
+    rows = list(
+        events.values_list(
+            "id",
+            "owner__email",
+            "event_name",
+            "agenda",
+            "start",
+            "end",
+            "location_id" if rooms is not None else "location__address",
+            "version",
+        )
+    )
+    ids, owners, names, agendas, starts, ends, location_ids, versions = (
+        map(list, zip(*rows)) if rows else ([] for _ in COLUMNS)
+    )
+
+    emails = Interner()
+    locations = Interner()
+    datetime_field = DateTimeField(default_timezone=timezone)
+
+    participants = {event_id: [] for event_id in ids}
+    if ids:
+        for event_id, email in (
+            CalendarEvent.participants.through.objects.filter(
+                calendarevent_id__in=ids, user__is_active=True
+            )
+            .order_by("user_id")
+            .values_list("calendarevent_id", "user__email")
+        ):
+            participants[event_id].append(emails(email))
+
+    if rooms is None:
+        addresses = location_ids
+    else:
+        directory = {room_id: room.address for room_id, room in rooms.items()}
+        if missing := set(location_ids) - directory.keys() - {None}:
+            directory.update(
+                ConferenceRoom.objects.filter(id__in=missing).values_list(
+                    "id", "address"
+                )
+            )
+        addresses = [directory.get(room_id) for room_id in location_ids]
+
+    return {
+        "count": len(ids),
+        "columns": {
+            "id": ids,
+            "owner": [emails(email) for email in owners],
+            "event_name": names,
+            "agenda": agendas,
+            "start": [datetime_field.to_representation(value) for value in starts],
+            "end": [datetime_field.to_representation(value) for value in ends],
+            "location": [locations(address) for address in addresses],
+            "participants": list(participants.values()),
+            "version": versions,
+        },
+        "emails": emails.values,
+        "locations": locations.values,
+    }
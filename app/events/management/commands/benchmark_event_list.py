@@ -0,0 +1,92 @@
+import statistics
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from accounts.models import User
+from events.models import CalendarEvent, ConferenceRoom
+from events.views.v1 import CalendarEventViewSet
+from events.visibility import sync_event_visibility
+
+FORMATS = {"default": {}, "columnar": {"format": "columnar"}}
+START = datetime(2030, 1, 7, 9, 0, tzinfo=timezone.utc)
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the payload size and response time of the event list formats "
+        "on generated events, which are rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--events", type=int, default=2000)
+        parser.add_argument("--participants", type=int, default=5)
+        parser.add_argument("--rooms", type=int, default=10)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, events, participants, rooms, repeat, **options):
+        with transaction.atomic():
+            owner = self.seed(events, participants, rooms)
+            for name, params in FORMATS.items():
+                size, elapsed = self.measure(owner, params, repeat)
+                self.stdout.write(
+                    f"{name:<10} {size / 1e6:6.2f} MB {elapsed * 1000:8.0f} ms"
+                )
+            transaction.set_rollback(True)
+
+    def seed(self, count, participants, rooms):
+        company_id = uuid.uuid4()
+        users = [
+            User.objects.create(
+                username=f"benchmark-{company_id}-{index}",
+                email=f"user{index}@{company_id}.example.com",
+                company_id=company_id,
+            )
+            for index in range(participants + 1)
+        ]
+        owner, colleagues = users[0], users[1:]
+        locations = ConferenceRoom.objects.bulk_create(
+            ConferenceRoom(
+                name=f"Room {index}", address=f"Floor {index}", manager=owner
+            )
+            for index in range(rooms)
+        )
+        events = CalendarEvent.objects.bulk_create(
+            CalendarEvent(
+                owner=owner,
+                event_name=f"Event {index}",
+                agenda=f"Agenda of event {index}",
+                start=START + timedelta(hours=index),
+                end=START + timedelta(hours=index, minutes=30),
+                location=locations[index % rooms] if rooms else None,
+            )
+            for index in range(count)
+        )
+        CalendarEvent.participants.through.objects.bulk_create(
+            CalendarEvent.participants.through(calendarevent=event, user=user)
+            for event in events
+            for user in colleagues
+        )
+        sync_event_visibility([event.id for event in events])
+        return owner
+
+    def measure(self, owner, params, repeat):
+        """
+        Return the size of the response and the median time taken to render
+        it, throttling left out.
+        """
+        view = CalendarEventViewSet.as_view({"get": "list"}, throttle_classes=[])
+        factory = APIRequestFactory()
+        timings = []
+        for _ in range(repeat):
+            request = factory.get("/api/v1/calendar-events/", params)
+            force_authenticate(request, owner)
+            started = time.perf_counter()
+            response = view(request)
+            response.render()
+            timings.append(time.perf_counter() - started)
+        return len(response.content), statistics.median(timings)
@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from events.models import CalendarEvent
+from events.visibility import find_visibility_drift, sync_event_visibility
+
+
+class Command(BaseCommand):
+    help = "Check the event visibility index against its source tables and rebuild it."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Only report drifted events, exit with an error if any are found.",
+        )
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help="Resync every event instead of only the drifted ones.",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--database", default="default")
+
+    def handle(self, *args, check, full, batch_size, database, **options):
+        if full and not check:
+            event_ids = CalendarEvent.objects.using(database).values_list(
+                "id", flat=True
+            )
+        else:
+            event_ids = list(find_visibility_drift(batch_size, using=database))
+
+        if check:
+            if event_ids:
+                raise CommandError(
+                    f"{len(event_ids)} event(s) have a drifted visibility index: "
+                    f"{', '.join(map(str, event_ids[:20]))}"
+                )
+            self.stdout.write(
+                self.style.SUCCESS("Event visibility index is consistent.")
+            )
+            return
+
+        event_ids = list(event_ids)
+        for offset in range(0, len(event_ids), batch_size):
+            sync_event_visibility(
+                event_ids[offset : offset + batch_size], using=database
+            )
+        self.stdout.write(
+            self.style.SUCCESS(f"Resynced visibility of {len(event_ids)} event(s).")
+        )
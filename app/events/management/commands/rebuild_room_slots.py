@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from events.models import RoomSlotMap
+from events.slots import compute_room_slots, decode, rebuild_room_slots
+
+
+class Command(BaseCommand):
+    help = "Regenerate the room slot bitmaps from the calendar events."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Only compare the bitmaps with a fresh computation.",
+        )
+        parser.add_argument("--database", default="default")
+
+    def handle(self, *args, check, database, **options):
+        if not check:
+            rows = rebuild_room_slots(using=database)
+            self.stdout.write(self.style.SUCCESS(f"Rebuilt {rows} room slot map(s)."))
+            return
+
+        expected = compute_room_slots(using=database)
+        stored = {
+            (room_id, day): decode(slots)
+            for room_id, day, slots in RoomSlotMap.objects.using(database).values_list(
+                "room_id", "day", "slots"
+            )
+        }
+        if drifted := sorted(expected.keys() ^ stored.keys()) + sorted(
+            key
+            for key in expected.keys() & stored.keys()
+            if expected[key] != stored[key]
+        ):
+            raise CommandError(
+                f"{len(drifted)} room slot map(s) drifted, e.g. "
+                + ", ".join(f"room {room_id} on {day}" for room_id, day in drifted[:10])
+            )
+        self.stdout.write(self.style.SUCCESS("Room slot maps are consistent."))
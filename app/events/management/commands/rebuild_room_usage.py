@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from events.models import RoomUsageDaily
+from events.usage import USAGE_COLUMNS, compute_room_usage, rebuild_room_usage
+
+
+class Command(BaseCommand):
+    help = "Regenerate the daily room usage rollup from the calendar events."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Only compare the rollup with a fresh computation.",
+        )
+        parser.add_argument("--database", default="default")
+
+    def handle(self, *args, check, database, **options):
+        if not check:
+            rows = rebuild_room_usage(using=database)
+            self.stdout.write(self.style.SUCCESS(f"Rebuilt {rows} room usage row(s)."))
+            return
+
+        expected = compute_room_usage(using=database)
+        stored = {
+            (room_id, day): tuple(values)
+            for room_id, day, *values in RoomUsageDaily.objects.using(database)
+            .exclude(booked_seconds=0, event_count=0)
+            .values_list("room_id", "day", *USAGE_COLUMNS)
+        }
+        if drifted := sorted(expected.keys() ^ stored.keys()) + sorted(
+            key
+            for key in expected.keys() & stored.keys()
+            if expected[key] != stored[key]
+        ):
+            raise CommandError(
+                f"{len(drifted)} room usage row(s) drifted, e.g. "
+                + ", ".join(f"room {room_id} on {day}" for room_id, day in drifted[:10])
+            )
+        self.stdout.write(self.style.SUCCESS("Room usage rollup is consistent."))
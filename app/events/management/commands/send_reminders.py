@@ -0,0 +1,25 @@
+import asyncio
+
+from django.core.management.base import BaseCommand, CommandError
+
+from events.reminders import ReminderWorker, get_reminder_backend
+from events.streams import get_broker
+
+
+class Command(BaseCommand):
+    help = "Send reminders for upcoming calendar events as they come due."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--database", default="default")
+
+    def handle(self, *args, database, **options):
+        if not get_broker().shared:
+            raise CommandError(
+                "Reminders follow event changes through STREAM_BROKER, which "
+                "must be shared between processes, e.g. events.streams.RedisBroker."
+            )
+        worker = ReminderWorker(get_reminder_backend(), using=database)
+        try:
+            asyncio.run(worker.serve())
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,88 @@
+# Generated by Django 5.1.3 on 2026-10-19 16:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_event_visibility(apps, schema_editor):
+    CalendarEvent = apps.get_model("events", "CalendarEvent")
+    EventVisibility = apps.get_model("events", "EventVisibility")
+    db_alias = schema_editor.connection.alias
+
+    rows = {}
+    events = CalendarEvent.objects.using(db_alias)
+    for event_id, start, owner_id, manager_id in events.values_list(
+        "id", "start", "owner_id", "location__manager_id"
+    ):
+        for user_id in (owner_id, manager_id):
+            if user_id:
+                rows[(user_id, event_id)] = start
+    for event_id, start, user_id in events.filter(
+        participants__isnull=False
+    ).values_list("id", "start", "participants"):
+        rows[(user_id, event_id)] = start
+
+    EventVisibility.objects.using(db_alias).bulk_create(
+        [
+            EventVisibility(user_id=user_id, event_id=event_id, start=start)
+            for (user_id, event_id), start in rows.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("events", "0003_alter_calendarevent_participants"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="EventVisibility",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("start", models.DateTimeField()),
+                (
+                    "event",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="visibility",
+                        to="events.calendarevent",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="visible_events",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["user", "start"], name="visibility_user_start_idx"
+                    )
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("user", "event"), name="unique_event_visibility"
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(backfill_event_visibility, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.1.3 on 2026-10-19 16:10
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("events", "0004_eventvisibility"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="calendarevent",
+            index=models.Index(fields=["start"], name="calendarevent_start_idx"),
+        ),
+    ]
@@ -0,0 +1,102 @@
+# Generated by Django 5.1.3 on 2026-10-19 16:16
+
+from collections import Counter
+from datetime import datetime, time, timedelta
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.utils import timezone
+
+# Frozen copies of the events.usage helpers as of this migration.
+USAGE_FIELDS = ("location_id", "start", "end")
+
+
+def split_by_day(start, end):
+    tz = timezone.get_default_timezone()
+    day = start.astimezone(tz).date()
+    while True:
+        day_end = datetime.combine(day + timedelta(days=1), time.min, tzinfo=tz)
+        yield day, (
+            min(end, day_end) - max(start, day_end - timedelta(days=1))
+        ).total_seconds()
+        if end <= day_end:
+            return
+        day += timedelta(days=1)
+
+
+def usage_of(location_id, start, end):
+    if not location_id or not start or not end or start >= end:
+        return {}
+    return {
+        (location_id, day): (int(seconds), 1)
+        for day, seconds in split_by_day(start, end)
+    }
+
+
+def backfill_room_usage(apps, schema_editor):
+    CalendarEvent = apps.get_model("events", "CalendarEvent")
+    RoomUsageDaily = apps.get_model("events", "RoomUsageDaily")
+    db_alias = schema_editor.connection.alias
+
+    seconds, counts = Counter(), Counter()
+    events = CalendarEvent.objects.using(db_alias).filter(location__isnull=False)
+    for values in events.values_list(*USAGE_FIELDS).iterator():
+        for key, (booked, count) in usage_of(*values).items():
+            seconds[key] += booked
+            counts[key] += count
+
+    RoomUsageDaily.objects.using(db_alias).bulk_create(
+        [
+            RoomUsageDaily(
+                room_id=room_id,
+                day=day,
+                booked_seconds=seconds[room_id, day],
+                event_count=counts[room_id, day],
+            )
+            for room_id, day in seconds
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("events", "0005_calendarevent_start_idx"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RoomUsageDaily",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("day", models.DateField()),
+                ("booked_seconds", models.BigIntegerField(default=0)),
+                ("event_count", models.IntegerField(default=0)),
+                (
+                    "room",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="daily_usage",
+                        to="events.conferenceroom",
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("room", "day"), name="unique_room_usage_day"
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(backfill_room_usage, migrations.RunPython.noop),
+    ]
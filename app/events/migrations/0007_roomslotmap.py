@@ -0,0 +1,98 @@
+# Generated by Django 5.1.3 on 2026-10-19 16:25
+
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.utils import timezone
+
+# Frozen copies of the events.slots helpers as of this migration.
+SLOT = timedelta(minutes=15)
+SLOT_MAP_BYTES = 16
+
+
+def encode(mask):
+    return mask.to_bytes(SLOT_MAP_BYTES, "big")
+
+
+def day_start(day):
+    return timezone.make_aware(
+        datetime.combine(day, time.min), timezone.get_default_timezone()
+    )
+
+
+def slot_masks(start, end):
+    if not start or not end or start >= end:
+        return {}
+    masks = {}
+    day = timezone.localtime(start, timezone.get_default_timezone()).date()
+    while (midnight := day_start(day)) < end:
+        first = max(start, midnight) - midnight
+        last = min(end, day_start(day + timedelta(days=1))) - midnight
+        first_slot, last_slot = first // SLOT, -(-last // SLOT)
+        masks[day] = (1 << last_slot) - (1 << first_slot)
+        day += timedelta(days=1)
+    return masks
+
+
+def backfill_room_slots(apps, schema_editor):
+    CalendarEvent = apps.get_model("events", "CalendarEvent")
+    RoomSlotMap = apps.get_model("events", "RoomSlotMap")
+    db_alias = schema_editor.connection.alias
+
+    masks = defaultdict(int)
+    events = CalendarEvent.objects.using(db_alias).filter(location__isnull=False)
+    for room_id, start, end in events.values_list("location_id", "start", "end"):
+        for day, mask in slot_masks(start, end).items():
+            masks[room_id, day] |= mask
+
+    RoomSlotMap.objects.using(db_alias).bulk_create(
+        [
+            RoomSlotMap(room_id=room_id, day=day, slots=encode(mask))
+            for (room_id, day), mask in masks.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("events", "0006_roomusagedaily"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RoomSlotMap",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("day", models.DateField()),
+                ("slots", models.BinaryField(max_length=16)),
+                (
+                    "room",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="slot_maps",
+                        to="events.conferenceroom",
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("room", "day"), name="unique_room_slot_day"
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(backfill_room_slots, migrations.RunPython.noop),
+    ]
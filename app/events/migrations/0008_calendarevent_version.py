@@ -0,0 +1,18 @@
+# Generated by Django 5.1.3 on 2026-10-19 16:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("events", "0007_roomslotmap"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="calendarevent",
+            name="version",
+            field=models.PositiveIntegerField(default=1),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.1.3 on 2026-10-19 17:09
+
+from collections import Counter
+
+from django.db import migrations, models
+from django.db.models import F
+from django.utils import timezone
+
+
+def backfill_events_started(apps, schema_editor):
+    CalendarEvent = apps.get_model("events", "CalendarEvent")
+    RoomUsageDaily = apps.get_model("events", "RoomUsageDaily")
+    db_alias = schema_editor.connection.alias
+
+    tz = timezone.get_default_timezone()
+    started = Counter()
+    events = CalendarEvent.objects.using(db_alias).filter(
+        location__isnull=False, start__lt=F("end")
+    )
+    for location_id, start in events.values_list("location_id", "start").iterator():
+        started[location_id, start.astimezone(tz).date()] += 1
+
+    for (room_id, day), count in started.items():
+        RoomUsageDaily.objects.using(db_alias).filter(room_id=room_id, day=day).update(
+            events_started=count
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("events", "0008_calendarevent_version"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="roomusagedaily",
+            name="events_started",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_events_started, migrations.RunPython.noop),
+    ]
@@ -31,3 +31,89 @@ class CalendarEvent(models.Model):
         blank=True,
         related_name="events",
     )
+    # Bumped on every change, compared against If-Match by the API.
+    version = models.PositiveIntegerField(default=1)
+
+    class Meta:
+        indexes = [models.Index(fields=["start"], name="calendarevent_start_idx")]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Kept so that rollups can be adjusted by what changed on save.
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+
+class EventVisibility(models.Model):
+    """
+    Fan-out-on-write index of the events each user is allowed to see.
+
+    One row exists for every (user, event) pair where the user is the owner,
+    a participant or the manager of the event's location. Rows are maintained
+    by the signal handlers in ``events.signals``.
+    """
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="visible_events",
+        db_index=False,
+    )
+    event = models.ForeignKey(
+        CalendarEvent, on_delete=models.CASCADE, related_name="visibility"
+    )
+    start = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "event"], name="unique_event_visibility"
+            )
+        ]
+        indexes = [
+            models.Index(fields=["user", "start"], name="visibility_user_start_idx")
+        ]
+
+
+class RoomUsageDaily(models.Model):
+    """
+    Booked time of a conference room per day (in ``settings.TIME_ZONE``),
+    maintained incrementally by the signal handlers in ``events.signals``.
+    """
+
+    room = models.ForeignKey(
+        ConferenceRoom, on_delete=models.CASCADE, related_name="daily_usage"
+    )
+    day = models.DateField()
+    booked_seconds = models.BigIntegerField(default=0)
+    event_count = models.IntegerField(default=0)
+    # Events starting on the day, to count multi-day events once per week.
+    events_started = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["room", "day"], name="unique_room_usage_day"
+            )
+        ]
+
+
+class RoomSlotMap(models.Model):
+    """
+    Occupied fifteen-minute slots of a conference room per day (in
+    ``settings.TIME_ZONE``) as a bitmap, bit ``n`` being set when slot ``n``
+    after midnight overlaps an event. Kept up to date by the signal handlers
+    in ``events.signals``, see ``events.slots``.
+    """
+
+    room = models.ForeignKey(
+        ConferenceRoom, on_delete=models.CASCADE, related_name="slot_maps"
+    )
+    day = models.DateField()
+    slots = models.BinaryField(max_length=16)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["room", "day"], name="unique_room_slot_day")
+        ]
@@ -0,0 +1,14 @@
+from events.serializers.v1 import CalendarEventSerializer
+from webhooks.outbox import enqueue
+
+
+def enqueue_event_change(company_id, topic, event, using=None):
+    """
+    Record an ``event.*`` webhook notification for ``event``. Call it inside
+    the transaction that makes the change, deleted events carry only their id.
+    """
+    if topic == "event.deleted":
+        payload = {"id": event.pk}
+    else:
+        payload = CalendarEventSerializer(event).data
+    return enqueue(company_id, topic, payload, using=using)
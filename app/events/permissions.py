@@ -0,0 +1,10 @@
+from rest_framework.permissions import SAFE_METHODS, BasePermission
+
+
+class IsOwnerOrReadOnly(BasePermission):
+    """
+    Everyone who can see an event may read it, only its owner may change it.
+    """
+
+    def has_object_permission(self, request, view, obj):
+        return request.method in SAFE_METHODS or obj.owner_id == request.user.id
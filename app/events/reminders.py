@@ -0,0 +1,296 @@
+"""
+Reminders sent ``REMINDER_LEAD`` seconds before events start.
+
+The ``send_reminders`` worker keeps the reminders of the next
+``REMINDER_HORIZON`` seconds in a hierarchical timing wheel. The window is
+loaded with one range query on the indexed ``start`` column and kept current
+from the change notifications of ``events.streams``, so a tick only looks at
+the reminders that are due in it. The worker runs in its own process and
+therefore needs a broker shared with the processes making the changes. Due
+reminders are still checked against their events before they are sent.
+"""
+
+import asyncio
+import math
+import sys
+from collections import defaultdict, namedtuple
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from events.models import CalendarEvent
+from events.streams import hub, schedule_topic
+
+Reminder = namedtuple("Reminder", ["event_id", "event_name", "start", "recipients"])
+
+
+class TimingWheel:
+    """
+    Hierarchical timing wheel of ``levels`` wheels with ``slots`` slots each,
+    a slot of level ``n`` covering ``slots ** n`` ticks. Scheduling and
+    cancelling are O(1), and so is advancing by a tick, entries being moved
+    down a level once, when the wheel below wraps around to their slot.
+    """
+
+    def __init__(self, now, slots=64, levels=4):
+        self.slots = slots
+        self.levels = levels
+        self.current = now
+        self._wheels = [[{} for _ in range(slots)] for _ in range(levels)]
+        # Entries beyond the span of the top wheel, sorted in when it wraps.
+        self._overflow = {}
+        self._buckets = {}
+
+    def __len__(self):
+        return len(self._buckets)
+
+    def __contains__(self, key):
+        return key in self._buckets
+
+    def items(self):
+        for key, bucket in list(self._buckets.items()):
+            yield key, bucket[key][1]
+
+    def schedule(self, key, deadline, item):
+        """
+        Fire ``item`` at tick ``deadline``, or on the next tick if that has
+        passed, replacing whatever was scheduled under ``key``.
+        """
+        self.cancel(key)
+        self._insert(key, max(deadline, self.current + 1), item)
+
+    def cancel(self, key):
+        if (bucket := self._buckets.pop(key, None)) is not None:
+            del bucket[key]
+
+    def advance(self, now):
+        """
+        Move the wheel forward to tick ``now`` and return the items due by
+        then, in order.
+        """
+        due = []
+        while self.current < now:
+            self.current += 1
+            tick = self.current
+            if tick % self.slots**self.levels == 0:
+                self._cascade(self._overflow)
+            for level in range(self.levels - 1, 0, -1):
+                span = self.slots**level
+                if tick % span == 0:
+                    self._cascade(self._wheels[level][tick // span % self.slots])
+            bucket = self._wheels[0][tick % self.slots]
+            for key, (_, item) in bucket.items():
+                del self._buckets[key]
+                due.append(item)
+            bucket.clear()
+        return due
+
+    def _insert(self, key, deadline, item):
+        bucket = self._overflow
+        for level in range(self.levels):
+            # The lowest wheel whose current revolution reaches the deadline.
+            span = self.slots ** (level + 1)
+            if deadline // span == self.current // span:
+                bucket = self._wheels[level][
+                    deadline // (span // self.slots) % self.slots
+                ]
+                break
+        bucket[key] = (deadline, item)
+        self._buckets[key] = bucket
+
+    def _cascade(self, bucket):
+        entries = list(bucket.items())
+        bucket.clear()
+        for key, (deadline, item) in entries:
+            self._insert(key, deadline, item)
+
+
+class ConsoleReminderBackend:
+    """
+    Write reminders to standard output, a stand-in for real delivery.
+    """
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+
+    def send(self, reminders):
+        for reminder in reminders:
+            self.stream.write(
+                f"Reminder: {reminder.event_name!r} starts at "
+                f"{reminder.start.isoformat()}, "
+                f"to {', '.join(sorted(reminder.recipients))}\n"
+            )
+        self.stream.flush()
+
+
+def get_reminder_backend():
+    return import_string(settings.REMINDER_BACKEND)()
+
+
+class ReminderWorker:
+    """
+    Fire reminders for the events of one database. ``step`` is called about
+    once a tick with the ids of the events changed since the last call.
+    """
+
+    def __init__(self, backend, using=DEFAULT_DB_ALIAS, clock=timezone.now):
+        self.backend = backend
+        self.using = using
+        self.clock = clock
+        self.tick = settings.REMINDER_TICK
+        self.lead = timedelta(seconds=settings.REMINDER_LEAD)
+        self.horizon = timedelta(seconds=settings.REMINDER_HORIZON)
+        self.wheel = None
+        self.loaded_until = None
+        # Start of the events already reminded of, so that edits within the
+        # lead time do not send their reminder twice.
+        self.sent = {}
+
+    def to_tick(self, moment):
+        return math.ceil(moment.timestamp() / self.tick)
+
+    def load_reminders(self, **filters):
+        """
+        Return ``{event_id: Reminder}`` for the events matching ``filters``,
+        addressed to their owner and participants.
+        """
+        events = (
+            CalendarEvent.objects.using(self.using)
+            .filter(**filters)
+            .values_list("id", "event_name", "start", "owner__email")
+        )
+        rows = {event_id: row for event_id, *row in events}
+        recipients = defaultdict(set)
+        for event_id, (_, _, email) in rows.items():
+            recipients[event_id].add(email)
+        participants = CalendarEvent.participants.through.objects.using(self.using)
+        for event_id, email in participants.filter(
+            calendarevent_id__in=list(rows)
+        ).values_list("calendarevent_id", "user__email"):
+            recipients[event_id].add(email)
+        return {
+            event_id: Reminder(event_id, name, start, frozenset(recipients[event_id]))
+            for event_id, (name, start, _) in rows.items()
+        }
+
+    def schedule(self, reminder):
+        self.wheel.schedule(
+            reminder.event_id, self.to_tick(reminder.start - self.lead), reminder
+        )
+
+    def refresh(self, now):
+        """
+        Reload the reminders due by the end of the horizon, dropping the ones
+        whose events moved away or were deleted. Events that have come within
+        the lead time since the last reload and were not reminded of yet are
+        reminded of on the next tick.
+        """
+        self.loaded_until = now + self.lead + self.horizon
+        reminders = self.load_reminders(start__gt=now, start__lte=self.loaded_until)
+        if self.wheel is None:
+            self.wheel = TimingWheel(self.to_tick(now))
+            # Events already within the lead time at start-up are skipped.
+            self.sent.update(
+                (event_id, reminder.start)
+                for event_id, reminder in reminders.items()
+                if reminder.start <= now + self.lead
+            )
+        for event_id, reminder in self.wheel.items():
+            if reminder.start > now and event_id not in reminders:
+                self.wheel.cancel(event_id)
+        for event_id, reminder in reminders.items():
+            if self.sent.get(event_id) != reminder.start:
+                self.schedule(reminder)
+        self.sent = {
+            event_id: start for event_id, start in self.sent.items() if start > now
+        }
+
+    def apply_changes(self, event_ids, now):
+        """
+        Reschedule the reminders of changed events. Events moved within the
+        lead time are reminded of on the next tick.
+        """
+        reminders = self.load_reminders(
+            id__in=event_ids, start__gt=now, start__lte=self.loaded_until
+        )
+        for event_id in event_ids:
+            reminder = reminders.get(event_id)
+            if reminder and self.sent.get(event_id) != reminder.start:
+                self.schedule(reminder)
+            else:
+                self.wheel.cancel(event_id)
+
+    def recheck(self, due, now):
+        """
+        Return the ``due`` reminders whose events still start as scheduled,
+        rescheduling the ones that moved, with one query.
+        """
+        starts = dict(
+            CalendarEvent.objects.using(self.using)
+            .filter(id__in=[reminder.event_id for reminder in due])
+            .values_list("id", "start")
+        )
+        if moved := {
+            reminder.event_id
+            for reminder in due
+            if reminder.event_id in starts
+            and starts[reminder.event_id] != reminder.start
+        }:
+            self.apply_changes(moved, now)
+        return [
+            reminder
+            for reminder in due
+            if starts.get(reminder.event_id) == reminder.start
+        ]
+
+    def step(self, changed_ids=(), now=None):
+        """
+        Apply changes, reload the window once half of it has passed and send
+        the reminders that are due. Returns the reminders sent.
+        """
+        now = now or self.clock()
+        if (
+            self.wheel is None
+            or now + self.lead + self.horizon / 2 >= self.loaded_until
+        ):
+            self.refresh(now)
+        if changed_ids:
+            self.apply_changes(set(changed_ids), now)
+        if due := self.wheel.advance(self.to_tick(now)):
+            due = self.recheck(due, now)
+        if due:
+            self.backend.send(due)
+            self.sent.update((reminder.event_id, reminder.start) for reminder in due)
+        return due
+
+    async def serve(self):
+        subscription = hub.subscribe(schedule_topic(self.using))
+        step = sync_to_async(self.step)
+        try:
+            while True:
+                changed_ids = await next_changes(subscription, self.tick)
+                if subscription.lagged:
+                    # Changes were dropped, so reload the whole window.
+                    subscription.lagged = False
+                    self.loaded_until = self.clock()
+                await step(changed_ids)
+        finally:
+            hub.unsubscribe(subscription)
+
+
+async def next_changes(subscription, timeout):
+    """
+    Wait up to ``timeout`` seconds for change notifications and return the
+    ids of the changed events.
+    """
+    try:
+        messages = [await asyncio.wait_for(subscription.queue.get(), timeout)]
+    except TimeoutError:
+        return set()
+    while not subscription.queue.empty():
+        messages.append(subscription.queue.get_nowait())
+    return {message["id"] for message in messages}
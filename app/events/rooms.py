@@ -0,0 +1,64 @@
+import time
+from collections import namedtuple
+
+from django.conf import settings
+
+from api.cache import bump_cache_version, get_cache_version
+from events.models import ConferenceRoom
+
+RoomEntry = namedtuple("RoomEntry", ["id", "name", "address", "manager"])
+
+
+class RoomDirectory:
+    """
+    Process-local directory of each company's conference rooms, keyed by id.
+
+    A company's rooms are loaded on first use and reloaded when its version
+    key is bumped by ``invalidate`` or after ``settings.ROOM_DIRECTORY_TTL``.
+    """
+
+    def __init__(self):
+        self._companies = {}
+
+    def clear(self):
+        self._companies.clear()
+
+    def peek(self, company_id):
+        """
+        Return the company's rooms if they are loaded and current, else
+        ``None`` without loading them.
+        """
+        key = f"rooms:{company_id}"
+        cached = self._companies.get(key)
+        if (
+            cached
+            and time.monotonic() - cached[1] < settings.ROOM_DIRECTORY_TTL
+            and cached[0] == get_cache_version(key)
+        ):
+            return cached[2]
+        return None
+
+    def get(self, company_id):
+        if (rooms := self.peek(company_id)) is not None:
+            return rooms
+
+        key = f"rooms:{company_id}"
+        version = get_cache_version(key)
+        rooms = {
+            room.id: room
+            for room in map(
+                RoomEntry._make,
+                ConferenceRoom.objects.filter(manager__company_id=company_id)
+                .order_by("id")
+                .values_list("id", "name", "address", "manager_id"),
+            )
+        }
+        self._companies[key] = (version, time.monotonic(), rooms)
+        return rooms
+
+    def invalidate(self, company_id):
+        bump_cache_version(f"rooms:{company_id}")
+        self._companies.pop(f"rooms:{company_id}", None)
+
+
+room_directory = RoomDirectory()
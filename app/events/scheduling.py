@@ -0,0 +1,143 @@
+from datetime import datetime, time, timedelta
+
+import pytz
+
+
+def merge_intervals(intervals):
+    """
+    Merge overlapping or touching ``(start, end)`` intervals into a sorted,
+    disjoint list.
+    """
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def intersect_intervals(left, right):
+    """
+    Intersect two sorted, disjoint interval lists.
+    """
+    result = []
+    i = j = 0
+    while i < len(left) and j < len(right):
+        start = max(left[i][0], right[j][0])
+        end = min(left[i][1], right[j][1])
+        if start < end:
+            result.append((start, end))
+        if left[i][1] < right[j][1]:
+            i += 1
+        else:
+            j += 1
+    return result
+
+
+def subtract_intervals(intervals, busy):
+    """
+    Remove the sorted, disjoint ``busy`` intervals from the sorted, disjoint
+    ``intervals``.
+    """
+    result = []
+    j = 0
+    for start, end in intervals:
+        while j < len(busy) and busy[j][1] <= start:
+            j += 1
+        k = j
+        while k < len(busy) and busy[k][0] < end:
+            if busy[k][0] > start:
+                result.append((start, busy[k][0]))
+            start = max(start, busy[k][1])
+            k += 1
+        if start < end:
+            result.append((start, end))
+    return result
+
+
+def working_intervals(tz, window_start, window_end, working_hours, working_days):
+    """
+    Return the working hours of ``tz`` that fall into the window, as UTC
+    intervals.
+    """
+    tz = pytz.timezone(tz)
+    start_hour, end_hour = working_hours
+    day = window_start.astimezone(tz).date()
+    last_day = window_end.astimezone(tz).date()
+    intervals = []
+    while day <= last_day:
+        if day.weekday() in working_days:
+            start = tz.localize(datetime.combine(day, time(start_hour)))
+            end = tz.localize(datetime.combine(day, time(end_hour)))
+            intervals.append((start.astimezone(pytz.utc), end.astimezone(pytz.utc)))
+        day += timedelta(days=1)
+    return intersect_intervals(intervals, [(window_start, window_end)])
+
+
+def align(value, step):
+    """
+    Round ``value`` up to the next multiple of ``step`` since the epoch.
+    """
+    epoch = datetime(1970, 1, 1, tzinfo=pytz.utc)
+    remainder = (value - epoch) % step
+    return value + (step - remainder) % step
+
+
+def fit_slots(free, duration, step):
+    """
+    Yield consecutive ``(start, end)`` slots of ``duration`` starting on the
+    ``step`` grid inside the free intervals.
+    """
+    for start, end in free:
+        slot_start = align(start, step)
+        while slot_start + duration <= end:
+            yield slot_start, slot_start + duration
+            slot_start = align(slot_start + duration, step)
+
+
+def find_free_slots(
+    window,
+    duration,
+    participant_timezones,
+    participant_busy,
+    room_busy=None,
+    *,
+    limit,
+    step,
+    working_hours,
+    working_days,
+):
+    """
+    Return up to ``limit`` earliest ``(start, end, room_id)`` slots in which
+    every participant is within working hours and free and, when rooms are
+    given, at least one of them is free.
+    """
+    window_start, window_end = window
+    available = [window]
+    for tz in participant_timezones:
+        available = intersect_intervals(
+            available,
+            working_intervals(
+                tz, window_start, window_end, working_hours, working_days
+            ),
+        )
+    free = subtract_intervals(available, merge_intervals(participant_busy))
+
+    if room_busy is None:
+        candidates = (
+            (start, end, None) for start, end in fit_slots(free, duration, step)
+        )
+    else:
+        candidates = (
+            (start, end, room_id)
+            for room_id, busy in room_busy.items()
+            for start, end in fit_slots(
+                subtract_intervals(free, merge_intervals(busy)), duration, step
+            )
+        )
+
+    slots = {}
+    for start, end, room_id in sorted(candidates, key=lambda slot: slot[:2]):
+        slots.setdefault(start, (start, end, room_id))
+    return list(slots.values())[:limit]
@@ -1,14 +1,31 @@
 from datetime import timedelta
 
+from django.db import models, router, transaction
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
 
 from api.utils import TimeZoneDateTimeField
-from accounts.models import User
+from accounts.resolver import email_resolver
 from events.models import ConferenceRoom, CalendarEvent
-
+from events.rooms import RoomEntry, room_directory
 
 MAX_MEETING_DURATION_HOURS = 8
+MAX_SUGGEST_WINDOW_DAYS = 14
+MAX_SUGGESTIONS = 20
+SLOT_MINUTES = 15
+
+
+def resolve_participants(company_id, emails):
+    """
+    Return the ids of the company's users with the given emails, rejecting
+    the whole list if any of them is unknown.
+    """
+    resolved = email_resolver.resolve_many(company_id, emails)
+    if unknown := [email for email in dict.fromkeys(emails) if email not in resolved]:
+        raise ValidationError(
+            f"No users of your company with these emails: {', '.join(unknown)}."
+        )
+    return list(dict.fromkeys(resolved[email] for email in emails))
 
 
 class ConferenceRoomSerializer(serializers.ModelSerializer):
@@ -17,6 +34,36 @@ class ConferenceRoomSerializer(serializers.ModelSerializer):
         fields = ["id", "name", "address", "manager"]
 
 
+class CalendarEventListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        events = list(data.all() if isinstance(data, models.Manager) else data)
+        rooms = self.context.get("rooms", {})
+        # Rooms neither joined nor in the company's directory are loaded in a
+        # single query.
+        if "location" in self.child.fields and (
+            missing := {
+                event.location_id
+                for event in events
+                if event.location_id
+                and event.location_id not in rooms
+                and not CalendarEvent.location.is_cached(event)
+            }
+        ):
+            self.context["rooms"] = {
+                **rooms,
+                **{
+                    room.id: room
+                    for room in map(
+                        RoomEntry._make,
+                        ConferenceRoom.objects.filter(id__in=missing).values_list(
+                            "id", "name", "address", "manager_id"
+                        ),
+                    )
+                },
+            }
+        return super().to_representation(events)
+
+
 class CalendarEventSerializer(serializers.ModelSerializer):
     owner = serializers.ReadOnlyField(source="owner.email")
     participants = serializers.ListSerializer(child=serializers.EmailField())
@@ -25,6 +72,7 @@ class CalendarEventSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = CalendarEvent
+        list_serializer_class = CalendarEventListSerializer
         fields = [
             "id",
             "owner",
@@ -34,14 +82,44 @@ class CalendarEventSerializer(serializers.ModelSerializer):
             "end",
             "location",
             "participants",
+            "version",
         ]
+        read_only_fields = ["version"]
+
+    def get_fields(self):
+        fields = super().get_fields()
+        # Sparse fieldsets requested through ``?fields=``.
+        if (requested := self.context.get("fields")) is not None:
+            fields = {
+                name: field for name, field in fields.items() if name in requested
+            }
+        # Participants sideloaded through ``?include=participants`` are
+        # serialized as user ids.
+        if "participants" in fields and "participant_ids" in self.context:
+            fields["participants"] = serializers.SerializerMethodField()
+        return fields
+
+    def get_participants(self, instance):
+        return self.context["participant_ids"].get(instance.id, [])
 
     def to_representation(self, instance):
         data = super().to_representation(instance)
-        data["location"] = instance.location.address if instance.location else None
-        data["participants"] = [p.email for p in instance.participants.all()]
+        if "location" in data:
+            if room := self.context.get("rooms", {}).get(instance.location_id):
+                data["location"] = room.address
+            else:
+                data["location"] = (
+                    instance.location.address if instance.location else None
+                )
+        if "participants" in data and "participant_ids" not in self.context:
+            data["participants"] = [
+                p.email for p in instance.participants.all() if p.is_active
+            ]
         return data
 
+    def validate_participants(self, emails):
+        return resolve_participants(self.context["request"].user.company_id, emails)
+
     def validate(self, data):
         errors = {}
         errors.update(self.validate_time(data))
@@ -52,8 +130,8 @@ class CalendarEventSerializer(serializers.ModelSerializer):
         return data
 
     def validate_time(self, data):
-        start = data.get("start")
-        end = data.get("end")
+        start = data.get("start", getattr(self.instance, "start", None))
+        end = data.get("end", getattr(self.instance, "end", None))
 
         if start and end:
             if start >= end:
@@ -63,9 +141,68 @@ class CalendarEventSerializer(serializers.ModelSerializer):
         return {}
 
     def create(self, validated_data):
-        validated_data["owner"] = self.context["request"].user
-        validated_data["participants"] = User.objects.filter(
-            email__in=validated_data["participants"],
-            company_id=self.context["request"].user.company_id,
-        )
-        return super().create(validated_data)
+        user = self.context["request"].user
+        validated_data["owner_id"] = user.id
+        participant_ids = validated_data.pop("participants")
+        with transaction.atomic(using=router.db_for_write(CalendarEvent)):
+            instance = super().create(validated_data)
+            instance.participants.set(participant_ids)
+        return instance
+
+    def update(self, instance, validated_data):
+        participant_ids = validated_data.pop("participants", None)
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+        instance.save(update_fields=[*validated_data, "version"])
+
+        if participant_ids is not None:
+            # Only the through rows that changed are touched.
+            current = {participant.id for participant in instance.participants.all()}
+            if removed := current - set(participant_ids):
+                instance.participants.remove(*removed)
+            if added := set(participant_ids) - current:
+                instance.participants.add(*added)
+        return instance
+
+
+class SuggestTimesSerializer(serializers.Serializer):
+    participants = serializers.ListField(child=serializers.EmailField(), min_length=1)
+    duration = serializers.IntegerField(
+        min_value=SLOT_MINUTES, max_value=MAX_MEETING_DURATION_HOURS * 60
+    )
+    rooms = serializers.ListField(child=serializers.IntegerField(), required=False)
+    start = TimeZoneDateTimeField()
+    end = TimeZoneDateTimeField()
+    limit = serializers.IntegerField(min_value=1, max_value=MAX_SUGGESTIONS, default=5)
+
+    def validate_participants(self, emails):
+        return resolve_participants(self.context["request"].user.company_id, emails)
+
+    def validate_rooms(self, room_ids):
+        rooms = room_directory.get(self.context["request"].user.company_id)
+        if unknown := [room_id for room_id in room_ids if room_id not in rooms]:
+            raise ValidationError(
+                f"No conference rooms of your company with these ids: "
+                f"{', '.join(map(str, unknown))}."
+            )
+        return list(dict.fromkeys(room_ids))
+
+    def validate(self, data):
+        if data["start"] >= data["end"]:
+            raise ValidationError(
+                {"time": "The start time must be earlier than the end time."}
+            )
+        if data["end"] - data["start"] > timedelta(days=MAX_SUGGEST_WINDOW_DAYS):
+            raise ValidationError(
+                {
+                    "time": f"The search window cannot be longer than "
+                    f"{MAX_SUGGEST_WINDOW_DAYS} days."
+                }
+            )
+        return data
+
+
+class SuggestedSlotSerializer(serializers.Serializer):
+    start = TimeZoneDateTimeField()
+    end = TimeZoneDateTimeField()
+    location = serializers.IntegerField(allow_null=True)
@@ -0,0 +1,35 @@
+from collections import defaultdict
+
+from events.models import CalendarEvent
+
+
+def sideload_participants(event_ids):
+    """
+    Return ``({event_id: [user_id]}, {user_id: user})`` for the active
+    participants of the given events, read in a single query, each user
+    listed once however many events they take part in.
+    """
+    participant_ids = defaultdict(list)
+    users = {}
+    rows = (
+        CalendarEvent.participants.through.objects.filter(
+            calendarevent_id__in=event_ids, user__is_active=True
+        )
+        .order_by("user_id")
+        .values_list(
+            "calendarevent_id",
+            "user_id",
+            "user__email",
+            "user__username",
+            "user__first_name",
+            "user__last_name",
+        )
+    )
+    for event_id, user_id, email, username, first_name, last_name in rows:
+        participant_ids[event_id].append(user_id)
+        if user_id not in users:
+            users[user_id] = {
+                "email": email,
+                "name": f"{first_name} {last_name}".strip() or username,
+            }
+    return dict(participant_ids), users
@@ -0,0 +1,180 @@
+from django.conf import settings
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save,
+)
+from django.dispatch import receiver
+
+from events.models import CalendarEvent, ConferenceRoom, EventVisibility
+from events.rooms import room_directory
+from events.slots import refresh_room_slots, slot_days
+from events.streams import publish_event_change
+from events.usage import USAGE_FIELDS, apply_usage_change
+from events.visibility import invalidate_visible_events, sync_event_visibility
+
+
+def sync_and_notify(event_ids, using=None):
+    for event_id, user_ids in sync_event_visibility(event_ids, using=using).items():
+        publish_event_change(event_id, user_ids, using=using)
+
+
+@receiver(post_save, sender=CalendarEvent)
+def sync_visibility_on_event_save(sender, instance, raw=False, using=None, **kwargs):
+    if not raw:
+        sync_and_notify([instance.pk], using=using)
+
+
+def loaded_usage(instance):
+    loaded = instance.__dict__.get("_loaded_values", {})
+    if all(field in loaded for field in USAGE_FIELDS):
+        return tuple(loaded[field] for field in USAGE_FIELDS)
+    return None
+
+
+@receiver(pre_save, sender=CalendarEvent)
+def collect_previous_usage(sender, instance, raw=False, using=None, **kwargs):
+    if raw or instance._state.adding:
+        instance._previous_usage = None
+    elif (previous := loaded_usage(instance)) is not None:
+        instance._previous_usage = previous
+    else:
+        instance._previous_usage = (
+            CalendarEvent.objects.using(using)
+            .filter(pk=instance.pk)
+            .values_list(*USAGE_FIELDS)
+            .first()
+        )
+
+
+@receiver(post_save, sender=CalendarEvent)
+def notify_rooms_on_event_save(sender, instance, raw=False, using=None, **kwargs):
+    if not raw:
+        previous = instance.__dict__.get("_previous_usage") or (None,)
+        room_ids = {previous[0], instance.location_id}
+        publish_event_change(instance.pk, room_ids=room_ids, using=using)
+
+
+@receiver(post_save, sender=CalendarEvent)
+def update_room_rollups_on_event_save(
+    sender, instance, raw=False, using=None, **kwargs
+):
+    if raw:
+        return
+    current = tuple(getattr(instance, field) for field in USAGE_FIELDS)
+    previous = instance.__dict__.pop("_previous_usage", None)
+    if previous != current:
+        apply_usage_change(previous, current, using=using)
+        refresh_room_slots(
+            slot_days(*(previous or (None,) * 3)) | slot_days(*current), using=using
+        )
+    instance._loaded_values = {
+        **instance.__dict__.get("_loaded_values", {}),
+        **dict(zip(USAGE_FIELDS, current)),
+    }
+
+
+@receiver(post_delete, sender=CalendarEvent)
+def update_room_rollups_on_event_delete(sender, instance, using=None, **kwargs):
+    previous = loaded_usage(instance) or tuple(
+        getattr(instance, field) for field in USAGE_FIELDS
+    )
+    apply_usage_change(previous, None, using=using)
+    refresh_room_slots(slot_days(*previous), using=using)
+
+
+@receiver(pre_delete, sender=CalendarEvent)
+def collect_visible_users(sender, instance, using=None, **kwargs):
+    instance._visible_user_ids = list(
+        EventVisibility.objects.using(using)
+        .filter(event_id=instance.pk)
+        .values_list("user_id", flat=True)
+    )
+
+
+@receiver(post_delete, sender=CalendarEvent)
+def notify_on_event_delete(sender, instance, using=None, **kwargs):
+    publish_event_change(
+        instance.pk,
+        instance.__dict__.get("_visible_user_ids", []),
+        [instance.location_id],
+        deleted=True,
+        using=using,
+    )
+
+
+@receiver(post_delete, sender=CalendarEvent)
+def invalidate_visibility_on_event_delete(sender, instance, **kwargs):
+    # Visibility rows go with the event through the cascade.
+    invalidate_visible_events(instance.__dict__.pop("_visible_user_ids", []))
+
+
+@receiver(m2m_changed, sender=CalendarEvent.participants.through)
+def sync_visibility_on_participants_change(
+    sender, instance, action, reverse, pk_set, using=None, **kwargs
+):
+    if action == "pre_clear" and reverse:
+        instance._cleared_event_ids = list(
+            instance.participating_events.values_list("id", flat=True)
+        )
+    elif action in ("post_add", "post_remove"):
+        sync_and_notify(pk_set if reverse else [instance.pk], using=using)
+    elif action == "post_clear":
+        event_ids = instance.__dict__.pop("_cleared_event_ids", [instance.pk])
+        sync_and_notify(event_ids, using=using)
+
+
+@receiver(pre_save, sender=ConferenceRoom)
+def collect_previous_manager(sender, instance, raw=False, using=None, **kwargs):
+    if instance.pk and not raw:
+        previous = (
+            ConferenceRoom.objects.using(using)
+            .filter(pk=instance.pk)
+            .values_list("manager_id", "manager__company_id")
+            .first()
+        )
+        if previous:
+            instance._previous_manager_id = previous[0]
+            instance._previous_company_ids = {previous[1]} - {None}
+
+
+@receiver(post_save, sender=ConferenceRoom)
+def invalidate_room_directory_on_room_save(sender, instance, **kwargs):
+    company_ids = instance.__dict__.pop("_previous_company_ids", set())
+    if instance.manager_id:
+        company_ids.add(instance.manager.company_id)
+    for company_id in company_ids:
+        room_directory.invalidate(company_id)
+
+
+@receiver(post_save, sender=ConferenceRoom)
+def sync_visibility_on_room_save(
+    sender, instance, created=False, raw=False, using=None, **kwargs
+):
+    # Only the manager of a room affects who sees its events.
+    previous_manager_id = instance.__dict__.pop("_previous_manager_id", None)
+    if not raw and not created and previous_manager_id != instance.manager_id:
+        event_ids = instance.events.using(using).values_list("id", flat=True)
+        sync_and_notify(event_ids, using=using)
+
+
+@receiver(pre_delete, sender=ConferenceRoom)
+def collect_room_events(sender, instance, using=None, **kwargs):
+    instance._event_ids = list(
+        instance.events.using(using).values_list("id", flat=True)
+    )
+
+
+@receiver(post_delete, sender=ConferenceRoom)
+def sync_visibility_on_room_delete(sender, instance, using=None, **kwargs):
+    sync_and_notify(instance.__dict__.pop("_event_ids", []), using=using)
+    if instance.manager_id:
+        room_directory.invalidate(instance.manager.company_id)
+
+
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def invalidate_room_directory_on_manager_delete(sender, instance, **kwargs):
+    # Rooms of a deleted manager drop out of the company's directory.
+    room_directory.invalidate(instance.company_id)
@@ -0,0 +1,140 @@
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from functools import reduce
+from operator import or_
+
+from django.db import transaction
+from django.utils import timezone
+
+from events.models import CalendarEvent, RoomSlotMap
+
+SLOT = timedelta(minutes=15)
+# 96 slots a day, 100 on the day clocks go back.
+SLOT_MAP_BYTES = 16
+
+
+def encode(mask):
+    return mask.to_bytes(SLOT_MAP_BYTES, "big")
+
+
+def decode(slots):
+    return int.from_bytes(slots, "big")
+
+
+def day_start(day):
+    return timezone.make_aware(
+        datetime.combine(day, time.min), timezone.get_default_timezone()
+    )
+
+
+def slot_masks(start, end):
+    """
+    Return ``{day: mask}`` of the slots in the default timezone that the
+    interval ``[start, end)`` overlaps.
+    """
+    if not start or not end or start >= end:
+        return {}
+    masks = {}
+    day = timezone.localtime(start, timezone.get_default_timezone()).date()
+    while (midnight := day_start(day)) < end:
+        first = max(start, midnight) - midnight
+        last = min(end, day_start(day + timedelta(days=1))) - midnight
+        # Partially covered slots count as occupied.
+        first_slot, last_slot = first // SLOT, -(-last // SLOT)
+        masks[day] = (1 << last_slot) - (1 << first_slot)
+        day += timedelta(days=1)
+    return masks
+
+
+def slot_days(location_id, start, end):
+    """
+    Return the ``(room_id, day)`` bitmaps touched by one event.
+    """
+    if not location_id:
+        return set()
+    return {(location_id, day) for day in slot_masks(start, end)}
+
+
+def refresh_room_slots(keys, using=None):
+    """
+    Recompute the bitmaps of the given ``(room_id, day)`` pairs from the
+    events of those rooms, one range query per pair.
+    """
+    with transaction.atomic(using=using):
+        for room_id, day in sorted(keys):
+            events = CalendarEvent.objects.using(using).filter(
+                location_id=room_id,
+                start__lt=day_start(day + timedelta(days=1)),
+                end__gt=day_start(day),
+            )
+            mask = reduce(
+                or_,
+                (
+                    slot_masks(start, end).get(day, 0)
+                    for start, end in events.values_list("start", "end")
+                ),
+                0,
+            )
+            rows = RoomSlotMap.objects.using(using).filter(room_id=room_id, day=day)
+            if not mask:
+                rows.delete()
+            elif not rows.update(slots=encode(mask)):
+                RoomSlotMap.objects.using(using).create(
+                    room_id=room_id, day=day, slots=encode(mask)
+                )
+
+
+def compute_room_slots(using=None):
+    """
+    Compute every bitmap from scratch, as ``{(room_id, day): mask}``.
+    """
+    masks = defaultdict(int)
+    events = (
+        CalendarEvent.objects.using(using)
+        .filter(location__isnull=False)
+        .values_list("location_id", "start", "end")
+    )
+    for room_id, start, end in events.iterator(chunk_size=2000):
+        for day, mask in slot_masks(start, end).items():
+            masks[room_id, day] |= mask
+    return dict(masks)
+
+
+def rebuild_room_slots(using=None):
+    masks = compute_room_slots(using)
+    with transaction.atomic(using=using):
+        RoomSlotMap.objects.using(using).all().delete()
+        RoomSlotMap.objects.using(using).bulk_create(
+            [
+                RoomSlotMap(room_id=room_id, day=day, slots=encode(mask))
+                for (room_id, day), mask in sorted(masks.items())
+            ],
+            batch_size=1000,
+        )
+    return len(masks)
+
+
+def busy_rooms(room_ids, start, end, exclude_event_id=None, using=None):
+    """
+    Return the ids of the given rooms booked at some point of ``[start,
+    end)``. Rooms whose bitmaps show no overlap are free without looking at
+    their events; the rest are confirmed with one range query, as bitmaps
+    round events out to whole slots.
+    """
+    wanted = slot_masks(start, end)
+    candidates = {
+        room_id
+        for room_id, day, slots in RoomSlotMap.objects.using(using)
+        .filter(room_id__in=room_ids, day__in=wanted)
+        .values_list("room_id", "day", "slots")
+        if decode(slots) & wanted[day]
+    }
+    if not candidates:
+        return set()
+    return set(
+        CalendarEvent.objects.using(using)
+        .filter(location_id__in=candidates, start__lt=end, end__gt=start)
+        .exclude(pk=exclude_event_id)
+        .values_list("location_id", flat=True)
+        .distinct()
+    )
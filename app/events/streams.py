@@ -0,0 +1,175 @@
+"""
+Live change notifications for server-sent event streams.
+
+Writes publish small ``{"type", "id"}`` messages on ``user:<id>``,
+``room:<id>`` and ``schedule:<database>`` topics once their transaction
+commits. The broker hands them to the ``hub`` of every process, which fans
+them out to the queues of the connections subscribed in it.
+"""
+
+import asyncio
+import json
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import cache
+from threading import Lock
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.utils.module_loading import import_string
+
+
+class Subscription:
+    def __init__(self, topic, queue_size):
+        self.topic = topic
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(queue_size)
+        self.lagged = False
+
+    def deliver(self, message):
+        # Runs on the subscriber's loop. A client too slow to keep up loses
+        # the oldest messages and is told to reload.
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.lagged = True
+        self.queue.put_nowait(message)
+
+
+class Hub:
+    """
+    In-process registry of stream subscriptions by topic. Idle subscribers
+    cost a queue each, messages are handed to their event loops without
+    blocking the publishing thread.
+    """
+
+    def __init__(self, queue_size):
+        self.queue_size = queue_size
+        self._subscriptions = defaultdict(set)
+        self._lock = Lock()
+
+    def subscribe(self, topic):
+        subscription = Subscription(topic, self.queue_size)
+        with self._lock:
+            self._subscriptions[topic].add(subscription)
+        get_broker().start(self)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions[subscription.topic]
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del self._subscriptions[subscription.topic]
+
+    def dispatch(self, topic, message):
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(topic, ()))
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.deliver, message)
+            except RuntimeError:
+                # The subscriber's loop has shut down without unsubscribing.
+                self.unsubscribe(subscription)
+
+
+class LocalBroker:
+    """
+    Deliver messages to subscribers of this process only.
+    """
+
+    shared = False
+
+    def start(self, hub):
+        pass
+
+    def publish(self, topic, message):
+        hub.dispatch(topic, message)
+
+
+class RedisBroker:
+    """
+    Share messages between processes through Redis pub/sub, with the
+    ``redis`` package installed and ``settings.STREAM_BROKER_URL`` set.
+    """
+
+    channel_prefix = "chronos:stream:"
+    shared = True
+
+    def __init__(self):
+        try:
+            import redis
+            import redis.asyncio
+        except ImportError:
+            raise ImproperlyConfigured("RedisBroker requires the redis package.")
+        self._redis = redis
+        self._client = redis.Redis.from_url(settings.STREAM_BROKER_URL)
+        self._listener = None
+
+    def start(self, hub):
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.get_running_loop().create_task(self.listen(hub))
+
+    def publish(self, topic, message):
+        self._client.publish(self.channel_prefix + topic, json.dumps(message))
+
+    async def listen(self, hub):
+        client = self._redis.asyncio.Redis.from_url(settings.STREAM_BROKER_URL)
+        async with client.pubsub() as pubsub:
+            await pubsub.psubscribe(self.channel_prefix + "*")
+            async for item in pubsub.listen():
+                if item["type"] == "pmessage":
+                    topic = item["channel"].decode().removeprefix(self.channel_prefix)
+                    hub.dispatch(topic, json.loads(item["data"]))
+
+
+@cache
+def get_broker():
+    return import_string(settings.STREAM_BROKER)()
+
+
+_muted = ContextVar("streams_muted", default=False)
+
+
+@contextmanager
+def muted():
+    """
+    Publish nothing for the writes made inside the block, for maintenance
+    that does not change what clients see.
+    """
+    token = _muted.set(True)
+    try:
+        yield
+    finally:
+        _muted.reset(token)
+
+
+def schedule_topic(using=None):
+    """
+    Topic carrying every event change of a database, for background workers.
+    """
+    return f"schedule:{using or DEFAULT_DB_ALIAS}"
+
+
+def publish_event_change(event_id, user_ids=(), room_ids=(), deleted=False, using=None):
+    """
+    Tell the given users and rooms, and the workers of the database, that an
+    event changed, once the current transaction commits.
+    """
+    if _muted.get():
+        return
+    message = {"type": "event.deleted" if deleted else "event.changed", "id": event_id}
+    topics = [f"user:{user_id}" for user_id in set(user_ids)]
+    topics += [f"room:{room_id}" for room_id in set(room_ids) - {None}]
+    topics.append(schedule_topic(using))
+
+    def send():
+        broker = get_broker()
+        for topic in topics:
+            broker.publish(topic, message)
+
+    transaction.on_commit(send, using=using)
+
+
+hub = Hub(settings.STREAM_QUEUE_SIZE)
@@ -0,0 +1,55 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from model_bakery import baker
+
+from core.paginator import EstimatedCountPaginator
+from events.models import CalendarEvent
+
+pytestmark = pytest.mark.django_db
+
+
+def count_changelist_queries(admin_client):
+    url = reverse("admin:events_calendarevent_changelist")
+    with CaptureQueriesContext(connection) as context:
+        response = admin_client.get(url)
+    assert response.status_code == 200
+    return len(context.captured_queries)
+
+
+def test_calendar_event_changelist_queries_do_not_grow_with_rows(
+    admin_client, calendar_events
+):
+    queries = count_changelist_queries(admin_client)
+
+    for event in calendar_events:
+        participants = baker.make("accounts.User", _quantity=3)
+        baker.make(
+            "events.CalendarEvent",
+            owner=event.owner,
+            location=event.location,
+            participants=participants,
+            _quantity=3,
+        )
+
+    assert count_changelist_queries(admin_client) == queries
+
+
+def test_calendar_event_change_form_uses_autocomplete_widgets(
+    admin_client, calendar_event
+):
+    url = reverse("admin:events_calendarevent_change", args=(calendar_event.id,))
+    response = admin_client.get(url)
+
+    assert response.status_code == 200
+    content = response.content.decode()
+    for field in ("owner", "location", "participants"):
+        assert f'name="{field}"' in content
+    assert content.count("admin-autocomplete") >= 3
+    assert calendar_event.participants.first().email not in content
+
+
+def test_estimated_count_paginator_falls_back_to_exact_count(calendar_events):
+    paginator = EstimatedCountPaginator(CalendarEvent.objects.order_by("id"), 2)
+    assert paginator.count == len(calendar_events)
@@ -0,0 +1,160 @@
+"""
+Query budget of every read endpoint.
+
+Each case runs against a seeded dataset and is compared with its snapshot in
+``snapshots/query_plans.json``: the exact number of queries and the plan of
+each of them. Plans may never scan the events or participants tables in
+full. After an intended change, rewrite the snapshots with
+``pytest --update-query-snapshots`` and review the diff.
+"""
+
+import json
+import re
+from datetime import timedelta
+from pathlib import Path
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from model_bakery import baker
+
+from conftest import USER_COMPANY_UUID
+from events.tests.conftest import END_EVENT, START_EVENT
+
+SNAPSHOTS = Path(__file__).parent / "snapshots" / "query_plans.json"
+
+GUARDED_TABLES = ("events_calendarevent", "events_calendarevent_participants")
+FULL_SCAN = {
+    "sqlite": re.compile(r"^SCAN (\w+)"),
+    "postgresql": re.compile(r"Seq Scan on (\w+)"),
+}
+EXPLAIN = {"sqlite": "EXPLAIN QUERY PLAN ", "postgresql": "EXPLAIN (COSTS OFF) "}
+
+CASES = {
+    "events-list": ("v1:calendar-events-list", {}),
+    "events-list-day": ("v1:calendar-events-list", {"day": "2024-11-22"}),
+    "events-list-query": ("v1:calendar-events-list", {"query": "Event 1"}),
+    "events-list-location": ("v1:calendar-events-list", {"location_id": "{room}"}),
+    "events-list-range": (
+        "v1:calendar-events-list",
+        {"start_after": "2024-11-22T00:00:00Z", "end_before": "2024-11-24T00:00:00Z"},
+    ),
+    "events-list-fields": (
+        "v1:calendar-events-list",
+        {"fields": "id,event_name,start,end"},
+    ),
+    "events-list-ids": ("v1:calendar-events-list", {"ids": "{event},{event2}"}),
+    "events-list-columnar": ("v1:calendar-events-list", {"format": "columnar"}),
+    "events-list-include": ("v1:calendar-events-list", {"include": "participants"}),
+    "events-detail": ("v1:calendar-events-detail", {}),
+    "events-agenda": (
+        "v1:calendar-events-agenda",
+        {"from": "2024-11-21", "to": "2024-11-27", "bucket": "week"},
+    ),
+    "events-counts": (
+        "v1:calendar-events-counts",
+        {"from": "2024-11-01", "to": "2024-11-30"},
+    ),
+    "events-suggest-times": (
+        "v1:calendar-events-suggest-times",
+        {
+            "participants": "user2@compnayA.com",
+            "rooms": "{room}",
+            "duration": "60",
+            "start": "2024-11-22T08:00:00Z",
+            "end": "2024-11-23T18:00:00Z",
+        },
+    ),
+    "rooms-list": ("v1:conference-rooms-list", {}),
+    "rooms-availability": (
+        "v1:conference-rooms-availability",
+        {"start": "2024-11-22T16:00:00Z", "end": "2024-11-22T17:00:00Z"},
+    ),
+    "rooms-utilization": (
+        "v1:conference-rooms-utilization",
+        {"from": "2024-11-01", "to": "2024-11-30"},
+    ),
+}
+
+
+@pytest.fixture
+def dataset(user, participants):
+    rooms = baker.make("events.ConferenceRoom", manager=user, _quantity=5)
+    others = baker.make("accounts.User", company_id=USER_COMPANY_UUID, _quantity=10)
+    events = []
+    for i in range(60):
+        events.append(
+            baker.make(
+                "events.CalendarEvent",
+                event_name=f"Event {i}",
+                owner=user if i % 3 else others[i % 10],
+                participants=[*participants[: i % 4], others[(i + 1) % 10]],
+                location=rooms[i % 5],
+                start=START_EVENT + timedelta(hours=7 * i),
+                end=END_EVENT + timedelta(hours=7 * i),
+            )
+        )
+    # Another company's events share the tables.
+    baker.make("events.CalendarEvent", _quantity=20, start=START_EVENT, end=END_EVENT)
+    return {"room": rooms[0].id, "event": events[1].id, "event2": events[2].id}
+
+
+def explain(sql):
+    with connection.cursor() as cursor:
+        cursor.execute(EXPLAIN[connection.vendor] + sql)
+        rows = cursor.fetchall()
+    return [row[-1] for row in rows]
+
+
+def capture(client, url_name, params, dataset):
+    kwargs = {}
+    if url_name.endswith("-detail") or url_name.endswith("-utilization"):
+        key = "event" if url_name.startswith("v1:calendar") else "room"
+        kwargs["args"] = [dataset[key]]
+    params = {name: value.format(**dataset) for name, value in params.items()}
+
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(reverse(url_name, **kwargs), params)
+    assert response.status_code == 200, response.content
+
+    plans = [
+        explain(query["sql"])
+        for query in context.captured_queries
+        if query["sql"].lstrip().upper().startswith("SELECT")
+    ]
+    return {"queries": len(context.captured_queries), "plans": plans}
+
+
+@pytest.fixture(scope="module")
+def snapshots(request):
+    stored = json.loads(SNAPSHOTS.read_text()) if SNAPSHOTS.exists() else {}
+    current = {}
+    yield stored, current
+    if request.config.getoption("--update-query-snapshots"):
+        SNAPSHOTS.write_text(json.dumps(stored | current, indent=2) + "\n")
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("case", CASES)
+def test_query_plan(case, request, snapshots, user_client, dataset):
+    url_name, params = CASES[case]
+    result = capture(user_client, url_name, params, dataset)
+
+    if pattern := FULL_SCAN.get(connection.vendor):
+        scans = {
+            match.group(1)
+            for plan in result["plans"]
+            for line in plan
+            if (match := pattern.search(line))
+        }
+        assert not scans & set(GUARDED_TABLES), f"Full table scan in {case}"
+
+    stored, current = snapshots
+    current[case] = result
+    if request.config.getoption("--update-query-snapshots"):
+        return
+    assert case in stored, "No snapshot, run pytest --update-query-snapshots."
+    assert result["queries"] == stored[case]["queries"]
+    if connection.vendor == "sqlite":
+        assert result["plans"] == stored[case]["plans"]
@@ -0,0 +1,150 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from django.core.management import CommandError, call_command
+from model_bakery import baker
+
+from events.models import CalendarEvent
+from events.reminders import ReminderWorker, TimingWheel
+
+NOW = datetime(2030, 1, 7, 9, 0, tzinfo=timezone.utc)
+
+
+class RecordingBackend:
+    def __init__(self):
+        self.sent = []
+
+    def send(self, reminders):
+        self.sent.extend(reminders)
+
+
+def test_timing_wheel_fires_in_order_across_levels():
+    wheel = TimingWheel(now=5, slots=4, levels=2)
+    for deadline in (6, 9, 21, 22, 40, 7):
+        wheel.schedule(deadline, deadline, f"at {deadline}")
+
+    assert wheel.advance(6) == ["at 6"]
+    assert wheel.advance(20) == ["at 7", "at 9"]
+    wheel.cancel(22)
+    wheel.schedule(9, 30, "at 30")
+    assert wheel.advance(100) == ["at 21", "at 30", "at 40"]
+    assert len(wheel) == 0
+
+
+def test_timing_wheel_fires_overdue_entries_on_the_next_tick():
+    wheel = TimingWheel(now=10)
+    wheel.schedule("late", 3, "late")
+
+    assert wheel.advance(10) == []
+    assert wheel.advance(11) == ["late"]
+
+
+@pytest.fixture
+def worker(settings):
+    settings.REMINDER_LEAD = 600
+    settings.REMINDER_HORIZON = 3600
+    settings.REMINDER_TICK = 1
+    return ReminderWorker(RecordingBackend())
+
+
+def make_event(owner, start, **kwargs):
+    return baker.make(
+        "events.CalendarEvent",
+        owner=owner,
+        start=start,
+        end=start + timedelta(hours=1),
+        **kwargs,
+    )
+
+
+@pytest.mark.django_db
+def test_worker_loads_the_horizon_and_fires_reminders(
+    worker, user, participants, django_assert_num_queries
+):
+    event = make_event(user, NOW + timedelta(minutes=30), participants=participants[:1])
+    make_event(user, NOW + timedelta(minutes=5))
+    make_event(user, NOW + timedelta(hours=2))
+
+    with django_assert_num_queries(2):
+        assert worker.step(now=NOW) == []
+    assert len(worker.wheel) == 1
+
+    assert worker.step(now=NOW + timedelta(minutes=19, seconds=59)) == []
+    (reminder,) = worker.step(now=NOW + timedelta(minutes=20))
+    assert reminder.event_id == event.id
+    assert reminder.recipients == {user.email, participants[0].email}
+    assert worker.backend.sent == [reminder]
+
+
+@pytest.mark.django_db
+def test_worker_applies_event_changes(worker, user):
+    moved = make_event(user, NOW + timedelta(minutes=30))
+    deleted = make_event(user, NOW + timedelta(minutes=40))
+    worker.step(now=NOW)
+
+    moved.start = NOW + timedelta(minutes=5)
+    moved.save()
+    deleted_id = deleted.id
+    deleted.delete()
+    created = make_event(user, NOW + timedelta(minutes=15))
+
+    assert worker.step([moved.id, deleted_id, created.id], now=NOW) == []
+    (reminder,) = worker.step(now=NOW + timedelta(seconds=1))
+    assert reminder.event_id == moved.id
+    assert worker.step([moved.id], now=NOW + timedelta(seconds=2)) == []
+    assert worker.step(now=NOW + timedelta(seconds=3)) == []
+
+    assert worker.step(now=NOW + timedelta(hours=1)) == [
+        worker.load_reminders(id=created.id)[created.id]
+    ]
+    assert worker.backend.sent[0].start == moved.start
+
+
+@pytest.mark.django_db
+def test_worker_moves_the_window_forward(worker, user):
+    worker.step(now=NOW)
+    later = make_event(user, NOW + timedelta(minutes=90))
+
+    worker.step(now=NOW + timedelta(minutes=29))
+    assert later.id not in worker.wheel
+    worker.step(now=NOW + timedelta(minutes=30))
+    assert later.id in worker.wheel
+
+
+@pytest.mark.django_db
+def test_worker_rechecks_due_reminders(worker, user, django_assert_num_queries):
+    kept = make_event(user, NOW + timedelta(minutes=30))
+    moved = make_event(user, NOW + timedelta(minutes=30))
+    deleted = make_event(user, NOW + timedelta(minutes=30))
+    worker.step(now=NOW)
+
+    # Changed without the worker being notified.
+    CalendarEvent.objects.filter(pk=moved.pk).update(start=NOW + timedelta(hours=1))
+    CalendarEvent.objects.filter(pk=deleted.pk).delete()
+
+    with django_assert_num_queries(3):
+        (reminder,) = worker.step(now=NOW + timedelta(minutes=20))
+    assert reminder.event_id == kept.id
+    (reminder,) = worker.step(now=NOW + timedelta(minutes=50))
+    assert (reminder.event_id, reminder.start) == (moved.id, NOW + timedelta(hours=1))
+
+
+def test_send_reminders_requires_a_shared_broker():
+    # Changes made by the API processes would never reach the worker.
+    with pytest.raises(CommandError, match="STREAM_BROKER"):
+        call_command("send_reminders")
+
+
+@pytest.mark.django_db
+def test_event_changes_reach_the_reminder_worker(
+    django_capture_on_commit_callbacks, monkeypatch, user
+):
+    published = []
+    monkeypatch.setattr(
+        "events.streams.LocalBroker.publish",
+        lambda self, topic, message: published.append((topic, message)),
+    )
+    with django_capture_on_commit_callbacks(execute=True):
+        event = make_event(user, NOW)
+
+    assert ("schedule:default", {"type": "event.changed", "id": event.id}) in published
@@ -0,0 +1,134 @@
+from datetime import datetime, timedelta
+
+import pytest
+import pytz
+from django.urls import reverse
+from model_bakery import baker
+from rest_framework import status
+
+from events.scheduling import (
+    find_free_slots,
+    intersect_intervals,
+    merge_intervals,
+    subtract_intervals,
+)
+
+SUGGEST_TIMES_ENDPOINT_V1 = "v1:calendar-events-suggest-times"
+
+
+def at(hour, minute=0, day=21):
+    return datetime(2024, 11, day, hour, minute, tzinfo=pytz.utc)
+
+
+def test_merge_intervals():
+    assert merge_intervals(
+        [(at(12), at(13)), (at(9), at(10)), (at(9, 30), at(11))]
+    ) == [
+        (at(9), at(11)),
+        (at(12), at(13)),
+    ]
+
+
+def test_intersect_and_subtract_intervals():
+    left = [(at(9), at(12)), (at(13), at(17))]
+    right = [(at(11), at(14))]
+
+    assert intersect_intervals(left, right) == [(at(11), at(12)), (at(13), at(14))]
+    assert subtract_intervals(left, right) == [(at(9), at(11)), (at(14), at(17))]
+
+
+def test_find_free_slots_honors_every_timezone():
+    slots = find_free_slots(
+        (at(0), at(0, day=22)),
+        timedelta(hours=1),
+        ["UTC", "Europe/Warsaw"],
+        [(at(9, 10), at(9, 50))],
+        limit=3,
+        step=timedelta(minutes=15),
+        working_hours=(9, 17),
+        working_days=range(7),
+    )
+    # Warsaw works 08:00-16:00 UTC, so the shared day is 09:00-16:00 UTC.
+    assert slots == [
+        (at(10), at(11), None),
+        (at(11), at(12), None),
+        (at(12), at(13), None),
+    ]
+
+
+@pytest.mark.django_db
+def test_suggest_times_avoids_busy_participants_and_rooms(
+    user_client, calendar_event, participants, external_user
+):
+    baker.make(
+        "events.CalendarEvent",
+        owner=external_user,
+        location=calendar_event.location,
+        start=at(9),
+        end=at(10, 20),
+    )
+    url = reverse(SUGGEST_TIMES_ENDPOINT_V1)
+
+    response = user_client.get(
+        url,
+        {
+            "participants": [participants[0].email],
+            "rooms": [calendar_event.location_id],
+            "duration": 60,
+            "start": at(0).isoformat(),
+            "end": at(0, day=22).isoformat(),
+            "limit": 10,
+        },
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    starts = [slot["start"] for slot in response.data]
+    assert starts == [
+        "2024-11-21T10:30:00Z",
+        "2024-11-21T11:30:00Z",
+        "2024-11-21T12:30:00Z",
+        "2024-11-21T13:30:00Z",
+        "2024-11-21T14:30:00Z",
+    ]
+    assert {slot["location"] for slot in response.data} == {calendar_event.location_id}
+
+
+@pytest.mark.django_db
+def test_suggest_times_rejects_external_participants_and_rooms(
+    user_client, external_user
+):
+    room = baker.make("events.ConferenceRoom", manager=external_user)
+    url = reverse(SUGGEST_TIMES_ENDPOINT_V1)
+
+    response = user_client.get(
+        url,
+        {
+            "participants": [external_user.email],
+            "rooms": [room.id],
+            "duration": 60,
+            "start": at(0).isoformat(),
+            "end": at(0, day=22).isoformat(),
+        },
+    )
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert set(response.data) == {"participants", "rooms"}
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "duration, window_days", [(60 * 9, 1), (60, 15)], ids=["duration", "window"]
+)
+def test_suggest_times_enforces_limits(user_client, user, duration, window_days):
+    url = reverse(SUGGEST_TIMES_ENDPOINT_V1)
+    response = user_client.get(
+        url,
+        {
+            "participants": [user.email],
+            "duration": duration,
+            "start": at(0).isoformat(),
+            "end": (at(0) + timedelta(days=window_days)).isoformat(),
+        },
+    )
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
@@ -0,0 +1,142 @@
+from datetime import date, datetime
+
+import pytest
+import pytz
+from django.core.management import CommandError, call_command
+from django.urls import reverse
+from model_bakery import baker
+from rest_framework import status
+
+from events.models import RoomSlotMap
+from events.slots import busy_rooms, decode, slot_masks
+
+AVAILABILITY_ENDPOINT_V1 = "v1:conference-rooms-availability"
+
+pytestmark = pytest.mark.django_db
+
+
+def slot_maps(room):
+    return {row.day: decode(row.slots) for row in RoomSlotMap.objects.filter(room=room)}
+
+
+def at(day, hour, minute=0):
+    return datetime(2024, 11, day, hour, minute, tzinfo=pytz.utc)
+
+
+def test_slot_masks_round_out_to_whole_slots():
+    assert slot_masks(at(21, 0, 10), at(21, 1)) == {date(2024, 11, 21): 0b1111}
+    assert slot_masks(at(21, 23, 50), at(22, 0, 20)) == {
+        date(2024, 11, 21): 1 << 95,
+        date(2024, 11, 22): 0b11,
+    }
+
+
+def test_slot_maps_follow_event_changes(user, conference_room):
+    event = baker.make(
+        "events.CalendarEvent",
+        owner=user,
+        location=conference_room,
+        start=at(21, 0),
+        end=at(21, 1),
+    )
+    baker.make(
+        "events.CalendarEvent",
+        owner=user,
+        location=conference_room,
+        start=at(21, 2),
+        end=at(21, 2, 30),
+    )
+    assert slot_maps(conference_room) == {date(2024, 11, 21): 0b1100001111}
+
+    event.start, event.end = at(22, 0), at(22, 0, 15)
+    event.save()
+    assert slot_maps(conference_room) == {
+        date(2024, 11, 21): 0b1100000000,
+        date(2024, 11, 22): 0b1,
+    }
+
+    event.delete()
+    assert slot_maps(conference_room) == {date(2024, 11, 21): 0b1100000000}
+
+
+def test_busy_rooms_confirms_partial_slots(user, conference_room):
+    baker.make(
+        "events.CalendarEvent",
+        owner=user,
+        location=conference_room,
+        start=at(21, 10),
+        end=at(21, 10, 20),
+    )
+
+    assert busy_rooms([conference_room.id], at(21, 10, 10), at(21, 11)) == {
+        conference_room.id
+    }
+    # Shares the 10:15 slot but not the booked time.
+    assert busy_rooms([conference_room.id], at(21, 10, 20), at(21, 11)) == set()
+    assert busy_rooms([conference_room.id], at(21, 11), at(21, 12)) == set()
+
+
+def test_conference_rooms_availability(user_client, user, conference_room):
+    other_room = baker.make("events.ConferenceRoom", manager=user)
+    baker.make(
+        "events.CalendarEvent",
+        owner=user,
+        location=conference_room,
+        start=at(21, 10),
+        end=at(21, 11),
+    )
+    url = reverse(AVAILABILITY_ENDPOINT_V1)
+
+    response = user_client.get(
+        url, {"start": "2024-11-21T10:30:00Z", "end": "2024-11-21T12:00:00Z"}
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert {room["id"]: room["free"] for room in response.data} == {
+        conference_room.id: False,
+        other_room.id: True,
+    }
+
+
+def test_rebuild_room_slots_command(user, conference_room):
+    baker.make(
+        "events.CalendarEvent",
+        owner=user,
+        location=conference_room,
+        start=at(21, 10),
+        end=at(21, 11),
+    )
+    RoomSlotMap.objects.all().delete()
+
+    with pytest.raises(CommandError):
+        call_command("rebuild_room_slots", "--check")
+
+    call_command("rebuild_room_slots")
+    call_command("rebuild_room_slots", "--check")
+
+
+def test_create_calendar_event_in_booked_room(user_client, user, conference_room):
+    baker.make(
+        "events.CalendarEvent",
+        owner=user,
+        location=conference_room,
+        start=at(21, 10),
+        end=at(21, 11),
+    )
+    payload = {
+        "event_name": "Clash",
+        "agenda": "Clash",
+        "start": "2024-11-21T10:45:00Z",
+        "end": "2024-11-21T11:30:00Z",
+        "location": conference_room.id,
+        "participants": [],
+    }
+
+    response = user_client.post(
+        reverse("v1:calendar-events-list"), payload, format="json"
+    )
+
+    assert response.status_code == status.HTTP_201_CREATED
+    assert busy_rooms([conference_room.id], at(21, 11), at(21, 12)) == {
+        conference_room.id
+    }
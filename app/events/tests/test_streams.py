@@ -0,0 +1,130 @@
+import asyncio
+import base64
+import threading
+
+import pytest
+from django.test import AsyncClient
+from django.urls import reverse
+from model_bakery import baker
+
+from events.streams import Hub, hub
+
+STREAM_ENDPOINT_V1 = "v1:calendar-events-stream"
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+class RecordingBroker:
+    def __init__(self):
+        self.published = []
+
+    def start(self, hub):
+        pass
+
+    def publish(self, topic, message):
+        self.published.append((topic, message))
+
+
+@pytest.fixture
+def broker(monkeypatch):
+    broker = RecordingBroker()
+    monkeypatch.setattr("events.streams.get_broker", lambda: broker)
+    return broker
+
+
+@pytest.mark.anyio
+async def test_hub_delivers_messages_from_other_threads(broker):
+    local_hub = Hub(queue_size=2)
+    subscription = local_hub.subscribe("room:1")
+    other = local_hub.subscribe("room:2")
+
+    thread = threading.Thread(
+        target=local_hub.dispatch, args=("room:1", {"type": "event.changed", "id": 1})
+    )
+    thread.start()
+    thread.join()
+
+    assert await asyncio.wait_for(subscription.queue.get(), 1) == {
+        "type": "event.changed",
+        "id": 1,
+    }
+    assert other.queue.empty()
+
+    for event_id in range(3):
+        local_hub.dispatch("room:1", {"type": "event.changed", "id": event_id})
+    await asyncio.sleep(0)
+    assert subscription.lagged
+    assert subscription.queue.get_nowait()["id"] == 1
+
+    local_hub.unsubscribe(subscription)
+    local_hub.unsubscribe(other)
+    assert not local_hub._subscriptions
+
+
+@pytest.mark.django_db
+def test_event_changes_are_published_after_commit(
+    django_capture_on_commit_callbacks, broker, user, participants, conference_room
+):
+    with django_capture_on_commit_callbacks(execute=True):
+        event = baker.make("events.CalendarEvent", owner=user, location=conference_room)
+        event.participants.add(participants[0])
+    topics = {topic for topic, _ in broker.published}
+    assert topics == {
+        f"user:{user.id}",
+        f"user:{participants[0].id}",
+        f"room:{conference_room.id}",
+        "schedule:default",
+    }
+
+    broker.published.clear()
+    with django_capture_on_commit_callbacks(execute=True):
+        event.delete()
+    assert {topic for topic, _ in broker.published} == topics
+    assert {message["type"] for _, message in broker.published} == {"event.deleted"}
+
+
+@pytest.fixture
+def stream_user(user):
+    user.set_password("secret")
+    user.save()
+    token = base64.b64encode(f"{user.username}:secret".encode()).decode()
+    return {"Authorization": f"Basic {token}"}
+
+
+@pytest.mark.anyio
+@pytest.mark.django_db(transaction=True)
+async def test_stream_sends_room_changes(stream_user, conference_room):
+    response = await AsyncClient().get(
+        reverse(STREAM_ENDPOINT_V1), {"room": conference_room.id}, headers=stream_user
+    )
+    assert response.status_code == 200
+    assert response["Content-Type"] == "text/event-stream"
+
+    chunks = aiter(response.streaming_content)
+    assert await anext(chunks) == b"retry: 5000\n\n"
+    hub.dispatch(f"room:{conference_room.id}", {"type": "event.changed", "id": 7})
+    assert await asyncio.wait_for(anext(chunks), 1) == (
+        b'event: event.changed\ndata: {"type": "event.changed", "id": 7}\n\n'
+    )
+
+    # A client disconnect cancels the pending read, which must unsubscribe.
+    pending = asyncio.ensure_future(anext(chunks))
+    await asyncio.sleep(0)
+    pending.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await pending
+    assert not hub._subscriptions
+
+
+@pytest.mark.anyio
+@pytest.mark.django_db(transaction=True)
+async def test_stream_requires_authentication_and_known_room(stream_user):
+    client = AsyncClient()
+    url = reverse(STREAM_ENDPOINT_V1)
+
+    assert (await client.get(url)).status_code == 401
+    response = await client.get(url, {"room": 0}, headers=stream_user)
+    assert response.status_code == 400
@@ -0,0 +1,126 @@
+from datetime import date, datetime, timedelta
+
+import pytest
+import pytz
+from django.core.management import CommandError, call_command
+from django.urls import reverse
+from model_bakery import baker
+from rest_framework import status
+
+from events.models import RoomUsageDaily
+from events.usage import split_by_day
+
+UTILIZATION_ENDPOINT_V1 = "v1:conference-rooms-utilization"
+
+pytestmark = pytest.mark.django_db
+
+
+def usage(room):
+    return {
+        row.day: (row.booked_seconds, row.event_count)
+        for row in RoomUsageDaily.objects.filter(room=room).exclude(event_count=0)
+    }
+
+
+def at(day, hour, minute=0):
+    return datetime(2024, 11, day, hour, minute, tzinfo=pytz.utc)
+
+
+def test_split_by_day_across_midnight():
+    assert list(split_by_day(at(21, 22), at(22, 2, 30))) == [
+        (date(2024, 11, 21), 7200),
+        (date(2024, 11, 22), 9000),
+    ]
+
+
+def test_room_usage_follows_event_changes(user, conference_room):
+    event = baker.make(
+        "events.CalendarEvent",
+        owner=user,
+        location=conference_room,
+        start=at(21, 22),
+        end=at(22, 2),
+    )
+    assert usage(conference_room) == {
+        date(2024, 11, 21): (7200, 1),
+        date(2024, 11, 22): (7200, 1),
+    }
+
+    event.start, event.end = at(22, 9), at(22, 10)
+    event.save()
+    assert usage(conference_room) == {date(2024, 11, 22): (3600, 1)}
+
+    other_room = baker.make("events.ConferenceRoom", manager=user)
+    event.location = other_room
+    event.save()
+    assert usage(conference_room) == {}
+    assert usage(other_room) == {date(2024, 11, 22): (3600, 1)}
+
+    event.delete()
+    assert usage(other_room) == {}
+
+
+def test_utilization_endpoint_reads_rollup(
+    django_assert_num_queries, user_client, calendar_event
+):
+    url = reverse(UTILIZATION_ENDPOINT_V1, args=(calendar_event.location_id,))
+
+    with django_assert_num_queries(2):
+        response = user_client.get(
+            url, {"from": "2024-11-18", "to": "2024-11-24", "bucket": "week"}
+        )
+
+    assert response.status_code == status.HTTP_200_OK
+    booked = (calendar_event.end - calendar_event.start).total_seconds()
+    assert response.data["buckets"] == [
+        {
+            "start": date(2024, 11, 18),
+            "booked_seconds": booked,
+            "event_count": 1,
+            "occupancy": round(booked / timedelta(days=7).total_seconds(), 4),
+        }
+    ]
+
+
+def test_utilization_counts_events_once_per_bucket(user_client, user, conference_room):
+    for start, end in ((at(21, 22), at(22, 2)), (at(24, 22), at(25, 2))):
+        baker.make(
+            "events.CalendarEvent",
+            owner=user,
+            location=conference_room,
+            start=start,
+            end=end,
+        )
+    url = reverse(UTILIZATION_ENDPOINT_V1, args=(conference_room.id,))
+
+    weeks = user_client.get(
+        url, {"from": "2024-11-18", "to": "2024-12-01", "bucket": "week"}
+    ).data["buckets"]
+    days = user_client.get(url, {"from": "2024-11-21", "to": "2024-11-25"}).data[
+        "buckets"
+    ]
+
+    assert [(week["start"], week["event_count"]) for week in weeks] == [
+        (date(2024, 11, 18), 2),
+        (date(2024, 11, 25), 1),
+    ]
+    assert [day["event_count"] for day in days] == [1, 1, 0, 1, 1]
+
+
+def test_utilization_endpoint_is_scoped_to_company(
+    external_user_client, calendar_event
+):
+    url = reverse(UTILIZATION_ENDPOINT_V1, args=(calendar_event.location_id,))
+    response = external_user_client.get(url, {"from": "2024-11-18", "to": "2024-11-24"})
+
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_rebuild_room_usage_command(calendar_events):
+    RoomUsageDaily.objects.filter(room=calendar_events[0].location).delete()
+
+    with pytest.raises(CommandError):
+        call_command("rebuild_room_usage", "--check")
+
+    call_command("rebuild_room_usage")
+    call_command("rebuild_room_usage", "--check")
@@ -2,12 +2,15 @@ import pytest
 import pytz
 
 from datetime import datetime
+from io import StringIO
+from django.core.management import call_command
 from django.urls import reverse
 from model_bakery import baker
 from rest_framework import status
 from rest_framework.exceptions import ErrorDetail
 
 from events.models import CalendarEvent, ConferenceRoom
+from events.rooms import room_directory
 
 EVENTS_ENDPOINT_V1 = "v1:calendar-events"
 LOCATION_ENDPOINT_V1 = "v1:conference-rooms"
@@ -322,3 +325,467 @@ def test_conference_rooms_are_not_visibly_for_external_users(
     response = external_user_client.get(url)
     assert response.status_code == status.HTTP_200_OK
     assert len(response.data) == 0
+
+
+def test_calendar_events_filter_by_start_after_and_end_before(
+    user_client, calendar_events
+):
+    url = reverse(f"{EVENTS_ENDPOINT_V1}-list")
+    response = user_client.get(
+        url,
+        {
+            "start_after": calendar_events[1].start.isoformat(),
+            "end_before": calendar_events[2].end.isoformat(),
+        },
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert [event["id"] for event in response.data] == [
+        calendar_events[1].id,
+        calendar_events[2].id,
+    ]
+
+
+def test_calendar_events_filter_by_invalid_range(user_client):
+    url = reverse(f"{EVENTS_ENDPOINT_V1}-list")
+    response = user_client.get(url, {"start_after": "yesterday"})
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert "start_after" in response.data
+
+
+def test_calendar_events_agenda_grouped_by_day(
+    django_assert_num_queries, user_client, calendar_events
+):
+    url = reverse(f"{EVENTS_ENDPOINT_V1}-agenda")
+    params = {"from": "2024-11-20", "to": "2024-11-23", "bucket": "day"}
+
+    with django_assert_num_queries(2):
+        response = user_client.get(url, params)
+
+    assert response.status_code == status.HTTP_200_OK
+    buckets = {
+        str(bucket["start"]): [event["id"] for event in bucket["events"]]
+        for bucket in response.data["buckets"]
+    }
+    assert buckets == {
+        "2024-11-20": [],
+        "2024-11-21": [calendar_events[0].id],
+        "2024-11-22": [calendar_events[1].id],
+        "2024-11-23": [calendar_events[2].id],
+    }
+
+
+def test_calendar_events_agenda_grouped_by_week_in_user_timezone(
+    client, different_timezone_user, calendar_events
+):
+    url = reverse(f"{EVENTS_ENDPOINT_V1}-agenda")
+    params = {"from": "2024-11-21", "to": "2024-12-01", "bucket": "week"}
+
+    client.force_authenticate(user=different_timezone_user)
+    response = client.get(url, params)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert [str(bucket["start"]) for bucket in response.data["buckets"]] == [
+        "2024-11-21",
+        "2024-11-25",
+    ]
+    # In Sydney the events start a day later, on Friday 22nd to Monday 25th.
+    assert [event["id"] for event in response.data["buckets"][0]["events"]] == [
+        event.id for event in calendar_events[:3]
+    ]
+    assert [event["id"] for event in response.data["buckets"][1]["events"]] == [
+        calendar_events[3].id
+    ]
+
+
+@pytest.mark.parametrize(
+    "params",
+    [
+        {"from": "2024-11-21"},
+        {"from": "2024-11-22", "to": "2024-11-21"},
+        {"from": "2024-01-01", "to": "2024-12-31"},
+        {"from": "2024-11-21", "to": "2024-11-22", "bucket": "year"},
+    ],
+)
+def test_calendar_events_agenda_rejects_invalid_window(user_client, params):
+    url = reverse(f"{EVENTS_ENDPOINT_V1}-agenda")
+    response = user_client.get(url, params)
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+def test_conference_rooms_list_is_served_from_directory(
+    django_assert_num_queries, user_client, user, conference_room
+):
+    url = reverse(f"{LOCATION_ENDPOINT_V1}-list")
+    user_client.get(url)
+
+    with django_assert_num_queries(0):
+        response = user_client.get(url)
+    assert [room["id"] for room in response.data] == [conference_room.id]
+
+    conference_room.name = "Renamed Room"
+    conference_room.save()
+    response = user_client.get(url)
+    assert response.data[0]["name"] == "Renamed Room"
+
+    new_room = baker.make("events.ConferenceRoom", manager=user)
+    response = user_client.get(url)
+    assert [room["id"] for room in response.data] == [conference_room.id, new_room.id]
+
+
+def test_calendar_event_location_of_room_outside_directory(user_client, calendar_event):
+    room = calendar_event.location
+    room.manager = None
+    room.save()
+    url = reverse(f"{EVENTS_ENDPOINT_V1}-list")
+
+    response = user_client.get(url)
+    assert response.data[0]["location"] == room.address
+
+
+def test_create_calendar_event_rejects_unknown_and_external_participants(
+    user_client, participants, external_user, event_data
+):
+    url = reverse(f"{EVENTS_ENDPOINT_V1}-list")
+    event_data.update(
+        {
+            "start": "2024-11-21T12:00:00Z",
+            "end": "2024-11-21T13:00:00Z",
+            "participants": [
+                participants[0].email,
+                external_user.email,
+                "unknown@compnayA.com",
+            ],
+        }
+    )
+
+    response = user_client.post(url, data=event_data, format="json")
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert external_user.email in response.data["participants"][0]
+    assert "unknown@compnayA.com" in response.data["participants"][0]
+    assert participants[0].email not in response.data["participants"][0]
+    assert not CalendarEvent.objects.exists()
+
+
+def test_calendar_events_columnar_format_matches_default(
+    django_assert_num_queries, user_client, calendar_events
+):
+    url = reverse(f"{EVENTS_ENDPOINT_V1}-list")
+    expected = user_client.get(url).json()
+
+    with django_assert_num_queries(2):
+        response = user_client.get(url, {"format": "columnar"})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response["Content-Type"] == "application/vnd.chronos.columnar+json"
+    body = response.json()
+    columns, emails, locations = body["columns"], body["emails"], body["locations"]
+    rows = [
+        {
+            "id": columns["id"][i],
+            "owner": emails[columns["owner"][i]],
+            "event_name": columns["event_name"][i],
+            "agenda": columns["agenda"][i],
+            "start": columns["start"][i],
+            "end": columns["end"][i],
+            "location": locations[columns["location"][i]],
+            "participants": [emails[p] for p in columns["participants"][i]],
+            "version": columns["version"][i],
+        }
+        for i in range(body["count"])
+    ]
+    for row in [*rows, *expected]:
+        row["participants"].sort()
+    assert rows == expected
+    assert len(response.content) < len(user_client.get(url).content)
+
+
+def test_columnar_format_is_only_offered_for_lists(user_client, calendar_event):
+    url = reverse(f"{EVENTS_ENDPOINT_V1}-detail", args=[calendar_event.id])
+    response = user_client.get(url, {"format": "columnar"})
+
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_calendar_events_sparse_fieldset(
+    django_assert_num_queries, user_client, calendar_events
+):
+    url = reverse(f"{EVENTS_ENDPOINT_V1}-list")
+
+    with django_assert_num_queries(1) as context:
+        response = user_client.get(url, {"fields": "start,id,event_name,end"})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert [list(event) for event in response.data] == [
+        ["id", "event_name", "start", "end"]
+    ] * len(calendar_events)
+    (query,) = context.captured_queries
+    columns = query["sql"].split(" FROM ")[0]
+    assert "agenda" not in columns
+    assert "accounts_user" not in columns
+
+
+def test_benchmark_event_list_command_rolls_back():
+    out = StringIO()
+
+    call_command("benchmark_event_list", "--events", "20", "--repeat", "1", stdout=out)
+
+    assert [line.split()[0] for line in out.getvalue().splitlines()] == [
+        "default",
+        "columnar",
+    ]
+    assert not CalendarEvent.objects.exists()
+
+
+def test_calendar_events_sparse_fieldset_with_relations(
+    django_assert_num_queries, user_client, user, calendar_events
+):
+    url = reverse(f"{EVENTS_ENDPOINT_V1}-list")
+
+    with django_assert_num_queries(2):
+        response = user_client.get(url, {"fields": "id,owner,location,participants"})
+
+    assert response.status_code == status.HTTP_200_OK
+    event = next(e for e in response.data if e["id"] == calendar_events[0].id)
+    assert event == {
+        "id": calendar_events[0].id,
+        "owner": user.email,
+        "location": calendar_events[0].location.address,
+        "participants": [
+            p.email for p in calendar_events[0].participants.order_by("id")
+        ],
+    }
+
+
+def test_calendar_events_sparse_fieldset_rejects_unknown_fields(user_client):
+    url = reverse(f"{EVENTS_ENDPOINT_V1}-list")
+    response = user_client.get(url, {"fields": "id,secret"})
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert "secret" in response.data["fields"]
+
+
+def test_calendar_events_multi_get(
+    django_assert_num_queries, user_client, user, calendar_events
+):
+    url = reverse(f"{EVENTS_ENDPOINT_V1}-list")
+    hidden = baker.make("events.CalendarEvent", owner=user)
+    hidden.owner = baker.make("accounts.User", company_id=user.company_id)
+    hidden.save()
+    foreign = baker.make("events.CalendarEvent")
+    ids = [calendar_events[1].id, foreign.id, calendar_events[0].id, hidden.id, 0]
+
+    with django_assert_num_queries(2):
+        response = user_client.get(url, {"ids": ",".join(map(str, ids))})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert {event["id"] for event in response.data["results"]} == {
+        calendar_events[0].id,
+        calendar_events[1].id,
+    }
+    assert response.data["missing"] == [foreign.id, hidden.id, 0]
+
+
+@pytest.mark.parametrize("ids", ["1,a", ",".join(map(str, range(1, 102)))])
+def test_calendar_events_multi_get_rejects_invalid_ids(user_client, ids):
+    url = reverse(f"{EVENTS_ENDPOINT_V1}-list")
+    response = user_client.get(url, {"ids": ids})
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert "ids" in response.data
+
+
+def test_calendar_events_sideload_participants(
+    django_assert_num_queries, user_client, participants, calendar_events
+):
+    url = reverse(f"{EVENTS_ENDPOINT_V1}-list")
+    participants[0].first_name, participants[0].last_name = "Ada", "Lovelace"
+    participants[0].save()
+
+    with django_assert_num_queries(2):
+        response = user_client.get(url, {"include": "participants"})
+
+    assert response.status_code == status.HTTP_200_OK
+    events = {event["id"]: event for event in response.data["results"]}
+    for event in calendar_events:
+        assert events[event.id]["participants"] == sorted(
+            event.participants.values_list("id", flat=True)
+        )
+    assert response.data["participants"] == {
+        p.id: {"email": p.email, "name": p.get_full_name() or p.username}
+        for p in participants
+    }
+    assert response.data["participants"][participants[0].id]["name"] == "Ada Lovelace"
+
+
+def test_calendar_events_sideload_participants_with_other_parameters(
+    user_client, calendar_events
+):
+    url = reverse(f"{EVENTS_ENDPOINT_V1}-list")
+
+    response = user_client.get(
+        url, {"include": "participants", "ids": f"{calendar_events[3].id},0"}
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data["missing"] == [0]
+    assert list(response.data["participants"]) == list(
+        response.data["results"][0]["participants"]
+    )
+
+    response = user_client.get(url, {"include": "participants", "fields": "id"})
+    assert response.data == [{"id": event.id} for event in calendar_events]
+
+    response = user_client.get(url, {"include": "owners"})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert "owners" in response.data["include"]
+
+
+def test_calendar_events_sideload_is_not_offered_with_columnar_format(
+    user_client, calendar_events
+):
+    url = reverse(f"{EVENTS_ENDPOINT_V1}-list")
+    response = user_client.get(url, {"include": "participants", "format": "columnar"})
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert "include" in response.json()
+
+
+def test_calendar_events_sparse_fieldset_is_not_offered_with_columnar_format(
+    user_client, calendar_events
+):
+    url = reverse(f"{EVENTS_ENDPOINT_V1}-list")
+    response = user_client.get(url, {"fields": "id,start", "format": "columnar"})
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert "fields" in response.json()
+
+
+def test_calendar_events_counts_per_local_day(
+    django_assert_num_queries, user_client, user, calendar_events
+):
+    url = reverse(f"{EVENTS_ENDPOINT_V1}-counts")
+    baker.make("events.CalendarEvent", start=START_EVENT, end=END_EVENT)
+    params = {"from": "2024-11-20", "to": "2024-11-23"}
+
+    response = user_client.get(url, params)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert [(str(d["day"]), d["count"]) for d in response.data["days"]] == [
+        ("2024-11-20", 0),
+        ("2024-11-21", 1),
+        ("2024-11-22", 1),
+        ("2024-11-23", 1),
+    ]
+
+    with django_assert_num_queries(0):
+        assert user_client.get(url, params).data == response.data
+
+    baker.make("events.CalendarEvent", owner=user, start=START_EVENT, end=END_EVENT)
+    response = user_client.get(url, params)
+    assert response.data["days"][1]["count"] == 2
+
+
+def test_calendar_events_counts_use_user_timezone(
+    client, different_timezone_user, calendar_events
+):
+    url = reverse(f"{EVENTS_ENDPOINT_V1}-counts")
+    client.force_authenticate(different_timezone_user)
+    params = {"from": "2024-11-21", "to": "2024-11-22"}
+
+    response = client.get(url, params)
+
+    # 16:16 UTC is already the next day in the user's timezone.
+    assert [(str(d["day"]), d["count"]) for d in response.data["days"]] == [
+        ("2024-11-21", 0),
+        ("2024-11-22", 1),
+    ]
+
+
+def test_patch_calendar_event_with_if_match(user_client, calendar_event, participants):
+    url = reverse(f"{EVENTS_ENDPOINT_V1}-detail", args=[calendar_event.id])
+    etag = user_client.get(url)["ETag"]
+    through = CalendarEvent.participants.through.objects.filter(
+        calendarevent=calendar_event
+    )
+    kept = dict(through.values_list("user_id", "id"))
+    kept.pop(participants[0].id)
+    new_participant = baker.make(
+        "accounts.User",
+        email="user5@compnayA.com",
+        company_id=calendar_event.owner.company_id,
+    )
+    emails = [p.email for p in participants[1:]] + [new_participant.email]
+
+    response = user_client.patch(
+        url,
+        {"event_name": "Renamed", "participants": emails},
+        format="json",
+        HTTP_IF_MATCH=etag,
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data["event_name"] == "Renamed"
+    assert response.data["version"] == calendar_event.version + 1
+    assert response["ETag"] == f'"{calendar_event.version + 1}"'
+    assert sorted(response.data["participants"]) == sorted(emails)
+    # Through rows of participants that stayed are left alone.
+    rows = dict(through.values_list("user_id", "id"))
+    assert {user_id: rows[user_id] for user_id in kept} == kept
+
+    stale = user_client.patch(
+        url, {"event_name": "Lost update"}, format="json", HTTP_IF_MATCH=etag
+    )
+    assert stale.status_code == status.HTTP_412_PRECONDITION_FAILED
+    calendar_event.refresh_from_db()
+    assert calendar_event.event_name == "Renamed"
+
+
+def test_patch_calendar_event_requires_if_match(user_client, calendar_event):
+    url = reverse(f"{EVENTS_ENDPOINT_V1}-detail", args=[calendar_event.id])
+    response = user_client.patch(url, {"event_name": "Renamed"}, format="json")
+
+    assert response.status_code == status.HTTP_428_PRECONDITION_REQUIRED
+
+
+def test_only_owner_changes_calendar_event(client, calendar_event, participants):
+    url = reverse(f"{EVENTS_ENDPOINT_V1}-detail", args=[calendar_event.id])
+    client.force_authenticate(participants[0])
+
+    assert client.get(url).status_code == status.HTTP_200_OK
+    response = client.patch(
+        url, {"event_name": "Renamed"}, format="json", HTTP_IF_MATCH='"1"'
+    )
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
+def test_delete_calendar_event_with_if_match(user_client, calendar_event):
+    url = reverse(f"{EVENTS_ENDPOINT_V1}-detail", args=[calendar_event.id])
+
+    stale = user_client.delete(url, HTTP_IF_MATCH=f'"{calendar_event.version + 1}"')
+    assert stale.status_code == status.HTTP_412_PRECONDITION_FAILED
+
+    response = user_client.delete(url, HTTP_IF_MATCH=f'"{calendar_event.version}"')
+    assert response.status_code == status.HTTP_204_NO_CONTENT
+    assert not CalendarEvent.objects.filter(id=calendar_event.id).exists()
+
+
+def test_calendar_events_list_reads_locations_from_loaded_directory(
+    django_assert_num_queries, user_client, user, calendar_events
+):
+    ConferenceRoom.objects.update(manager=user)
+    url = reverse(f"{EVENTS_ENDPOINT_V1}-list")
+
+    # A cold directory is not loaded by the list, the rooms are joined.
+    with django_assert_num_queries(2) as context:
+        cold = user_client.get(url)
+    assert "events_conferenceroom" in context.captured_queries[0]["sql"]
+
+    room_directory.get(user.company_id)
+    with django_assert_num_queries(2) as context:
+        warm = user_client.get(url)
+    assert not any(
+        "events_conferenceroom" in query["sql"] for query in context.captured_queries
+    )
+    assert warm.data == cold.data
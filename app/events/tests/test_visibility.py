@@ -0,0 +1,86 @@
+from datetime import timedelta
+
+import pytest
+from django.core.management import CommandError, call_command
+from model_bakery import baker
+
+from events.models import EventVisibility
+
+pytestmark = pytest.mark.django_db
+
+
+def visible_user_ids(event):
+    return set(
+        EventVisibility.objects.filter(event=event).values_list("user_id", flat=True)
+    )
+
+
+def test_visibility_covers_owner_participants_and_room_manager(calendar_event):
+    expected = {calendar_event.owner_id, calendar_event.location.manager_id}
+    expected.update(calendar_event.participants.values_list("id", flat=True))
+
+    assert visible_user_ids(calendar_event) == expected
+    assert set(
+        EventVisibility.objects.filter(event=calendar_event).values_list(
+            "start", flat=True
+        )
+    ) == {calendar_event.start}
+
+
+def test_visibility_follows_participant_changes(calendar_event, participants):
+    removed = participants[0]
+    calendar_event.participants.remove(removed)
+    assert removed.id not in visible_user_ids(calendar_event)
+
+    removed.participating_events.add(calendar_event)
+    assert removed.id in visible_user_ids(calendar_event)
+
+    removed.participating_events.clear()
+    assert removed.id not in visible_user_ids(calendar_event)
+
+
+def test_visibility_follows_room_manager_changes(calendar_event):
+    new_manager = baker.make("accounts.User")
+    room = calendar_event.location
+    room.manager = new_manager
+    room.save()
+
+    assert new_manager.id in visible_user_ids(calendar_event)
+
+    room.delete()
+    assert new_manager.id not in visible_user_ids(calendar_event)
+
+
+def test_room_rename_leaves_visibility_alone(monkeypatch, calendar_event):
+    calls = []
+    monkeypatch.setattr(
+        "events.signals.sync_and_notify", lambda *args, **kwargs: calls.append(args)
+    )
+    room = calendar_event.location
+    room.name = "Renamed"
+    room.save()
+
+    assert calls == []
+    assert room.manager_id in visible_user_ids(calendar_event)
+
+
+def test_visibility_start_follows_event_reschedule(calendar_event):
+    calendar_event.start += timedelta(days=1)
+    calendar_event.end += timedelta(days=1)
+    calendar_event.save()
+
+    assert set(
+        EventVisibility.objects.filter(event=calendar_event).values_list(
+            "start", flat=True
+        )
+    ) == {calendar_event.start}
+
+
+def test_rebuild_event_visibility_command(calendar_events):
+    EventVisibility.objects.filter(event=calendar_events[0]).delete()
+
+    with pytest.raises(CommandError):
+        call_command("rebuild_event_visibility", "--check")
+
+    call_command("rebuild_event_visibility")
+    call_command("rebuild_event_visibility", "--check")
@@ -0,0 +1,105 @@
+from collections import Counter
+from datetime import datetime, time, timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from events.models import CalendarEvent, RoomUsageDaily
+
+USAGE_FIELDS = ("location_id", "start", "end")
+# Rollup columns, in the order of the values returned by ``usage_of``.
+USAGE_COLUMNS = ("booked_seconds", "event_count", "events_started")
+
+
+def split_by_day(start, end):
+    """
+    Yield ``(day, seconds)`` for every day in the default timezone that the
+    interval ``[start, end)`` touches.
+    """
+    tz = timezone.get_default_timezone()
+    day = start.astimezone(tz).date()
+    while True:
+        day_end = datetime.combine(day + timedelta(days=1), time.min, tzinfo=tz)
+        yield day, (
+            min(end, day_end) - max(start, day_end - timedelta(days=1))
+        ).total_seconds()
+        if end <= day_end:
+            return
+        day += timedelta(days=1)
+
+
+def usage_of(location_id, start, end):
+    """
+    Return ``{(room_id, day): (seconds, events, started)}`` contributed by one
+    event, ``started`` being 1 on the day it starts.
+    """
+    if not location_id or not start or not end or start >= end:
+        return {}
+    return {
+        (location_id, day): (int(seconds), 1, int(index == 0))
+        for index, (day, seconds) in enumerate(split_by_day(start, end))
+    }
+
+
+def apply_usage_change(old, new, using=None):
+    """
+    Adjust the rollup rows by the difference between an event's previous and
+    current ``(location_id, start, end)``; either side may be ``None``.
+    """
+    deltas = {field: Counter() for field in USAGE_COLUMNS}
+    for values, sign in ((old, -1), (new, 1)):
+        for key, usage in usage_of(*(values or (None,) * 3)).items():
+            for field, value in zip(USAGE_COLUMNS, usage):
+                deltas[field][key] += sign * value
+
+    with transaction.atomic(using=using):
+        for room_id, day in sorted(set().union(*deltas.values())):
+            delta = {field: deltas[field][room_id, day] for field in USAGE_COLUMNS}
+            if not any(delta.values()):
+                continue
+            rows = RoomUsageDaily.objects.using(using).filter(room_id=room_id, day=day)
+            changes = {field: F(field) + value for field, value in delta.items()}
+            # Nothing to take away from a row that went with its room.
+            if rows.update(**changes) or delta["event_count"] <= 0:
+                continue
+            try:
+                with transaction.atomic(using=using):
+                    RoomUsageDaily.objects.using(using).create(
+                        room_id=room_id, day=day, **delta
+                    )
+            except IntegrityError:
+                rows.update(**changes)
+
+
+def compute_room_usage(using=None):
+    """
+    Compute the whole rollup from scratch, as ``{(room_id, day): (seconds,
+    events, started)}``.
+    """
+    totals = {}
+    events = (
+        CalendarEvent.objects.using(using)
+        .filter(location__isnull=False)
+        .values_list(*USAGE_FIELDS)
+    )
+    for values in events.iterator(chunk_size=2000):
+        for key, usage in usage_of(*values).items():
+            totals[key] = tuple(map(sum, zip(totals.get(key, (0, 0, 0)), usage)))
+    return totals
+
+
+def rebuild_room_usage(using=None):
+    usage = compute_room_usage(using)
+    with transaction.atomic(using=using):
+        RoomUsageDaily.objects.using(using).all().delete()
+        RoomUsageDaily.objects.using(using).bulk_create(
+            [
+                RoomUsageDaily(
+                    room_id=room_id, day=day, **dict(zip(USAGE_COLUMNS, values))
+                )
+                for (room_id, day), values in sorted(usage.items())
+            ],
+            batch_size=1000,
+        )
+    return len(usage)
@@ -1,18 +1,107 @@
-from datetime import datetime
+import asyncio
+import json
+from datetime import timedelta
+from functools import cached_property
 
 import pytz
-from django.db.models import Q
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import router, transaction
+from django.db.models import Count, F, Q
 from django.db.models.functions import TruncDate
+from django.http import JsonResponse, StreamingHttpResponse
+from rest_framework.decorators import action
+from rest_framework.exceptions import APIException, NotAuthenticated, ValidationError
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
 from rest_framework.viewsets import GenericViewSet
-from rest_framework.permissions import IsAuthenticated
-from rest_framework.mixins import ListModelMixin, RetrieveModelMixin, CreateModelMixin
+from rest_framework.permissions import SAFE_METHODS, IsAuthenticated
+from rest_framework.mixins import (
+    CreateModelMixin,
+    DestroyModelMixin,
+    ListModelMixin,
+    RetrieveModelMixin,
+    UpdateModelMixin,
+)
 
-from events.models import CalendarEvent, ConferenceRoom
-from events.serializers.v1 import CalendarEventSerializer, ConferenceRoomSerializer
+from accounts.models import TenantShard, User
+from accounts.sharding import activate_shard, deactivate_shard, shard_map
+from api.authentication import PrincipalBasicAuthentication
+from api.cache import get_cache_version
+from api.idempotency import IdempotentCreateMixin
+from api.renderers import ColumnarJSONRenderer
+from api.throttling import TokenBucketThrottle
+from api.utils import (
+    PreconditionFailed,
+    TenantMoving,
+    bucket_days,
+    local_day_range,
+    parse_bucket_param,
+    parse_date_param,
+    parse_date_range,
+    parse_datetime_param,
+    parse_fields_param,
+    parse_ids_param,
+    parse_if_match,
+    parse_include_param,
+)
+from events.columnar import columnar_events
+from events.models import (
+    CalendarEvent,
+    ConferenceRoom,
+    EventVisibility,
+    RoomUsageDaily,
+)
+from events.outbox import enqueue_event_change
+from events.permissions import IsOwnerOrReadOnly
+from events.rooms import room_directory
+from events.scheduling import find_free_slots
+from events.sideloading import sideload_participants
+from events.slots import busy_rooms
+from events.streams import hub
+from events.serializers.v1 import (
+    MAX_MEETING_DURATION_HOURS,
+    SLOT_MINUTES,
+    CalendarEventSerializer,
+    ConferenceRoomSerializer,
+    SuggestedSlotSerializer,
+    SuggestTimesSerializer,
+)
 
+MAX_AGENDA_DAYS = 62
+MAX_COUNTS_DAYS = 62
+MAX_UTILIZATION_DAYS = 366
+MAX_MULTIGET_IDS = 100
+MAX_AVAILABILITY_DAYS = 7
 
-class BaseViewSet(CreateModelMixin, ListModelMixin, RetrieveModelMixin, GenericViewSet):
+
+class BaseViewSet(
+    IdempotentCreateMixin,
+    CreateModelMixin,
+    ListModelMixin,
+    RetrieveModelMixin,
+    GenericViewSet,
+):
     permission_classes = [IsAuthenticated]
+    throttle_classes = [TokenBucketThrottle]
+    shard_token = None
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        alias, status = shard_map.get(request.user.company_id)
+        if status == TenantShard.Status.MOVING and request.method not in SAFE_METHODS:
+            raise TenantMoving()
+        self.shard_token = activate_shard(alias)
+
+    def dispatch(self, request, *args, **kwargs):
+        # Errors left unhandled by DRF skip finalize_response.
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            if self.shard_token:
+                deactivate_shard(self.shard_token)
+                self.shard_token = None
 
 
 class ConferenceRoomViewSet(BaseViewSet):
@@ -23,32 +112,328 @@ class ConferenceRoomViewSet(BaseViewSet):
         queryset = super().get_queryset()
         return queryset.filter(manager__company_id=self.request.user.company_id)
 
+    def list(self, request, *args, **kwargs):
+        rooms = room_directory.get(request.user.company_id)
+        return Response([room._asdict() for room in rooms.values()])
+
+    @action(detail=False)
+    def availability(self, request):
+        tz = pytz.timezone(request.user.timezone)
+        start = parse_datetime_param(request.query_params, "start", tz)
+        end = parse_datetime_param(request.query_params, "end", tz)
+        if not start or not end:
+            raise ValidationError({"window": "Both 'start' and 'end' are required."})
+        if start >= end:
+            raise ValidationError({"window": "'start' must be earlier than 'end'."})
+        if end - start > timedelta(days=MAX_AVAILABILITY_DAYS):
+            raise ValidationError(
+                {
+                    "window": f"The window cannot be longer than {MAX_AVAILABILITY_DAYS} days."
+                }
+            )
+
+        rooms = room_directory.get(request.user.company_id)
+        busy = busy_rooms(list(rooms), start, end)
+        return Response(
+            [{**room._asdict(), "free": room.id not in busy} for room in rooms.values()]
+        )
+
+    @action(detail=True)
+    def utilization(self, request, pk=None):
+        room = self.get_object()
+        first_day, last_day = parse_date_range(
+            request.query_params, MAX_UTILIZATION_DAYS
+        )
+        bucket = parse_bucket_param(request.query_params)
+        days = bucket_days(first_day, last_day, bucket)
+
+        buckets = {
+            key: {"start": key, "days": 0, "booked_seconds": 0, "event_count": 0}
+            for key in days.values()
+        }
+        for day in days:
+            buckets[days[day]]["days"] += 1
+        # A bucket's events are those on its first day and those starting on
+        # the others, so multi-day events are counted once per bucket.
+        for (
+            day,
+            booked_seconds,
+            event_count,
+            events_started,
+        ) in RoomUsageDaily.objects.filter(
+            room=room, day__range=(first_day, last_day)
+        ).values_list(
+            "day", "booked_seconds", "event_count", "events_started"
+        ):
+            buckets[days[day]]["booked_seconds"] += booked_seconds
+            buckets[days[day]]["event_count"] += (
+                event_count if days[day] == day else events_started
+            )
+
+        for data in buckets.values():
+            data["occupancy"] = round(
+                data["booked_seconds"]
+                / timedelta(days=data.pop("days")).total_seconds(),
+                4,
+            )
+        return Response(
+            {
+                "room": room.id,
+                "from": first_day,
+                "to": last_day,
+                "bucket": bucket,
+                "buckets": list(buckets.values()),
+            }
+        )
+
 
-class CalendarEventViewSet(BaseViewSet):
+class CalendarEventViewSet(UpdateModelMixin, DestroyModelMixin, BaseViewSet):
     queryset = CalendarEvent.objects.all()
     serializer_class = CalendarEventSerializer
+    permission_classes = [*BaseViewSet.permission_classes, IsOwnerOrReadOnly]
+    http_method_names = ["get", "post", "patch", "delete", "head", "options"]
+
+    # Columns loaded for each serializer field, participants are prefetched.
+    FIELD_COLUMNS = {
+        "owner": ["owner__email"],
+        "location": ["location_id"],
+        "participants": [],
+    }
+    INCLUDES = ["participants"]
 
     def get_queryset(self):
         queryset = super().get_queryset()
-        return (
-            queryset.filter(owner__company_id=self.request.user.company_id)
-            .select_related("location", "owner")
-            .prefetch_related("participants")
-        ).distinct()
+        queryset = queryset.filter(owner__company_id=self.request.user.company_id)
+        fields = self.requested_fields
+        # Sideloaded participants come from their own query instead.
+        prefetch = [] if "participants" in self.requested_includes else ["participants"]
+        # Without the room directory, addresses are joined rather than loaded.
+        join = ["location"] if self.rooms is None else []
+        if fields is None:
+            return queryset.select_related("owner", *join).prefetch_related(*prefetch)
+
+        columns = {"id"}
+        if self.action == "agenda":
+            columns.update(["start", "end"])
+        for name in fields:
+            columns.update(self.FIELD_COLUMNS.get(name, [name]))
+        if "owner" in fields:
+            queryset = queryset.select_related("owner")
+        if "location" in fields and join:
+            queryset = queryset.select_related(*join)
+            columns.add("location__address")
+        if "participants" in fields:
+            queryset = queryset.prefetch_related(*prefetch)
+        return queryset.only(*columns)
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context["fields"] = self.requested_fields
+        context["rooms"] = self.rooms or {}
+        return context
+
+    @cached_property
+    def rooms(self):
+        """
+        The company's room directory when it is loaded. Reading events does
+        not load it, as that would cost more than joining their rooms.
+        """
+        return room_directory.peek(self.request.user.company_id)
+
+    @cached_property
+    def requested_fields(self):
+        """
+        Serializer fields named in ``?fields=`` when reading events, ``None``
+        for all of them.
+        """
+        if self.action not in ("list", "retrieve", "agenda"):
+            return None
+        return parse_fields_param(
+            self.request.query_params, CalendarEventSerializer.Meta.fields
+        )
+
+    @cached_property
+    def requested_includes(self):
+        """
+        Related resources to sideload requested through ``?include=`` on
+        lists. Participants are only sideloaded when they are serialized.
+        """
+        if self.action != "list":
+            return set()
+        includes = parse_include_param(self.request.query_params, self.INCLUDES)
+        if self.requested_fields is not None and "participants" not in (
+            self.requested_fields
+        ):
+            includes.discard("participants")
+        return includes
+
+    def get_renderers(self):
+        renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES
+        if self.action == "list":
+            renderer_classes = [*renderer_classes, ColumnarJSONRenderer]
+        return [renderer() for renderer in renderer_classes]
+
+    def list(self, request, *args, **kwargs):
+        columnar = request.accepted_renderer.format == ColumnarJSONRenderer.format
+        if columnar and self.requested_includes:
+            # The columnar layout already lists every email once.
+            raise ValidationError(
+                {"include": "Includes cannot be combined with the columnar format."}
+            )
+        if columnar and self.requested_fields is not None:
+            # Every column is always sent, so a projection would be ignored.
+            raise ValidationError(
+                {"fields": "Fields cannot be combined with the columnar format."}
+            )
+        queryset = self.filter_queryset(self.get_queryset())
+        if columnar:
+            data = columnar_events(queryset, self.rooms, self.user_timezone)
+            found = set(data["columns"]["id"])
+        else:
+            events = list(queryset)
+            found = {event.id for event in events}
+            serializer = self.get_serializer(events, many=True)
+            if "participants" in self.requested_includes:
+                participant_ids, users = sideload_participants(found)
+                serializer.context["participant_ids"] = participant_ids
+            data = serializer.data
+
+        if self.requested_ids is None and not self.requested_includes:
+            return Response(data)
+        data = {"results": data}
+        if self.requested_ids is not None:
+            # Ids that do not exist, belong to another company or are not
+            # visible to the user are all reported the same way.
+            data["missing"] = [pk for pk in self.requested_ids if pk not in found]
+        if "participants" in self.requested_includes:
+            data["participants"] = users
+        return Response(data)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if self.action in ("retrieve", "partial_update") and "version" in (
+            response.data or {}
+        ):
+            response["ETag"] = f'"{response.data["version"]}"'
+        return response
+
+    def perform_create(self, serializer):
+        with transaction.atomic(using=router.db_for_write(CalendarEvent)):
+            serializer.save()
+            enqueue_event_change(
+                self.request.user.company_id, "event.created", serializer.instance
+            )
+
+    def perform_update(self, serializer):
+        with transaction.atomic(using=router.db_for_write(CalendarEvent)):
+            self.claim_version(serializer.instance)
+            serializer.save()
+            enqueue_event_change(
+                self.request.user.company_id, "event.updated", serializer.instance
+            )
+
+    def perform_destroy(self, instance):
+        with transaction.atomic(using=router.db_for_write(CalendarEvent)):
+            self.claim_version(instance)
+            enqueue_event_change(
+                self.request.user.company_id, "event.deleted", instance
+            )
+            instance.delete()
+
+    def claim_version(self, event):
+        """
+        Move the event to its next version if it still is the one named by
+        ``If-Match``. The conditional update stands in for a row lock, a
+        concurrent editor's claim then matches no row.
+        """
+        expected = parse_if_match(self.request)
+        if not CalendarEvent.objects.filter(pk=event.pk, version=expected).update(
+            version=F("version") + 1
+        ):
+            raise PreconditionFailed()
+        event.version = expected + 1
 
     def filter_queryset(self, queryset):
         queryset = self.filter_by_scope(queryset)
+        queryset = self.filter_by_ids(queryset)
         queryset = self.filter_by_query(queryset)
-        queryset = self.filter_by_day(queryset)
+        queryset = self.filter_by_time_window(queryset)
+        queryset = self.filter_by_range(queryset)
         queryset = self.filter_by_location(queryset)
         return super().filter_queryset(queryset)
 
-    def filter_by_scope(self, queryset):
-        user = self.request.user
-        return queryset.filter(
-            Q(owner=user) | Q(participants=user) | Q(location__manager=user)
+    @cached_property
+    def requested_ids(self):
+        """
+        Event ids requested through ``?ids=`` on lists, ``None`` otherwise.
+        """
+        if self.action != "list":
+            return None
+        return parse_ids_param(self.request.query_params, "ids", MAX_MULTIGET_IDS)
+
+    @cached_property
+    def user_timezone(self):
+        return pytz.timezone(self.request.user.timezone)
+
+    @cached_property
+    def time_window(self):
+        """
+        Whole local days ``(start, end)`` requested through the ``day`` or
+        agenda parameters, or ``None`` when the request is not bounded to days.
+        """
+        params = self.request.query_params
+        if self.action in ("agenda", "counts"):
+            max_days = MAX_AGENDA_DAYS if self.action == "agenda" else MAX_COUNTS_DAYS
+            first_day, last_day = parse_date_range(params, max_days)
+            return local_day_range(first_day, last_day, self.user_timezone)
+        if day := parse_date_param(params, "day"):
+            return local_day_range(day, day, self.user_timezone)
+        return None
+
+    @cached_property
+    def time_range(self):
+        """
+        Explicit ``(start_after, end_before)`` bounds, either may be ``None``.
+        """
+        params = self.request.query_params
+        return (
+            parse_datetime_param(params, "start_after", self.user_timezone),
+            parse_datetime_param(params, "end_before", self.user_timezone),
         )
 
+    def get_start_bounds(self):
+        """
+        Bounds on ``start`` implied by the time filters, used to turn the
+        visibility lookup into a single index range scan.
+        """
+        lower, upper = [], []
+        if self.time_window:
+            # Events never last longer than the maximum meeting duration, so
+            # anything touching the window starts within this range.
+            window_start, window_end = self.time_window
+            lower.append(window_start - timedelta(hours=MAX_MEETING_DURATION_HOURS))
+            upper.append(window_end)
+        start_after, end_before = self.time_range
+        if start_after:
+            lower.append(start_after)
+        if end_before:
+            upper.append(end_before)
+        return max(lower, default=None), min(upper, default=None)
+
+    def filter_by_scope(self, queryset):
+        visible_events = EventVisibility.objects.filter(user_id=self.request.user.id)
+        lower, upper = self.get_start_bounds()
+        if lower:
+            visible_events = visible_events.filter(start__gte=lower)
+        if upper:
+            visible_events = visible_events.filter(start__lt=upper)
+        return queryset.filter(id__in=visible_events.values("event_id"))
+
+    def filter_by_ids(self, queryset):
+        if self.requested_ids is not None:
+            queryset = queryset.filter(id__in=self.requested_ids)
+        return queryset
+
     def filter_by_query(self, queryset):
         if query := self.request.query_params.get("query"):
             queryset = queryset.filter(
@@ -56,18 +441,204 @@ class CalendarEventViewSet(BaseViewSet):
             )
         return queryset
 
-    def filter_by_day(self, queryset):
-        if day := self.request.query_params.get("day"):
-            user_tz = pytz.timezone(self.request.user.timezone)
-            queryset = (
-                queryset.annotate(
-                    tz_start=TruncDate("start", tzinfo=user_tz),
-                    tz_end=TruncDate("end", tzinfo=user_tz),
-                )
-                .filter(Q(tz_start=day) | Q(tz_end=day)))
+    def filter_by_time_window(self, queryset):
+        if self.time_window:
+            window_start, window_end = self.time_window
+            queryset = queryset.filter(
+                Q(start__gte=window_start, start__lt=window_end)
+                | Q(end__gte=window_start, end__lt=window_end)
+            )
+        return queryset
+
+    def filter_by_range(self, queryset):
+        start_after, end_before = self.time_range
+        if start_after:
+            queryset = queryset.filter(start__gte=start_after)
+        if end_before:
+            queryset = queryset.filter(end__lte=end_before)
         return queryset
 
     def filter_by_location(self, queryset):
         if location_id := self.request.query_params.get("location_id"):
             queryset = queryset.filter(location_id=location_id)
         return queryset
+
+    @action(detail=False)
+    def agenda(self, request):
+        bucket = parse_bucket_param(request.query_params)
+        window_start, window_end = self.time_window
+        days = bucket_days(
+            window_start.date(), window_end.date() - timedelta(days=1), bucket
+        )
+        buckets = {key: [] for key in days.values()}
+
+        queryset = self.filter_queryset(self.get_queryset()).order_by("start")
+        serializer = self.get_serializer(queryset, many=True)
+        for event, data in zip(queryset, serializer.data):
+            event_days = {
+                event.start.astimezone(self.user_timezone).date(),
+                event.end.astimezone(self.user_timezone).date(),
+            }
+            for key in sorted({days[day] for day in event_days if day in days}):
+                buckets[key].append(data)
+
+        return Response(
+            {
+                "from": min(days),
+                "to": max(days),
+                "bucket": bucket,
+                "buckets": [
+                    {"start": key, "events": events} for key, events in buckets.items()
+                ],
+            }
+        )
+
+    @action(detail=False)
+    def counts(self, request):
+        window_start, window_end = self.time_window
+        first_day = window_start.date()
+        last_day = window_end.date() - timedelta(days=1)
+        key = f"event-counts:{request.user.id}:{request.user.timezone}:{first_day}:{last_day}"
+        version = get_cache_version(f"visibility:{request.user.id}")
+        if (days := cache.get(key, version=version)) is None:
+            counts = dict(
+                # Events are counted on the local day they start, grouped over
+                # the (user, start) index of the visibility rows.
+                EventVisibility.objects.filter(
+                    user_id=request.user.id,
+                    start__gte=window_start,
+                    start__lt=window_end,
+                )
+                .annotate(day=TruncDate("start", tzinfo=self.user_timezone))
+                .values_list("day")
+                .annotate(count=Count("id"))
+                .order_by()
+            )
+            days = [
+                {"day": day, "count": counts.get(day, 0)}
+                for day in bucket_days(first_day, last_day, "day")
+            ]
+            cache.set(key, days, settings.EVENT_COUNTS_CACHE_TTL, version=version)
+        return Response({"from": first_day, "to": last_day, "days": days})
+
+    @action(detail=False, url_path="suggest-times")
+    def suggest_times(self, request):
+        serializer = SuggestTimesSerializer(
+            data=request.query_params, context=self.get_serializer_context()
+        )
+        serializer.is_valid(raise_exception=True)
+        params = serializer.validated_data
+        window = (params["start"], params["end"])
+        user_ids = set(params["participants"]) | {request.user.id}
+        room_ids = params.get("rooms")
+
+        # A single range query over events touching the window, classified
+        # into participant and room busy intervals below.
+        busy_filter = Q(owner_id__in=user_ids) | Q(participants__in=user_ids)
+        if room_ids:
+            busy_filter |= Q(location_id__in=room_ids)
+        events = (
+            CalendarEvent.objects.filter(
+                busy_filter,
+                start__gte=window[0] - timedelta(hours=MAX_MEETING_DURATION_HOURS),
+                start__lt=window[1],
+                end__gt=window[0],
+            )
+            .values_list("start", "end", "owner_id", "participants", "location_id")
+            .distinct()
+        )
+        participant_busy = []
+        room_busy = {room_id: [] for room_id in room_ids} if room_ids else None
+        for start, end, owner_id, participant_id, location_id in events:
+            if owner_id in user_ids or participant_id in user_ids:
+                participant_busy.append((start, end))
+            if room_busy is not None and location_id in room_busy:
+                room_busy[location_id].append((start, end))
+
+        timezones = set(
+            User.objects.filter(id__in=user_ids).values_list("timezone", flat=True)
+        )
+        slots = find_free_slots(
+            window,
+            timedelta(minutes=params["duration"]),
+            timezones,
+            participant_busy,
+            room_busy,
+            limit=params["limit"],
+            step=timedelta(minutes=SLOT_MINUTES),
+            working_hours=settings.WORKING_HOURS,
+            working_days=settings.WORKING_DAYS,
+        )
+        data = [
+            {"start": start, "end": end, "location": room_id}
+            for start, end, room_id in slots
+        ]
+        return Response(
+            SuggestedSlotSerializer(
+                data, many=True, context=self.get_serializer_context()
+            ).data
+        )
+
+
+def resolve_stream_topic(request):
+    """
+    Authenticate a stream request and return the topic it subscribes to, the
+    user's own events or, with ``?room=<id>``, one of the company's rooms.
+    """
+    authenticator = PrincipalBasicAuthentication()
+    if not (result := authenticator.authenticate(request)):
+        raise NotAuthenticated()
+    user, _ = result
+    if not (room := request.GET.get("room")):
+        return f"user:{user.id}"
+
+    alias, _ = shard_map.get(user.company_id)
+    token = activate_shard(alias)
+    try:
+        rooms = room_directory.get(user.company_id)
+    finally:
+        deactivate_shard(token)
+    if not room.isdigit() or int(room) not in rooms:
+        raise ValidationError({"room": "Unknown conference room."})
+    return f"room:{room}"
+
+
+async def event_stream(subscription):
+    try:
+        yield "retry: 5000\n\n"
+        while True:
+            try:
+                message = await asyncio.wait_for(
+                    subscription.queue.get(), settings.STREAM_KEEPALIVE
+                )
+            except TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            if subscription.lagged:
+                subscription.lagged = False
+                yield "event: resync\ndata: {}\n\n"
+            yield f"event: {message['type']}\ndata: {json.dumps(message)}\n\n"
+    finally:
+        hub.unsubscribe(subscription)
+
+
+async def calendar_event_stream(request):
+    """
+    Server-sent events announcing changes to the events visible to the user
+    or booked in a room. Messages only carry the event id, clients fetch
+    what they need through the regular endpoints. Served under ASGI.
+    """
+    try:
+        topic = await sync_to_async(resolve_stream_topic)(request)
+    except APIException as exc:
+        detail = exc.detail if isinstance(exc.detail, dict) else {"detail": exc.detail}
+        response = JsonResponse(detail, status=exc.status_code)
+        if exc.status_code == 401:
+            response["WWW-Authenticate"] = 'Basic realm="api"'
+        return response
+
+    return StreamingHttpResponse(
+        event_stream(hub.subscribe(topic)),
+        content_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
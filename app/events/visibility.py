@@ -0,0 +1,118 @@
+from collections import defaultdict
+
+from django.db import transaction
+
+from api.cache import bump_cache_version
+from events.models import CalendarEvent, EventVisibility
+
+
+def expected_visibility(event_ids, using=None):
+    """
+    Return ``{(user_id, event_id): start}`` for every user that should see
+    one of the given events.
+    """
+    events = CalendarEvent.objects.using(using).filter(id__in=event_ids)
+    participants = CalendarEvent.participants.through.objects.using(using).filter(
+        calendarevent_id__in=event_ids
+    )
+
+    expected = {}
+    starts = {}
+    for event_id, start, owner_id, manager_id in events.values_list(
+        "id", "start", "owner_id", "location__manager_id"
+    ):
+        starts[event_id] = start
+        expected[(owner_id, event_id)] = start
+        if manager_id:
+            expected[(manager_id, event_id)] = start
+
+    for event_id, user_id in participants.values_list("calendarevent_id", "user_id"):
+        if event_id in starts:
+            expected[(user_id, event_id)] = starts[event_id]
+
+    return expected
+
+
+def invalidate_visible_events(user_ids):
+    """
+    Drop cached data derived from the events visible to the given users.
+    """
+    for user_id in set(user_ids):
+        bump_cache_version(f"visibility:{user_id}")
+
+
+def sync_event_visibility(event_ids, using=None):
+    """
+    Bring the visibility rows of the given events in line with their owner,
+    participants and location manager, touching only the rows that changed.
+    Returns ``{event_id: user_ids}`` of the users that see or saw each event.
+    """
+    event_ids = list(event_ids)
+    if not event_ids:
+        return {}
+
+    with transaction.atomic(using=using):
+        expected = expected_visibility(event_ids, using=using)
+        existing = {
+            (user_id, event_id): (pk, start)
+            for pk, user_id, event_id, start in EventVisibility.objects.using(using)
+            .filter(event_id__in=event_ids)
+            .values_list("id", "user_id", "event_id", "start")
+        }
+
+        stale = [pk for key, (pk, _) in existing.items() if key not in expected]
+        missing = [
+            EventVisibility(user_id=user_id, event_id=event_id, start=start)
+            for (user_id, event_id), start in expected.items()
+            if (user_id, event_id) not in existing
+        ]
+        moved = defaultdict(list)
+        for key, (pk, start) in existing.items():
+            if key in expected and expected[key] != start:
+                moved[expected[key]].append(pk)
+
+        if stale:
+            EventVisibility.objects.using(using).filter(id__in=stale).delete()
+        if missing:
+            EventVisibility.objects.using(using).bulk_create(missing)
+        for start, pks in moved.items():
+            EventVisibility.objects.using(using).filter(id__in=pks).update(start=start)
+
+    changed = expected.keys() ^ existing.keys()
+    changed.update(
+        key
+        for key in expected.keys() & existing.keys()
+        if expected[key] != existing[key][1]
+    )
+    invalidate_visible_events(user_id for user_id, _ in changed)
+
+    viewers = defaultdict(set)
+    for user_id, event_id in expected.keys() | existing.keys():
+        viewers[event_id].add(user_id)
+    return dict(viewers)
+
+
+def find_visibility_drift(batch_size=1000, using=None):
+    """
+    Yield ids of events whose visibility rows do not match the source tables.
+    """
+    events = CalendarEvent.objects.using(using).order_by("id")
+    last_id = 0
+    while batch := list(
+        events.filter(id__gt=last_id).values_list("id", flat=True)[:batch_size]
+    ):
+        last_id = batch[-1]
+        expected = expected_visibility(batch, using=using)
+        existing = {
+            (user_id, event_id): start
+            for user_id, event_id, start in EventVisibility.objects.using(using)
+            .filter(event_id__in=batch)
+            .values_list("user_id", "event_id", "start")
+        }
+        drifted = {event_id for _, event_id in expected.keys() ^ existing.keys()}
+        drifted.update(
+            event_id
+            for (user_id, event_id), start in expected.items()
+            if existing.get((user_id, event_id), start) != start
+        )
+        yield from sorted(drifted)
@@ -0,0 +1,26 @@
+from django.contrib import admin
+
+from core.paginator import EstimatedCountPaginator
+from webhooks.models import OutboxMessage, WebhookDelivery, WebhookEndpoint
+
+
+@admin.register(WebhookEndpoint)
+class WebhookEndpointAdmin(admin.ModelAdmin):
+    list_display = ("url", "company_id", "is_active", "failure_count", "retry_at")
+    list_filter = ("is_active",)
+
+
+@admin.register(OutboxMessage)
+class OutboxMessageAdmin(admin.ModelAdmin):
+    list_display = ("id", "topic", "company_id", "created_at", "dispatched_at")
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+@admin.register(WebhookDelivery)
+class WebhookDeliveryAdmin(admin.ModelAdmin):
+    list_display = ("id", "endpoint", "message", "attempts", "delivered_at")
+    list_select_related = ("endpoint", "message")
+    raw_id_fields = ("endpoint", "message")
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
@@ -0,0 +1,174 @@
+import asyncio
+from collections import defaultdict
+from datetime import timedelta
+
+import httpx
+from django.conf import settings
+from django.db import connections, transaction
+from django.utils import timezone
+
+from webhooks.models import OutboxMessage, WebhookDelivery, WebhookEndpoint
+
+
+def backoff(attempts):
+    base, limit = settings.WEBHOOK_BACKOFF
+    return timedelta(seconds=min(base * 2 ** (attempts - 1), limit))
+
+
+def dispatch_outbox(batch_size, using):
+    """
+    Fan a batch of pending outbox messages out to deliveries for the active
+    endpoints of their companies. Returns the number of messages dispatched.
+    """
+    with transaction.atomic(using=using):
+        messages = OutboxMessage.objects.using(using).filter(dispatched_at__isnull=True)
+        if connections[using].features.has_select_for_update_skip_locked:
+            messages = messages.select_for_update(skip_locked=True)
+        messages = list(messages.order_by("id")[:batch_size])
+        if not messages:
+            return 0
+
+        endpoints = defaultdict(list)
+        for endpoint_id, company_id in (
+            WebhookEndpoint.objects.using(using)
+            .filter(company_id__in={message.company_id for message in messages})
+            .filter(is_active=True)
+            .values_list("id", "company_id")
+        ):
+            endpoints[company_id].append(endpoint_id)
+
+        WebhookDelivery.objects.using(using).bulk_create(
+            [
+                WebhookDelivery(message=message, endpoint_id=endpoint_id)
+                for message in messages
+                for endpoint_id in endpoints[message.company_id]
+            ]
+        )
+        OutboxMessage.objects.using(using).filter(
+            id__in=[message.id for message in messages]
+        ).update(dispatched_at=timezone.now())
+    return len(messages)
+
+
+def claim_deliveries(batch_size, using):
+    """
+    Return a batch of due deliveries after leasing their endpoints for
+    ``settings.WEBHOOK_LEASE`` seconds. Other workers skip leased endpoints
+    until ``record_results`` releases them, so every endpoint is posted to by
+    a single worker, in order.
+    """
+    now = timezone.now()
+    lease_until = now + timedelta(seconds=settings.WEBHOOK_LEASE)
+    with transaction.atomic(using=using):
+        deliveries = list(
+            WebhookDelivery.objects.using(using)
+            .filter(next_attempt_at__lte=now, endpoint__is_active=True)
+            .exclude(endpoint__retry_at__gt=now)
+            .select_related("message", "endpoint")
+            .order_by("next_attempt_at", "id")[:batch_size]
+        )
+        # The conditional update only succeeds for the first worker to get
+        # there, concurrent claims wait for its row lock and then skip.
+        claimed = {
+            endpoint_id
+            for endpoint_id in {delivery.endpoint_id for delivery in deliveries}
+            if WebhookEndpoint.objects.using(using)
+            .filter(id=endpoint_id)
+            .exclude(retry_at__gt=now)
+            .update(retry_at=lease_until)
+        }
+    return [delivery for delivery in deliveries if delivery.endpoint_id in claimed]
+
+
+async def post_in_order(client, deliveries, semaphore):
+    """
+    Post one endpoint's deliveries in message order, stopping at the first
+    failure so the endpoint can back off. Returns ``{delivery: error}`` for
+    every attempted delivery, ``None`` meaning success.
+    """
+    results = {}
+    async with semaphore:
+        for delivery in sorted(deliveries, key=lambda delivery: delivery.message_id):
+            message = delivery.message
+            try:
+                response = await client.post(
+                    delivery.endpoint.url,
+                    json={
+                        "id": message.id,
+                        "topic": message.topic,
+                        "created_at": message.created_at.isoformat(),
+                        "data": message.payload,
+                    },
+                    headers={"X-Chronos-Delivery": str(delivery.id)},
+                )
+                response.raise_for_status()
+            except httpx.HTTPError as exc:
+                results[delivery] = str(exc) or exc.__class__.__name__
+                break
+            results[delivery] = None
+    return results
+
+
+async def post_deliveries(deliveries, concurrency, timeout):
+    by_endpoint = defaultdict(list)
+    for delivery in deliveries:
+        by_endpoint[delivery.endpoint_id].append(delivery)
+
+    semaphore = asyncio.Semaphore(concurrency)
+    async with httpx.AsyncClient(timeout=timeout) as client:
+        results = await asyncio.gather(
+            *(
+                post_in_order(client, endpoint_deliveries, semaphore)
+                for endpoint_deliveries in by_endpoint.values()
+            )
+        )
+    return {delivery: error for result in results for delivery, error in result.items()}
+
+
+def record_results(results, using):
+    now = timezone.now()
+    failed_endpoints = {}
+    with transaction.atomic(using=using):
+        for delivery, error in results.items():
+            delivery.attempts += 1
+            if error is None:
+                delivery.delivered_at = now
+                delivery.next_attempt_at = None
+                delivery.last_error = ""
+            else:
+                delivery.last_error = error
+                delivery.next_attempt_at = (
+                    now + backoff(delivery.attempts)
+                    if delivery.attempts < settings.WEBHOOK_MAX_ATTEMPTS
+                    else None
+                )
+                failed_endpoints[delivery.endpoint_id] = delivery.endpoint
+        WebhookDelivery.objects.using(using).bulk_update(
+            results, ["attempts", "delivered_at", "next_attempt_at", "last_error"]
+        )
+
+        succeeded = {delivery.endpoint_id for delivery in results} - set(
+            failed_endpoints
+        )
+        WebhookEndpoint.objects.using(using).filter(id__in=succeeded).update(
+            failure_count=0, retry_at=None
+        )
+        for endpoint in failed_endpoints.values():
+            endpoint.failure_count += 1
+            endpoint.retry_at = now + backoff(endpoint.failure_count)
+        WebhookEndpoint.objects.using(using).bulk_update(
+            failed_endpoints.values(), ["failure_count", "retry_at"]
+        )
+
+
+def deliver_batch(batch_size, concurrency, timeout, using):
+    """
+    Dispatch pending outbox messages and attempt one batch of due deliveries.
+    Returns the number of deliveries attempted.
+    """
+    dispatch_outbox(batch_size, using)
+    deliveries = claim_deliveries(batch_size, using)
+    if deliveries:
+        results = asyncio.run(post_deliveries(deliveries, concurrency, timeout))
+        record_results(results, using)
+    return len(deliveries)
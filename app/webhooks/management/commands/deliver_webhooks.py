@@ -0,0 +1,48 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from webhooks.delivery import deliver_batch
+
+
+class Command(BaseCommand):
+    help = "Drain the outbox and deliver change notifications to webhook endpoints."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=100)
+        parser.add_argument("--concurrency", type=int, default=10)
+        parser.add_argument("--timeout", type=float, default=10.0)
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=1.0,
+            help="Seconds to sleep when there is nothing to deliver.",
+        )
+        parser.add_argument(
+            "--once", action="store_true", help="Deliver a single batch and exit."
+        )
+        parser.add_argument(
+            "--database",
+            default="default",
+            help="Database to drain. Every shard needs a worker of its own.",
+        )
+
+    def handle(
+        self,
+        *args,
+        batch_size,
+        concurrency,
+        timeout,
+        interval,
+        once,
+        database,
+        **options,
+    ):
+        while True:
+            attempted = deliver_batch(batch_size, concurrency, timeout, using=database)
+            if attempted:
+                self.stdout.write(f"Attempted {attempted} delivery(ies).")
+            if once:
+                return
+            if not attempted:
+                time.sleep(interval)
@@ -0,0 +1,56 @@
+from django.db import models
+from django.db.models import Q
+from django.utils import timezone
+
+
+class WebhookEndpoint(models.Model):
+    company_id = models.UUIDField(db_index=True)
+    url = models.URLField()
+    is_active = models.BooleanField(default=True)
+    failure_count = models.PositiveIntegerField(default=0)
+    retry_at = models.DateTimeField(null=True, blank=True)
+
+
+class OutboxMessage(models.Model):
+    """
+    Change notification written in the same transaction as the change itself
+    and fanned out to the company's endpoints by ``deliver_webhooks``.
+    """
+
+    company_id = models.UUIDField()
+    topic = models.CharField(max_length=100)
+    payload = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    dispatched_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["id"],
+                condition=Q(dispatched_at__isnull=True),
+                name="outbox_pending_idx",
+            )
+        ]
+
+
+class WebhookDelivery(models.Model):
+    message = models.ForeignKey(
+        OutboxMessage, on_delete=models.CASCADE, related_name="deliveries"
+    )
+    endpoint = models.ForeignKey(
+        WebhookEndpoint, on_delete=models.CASCADE, related_name="deliveries"
+    )
+    attempts = models.PositiveIntegerField(default=0)
+    # Cleared once delivered or given up on.
+    next_attempt_at = models.DateTimeField(null=True, default=timezone.now)
+    delivered_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["next_attempt_at"],
+                condition=Q(next_attempt_at__isnull=False),
+                name="delivery_due_idx",
+            )
+        ]
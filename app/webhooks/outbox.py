@@ -0,0 +1,11 @@
+from webhooks.models import OutboxMessage
+
+
+def enqueue(company_id, topic, payload, using=None):
+    """
+    Record a change notification. Call it inside the transaction that makes
+    the change, so the message exists if and only if the change does.
+    """
+    return OutboxMessage.objects.using(using).create(
+        company_id=company_id, topic=topic, payload=payload
+    )
@@ -0,0 +1,146 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+from model_bakery import baker
+
+from conftest import USER_COMPANY_UUID
+from webhooks import delivery
+from webhooks.delivery import deliver_batch
+from webhooks.models import OutboxMessage, WebhookDelivery
+from webhooks.outbox import enqueue
+
+pytestmark = pytest.mark.django_db
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        self.server.received.append(json.loads(body))
+        self.send_response(self.server.status)
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server():
+    server = HTTPServer(("127.0.0.1", 0), StubHandler)
+    server.received = []
+    server.status = 204
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def endpoint(stub_server):
+    host, port = stub_server.server_address
+    return baker.make(
+        "webhooks.WebhookEndpoint",
+        company_id=USER_COMPANY_UUID,
+        url=f"http://{host}:{port}/hook",
+    )
+
+
+def test_created_event_is_written_to_outbox(user_client):
+    payload = {
+        "event_name": "Outbox",
+        "agenda": "Outbox",
+        "start": "2024-11-21T10:00:00Z",
+        "end": "2024-11-21T11:00:00Z",
+        "participants": [],
+    }
+    response = user_client.post("/api/v1/calendar-events/", payload, format="json")
+    assert response.status_code == 201
+
+    message = OutboxMessage.objects.get()
+    assert message.topic == "event.created"
+    assert str(message.company_id) == USER_COMPANY_UUID
+    assert message.payload["id"] == response.data["id"]
+
+
+def test_updated_and_deleted_events_are_written_to_outbox(user_client, user):
+    event = baker.make("events.CalendarEvent", owner=user)
+    url = f"/api/v1/calendar-events/{event.id}/"
+
+    response = user_client.patch(
+        url, {"event_name": "Renamed"}, format="json", HTTP_IF_MATCH='"1"'
+    )
+    assert response.status_code == 200
+    response = user_client.delete(url, HTTP_IF_MATCH='"2"')
+    assert response.status_code == 204
+
+    updated, deleted = OutboxMessage.objects.order_by("id")
+    assert (updated.topic, updated.payload["event_name"]) == (
+        "event.updated",
+        "Renamed",
+    )
+    assert (deleted.topic, deleted.payload) == ("event.deleted", {"id": event.id})
+
+
+def test_deliver_webhooks_posts_messages_in_order(stub_server, endpoint):
+    first = enqueue(USER_COMPANY_UUID, "event.created", {"id": 1})
+    second = enqueue(USER_COMPANY_UUID, "event.created", {"id": 2})
+    enqueue(baker.make("accounts.User").company_id, "event.created", {"id": 3})
+
+    call_command("deliver_webhooks", "--once")
+
+    assert [body["id"] for body in stub_server.received] == [first.id, second.id]
+    assert stub_server.received[0]["data"] == {"id": 1}
+    assert not OutboxMessage.objects.filter(dispatched_at__isnull=True).exists()
+    assert all(
+        delivery.delivered_at and delivery.next_attempt_at is None
+        for delivery in WebhookDelivery.objects.all()
+    )
+
+
+def test_failed_delivery_backs_off_endpoint(stub_server, endpoint):
+    stub_server.status = 500
+    enqueue(USER_COMPANY_UUID, "event.created", {"id": 1})
+    enqueue(USER_COMPANY_UUID, "event.created", {"id": 2})
+
+    call_command("deliver_webhooks", "--once")
+
+    # The endpoint stops at the first failure so messages stay in order.
+    assert len(stub_server.received) == 1
+    failed, pending = WebhookDelivery.objects.order_by("message_id")
+    assert failed.attempts == 1
+    assert failed.next_attempt_at > timezone.now()
+    assert "500" in failed.last_error
+    assert pending.attempts == 0
+
+    endpoint.refresh_from_db()
+    assert endpoint.failure_count == 1
+    assert endpoint.retry_at > timezone.now()
+
+    call_command("deliver_webhooks", "--once")
+    assert len(stub_server.received) == 1
+
+
+def test_overlapping_workers_do_not_post_twice(monkeypatch, stub_server, endpoint):
+    enqueue(USER_COMPANY_UUID, "event.created", {"id": 1})
+    enqueue(USER_COMPANY_UUID, "event.created", {"id": 2})
+    record_results = delivery.record_results
+    overlapping = []
+
+    def record_after_second_worker(results, using):
+        # A second worker runs while the first one is still posting.
+        overlapping.append(deliver_batch(100, 10, 5.0, using=using))
+        record_results(results, using)
+
+    monkeypatch.setattr(delivery, "record_results", record_after_second_worker)
+
+    call_command("deliver_webhooks", "--once")
+
+    assert overlapping == [0]
+    assert len(stub_server.received) == 2
+    assert not WebhookDelivery.objects.filter(delivered_at__isnull=True).exists()
+    endpoint.refresh_from_db()
+    assert endpoint.retry_at is None